@@ -47,6 +47,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.RequestMetricsMiddleware',
+    'core.middleware.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -58,6 +60,40 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'app.urls'
 
+# Request instrumentation: clients allowed to scrape /internal/metrics/,
+# and thresholds for logging a request with its most repeated SQL.
+METRICS_ALLOWED_IPS = os.environ.get(
+    'METRICS_ALLOWED_IPS', '127.0.0.1',
+).split(',')
+# Directory where each worker process writes its histograms so that any
+# of them can serve the totals; unset, every process reports its own.
+METRICS_DIR = os.environ.get('METRICS_DIR')
+METRICS_FLUSH_SECONDS = float(os.environ.get('METRICS_FLUSH_SECONDS', '1'))
+REQUEST_SLOW_LOG_MS = (
+    int(os.environ['REQUEST_SLOW_LOG_MS'])
+    if os.environ.get('REQUEST_SLOW_LOG_MS') else None
+)
+REQUEST_SLOW_LOG_QUERIES = (
+    int(os.environ['REQUEST_SLOW_LOG_QUERIES'])
+    if os.environ.get('REQUEST_SLOW_LOG_QUERIES') else None
+)
+
+# Response compression. HTML is left out: admin pages carry CSRF tokens
+# next to reflected input, which compression would expose to BREACH.
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+COMPRESSION_GZIP_LEVEL = int(os.environ.get('COMPRESSION_GZIP_LEVEL', 6))
+COMPRESSION_BROTLI_QUALITY = int(
+    os.environ.get('COMPRESSION_BROTLI_QUALITY', 5)
+)
+COMPRESSION_CONTENT_TYPES = {
+    'application/json',
+    'application/x-ndjson',
+    'application/msgpack',
+    'application/vnd.oai.openapi',
+    'application/vnd.oai.openapi+json',
+    'text/plain',
+}
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -75,22 +111,117 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'app.wsgi.application'
+ASGI_APPLICATION = 'app.asgi.application'
+
+# scripts/run.sh serves app.wsgi under uWSGI by default; SERVER_MODE=asgi
+# serves app.asgi under gunicorn with uvicorn workers instead. In ASGI
+# mode recipe, tag and ingredient reads run concurrently on a pool of
+# ASYNC_READ_THREADS per process, each holding its own DB connection.
+SERVER_MODE = os.environ.get('SERVER_MODE', 'wsgi')
+ASYNC_READ_VIEWS = SERVER_MODE == 'asgi'
+ASYNC_READ_THREADS = int(os.environ.get('ASYNC_READ_THREADS', 8))
 
 
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
+DB_ENGINE = os.environ.get('DB_ENGINE', 'django.db.backends.postgresql')
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': DB_ENGINE,
         'NAME': os.environ.get('DB_NAME'),
         'HOST': os.environ.get('DB_HOST'),
+        'PORT': os.environ.get('DB_PORT', ''),
         'USER': os.environ.get('DB_USER'),
-        'PASSWORD': os.environ.get('DB_PASS')
+        'PASSWORD': os.environ.get('DB_PASS'),
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        'OPTIONS': {
+            'connect_timeout': int(os.environ.get('DB_CONNECT_TIMEOUT', 5)),
+        } if DB_ENGINE == 'django.db.backends.postgresql' else {},
     }
 
 }
 
+# An optional read replica. Safe requests to the recipe, tag, ingredient,
+# stats and user endpoints read from it, except for DB_REPLICA_STICKY_SECONDS
+# after the same user's last write, so they always see their own changes.
+# Unset DB_REPLICA_* settings fall back to the primary's.
+if os.environ.get('DB_REPLICA_HOST') or os.environ.get('DB_REPLICA_NAME'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.environ.get('DB_REPLICA_NAME', DATABASES['default']['NAME']),
+        'HOST': os.environ.get('DB_REPLICA_HOST', DATABASES['default']['HOST']),
+        'PORT': os.environ.get('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+        'USER': os.environ.get('DB_REPLICA_USER', DATABASES['default']['USER']),
+        'PASSWORD': os.environ.get(
+            'DB_REPLICA_PASS', DATABASES['default']['PASSWORD'],
+        ),
+    }
+
+DATABASE_ROUTERS = ['core.db.PrimaryReplicaRouter']
+DB_READ_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DB_REPLICA_STICKY_SECONDS = int(os.environ.get('DB_REPLICA_STICKY_SECONDS', 10))
+DB_ROUTING_CACHE_ALIAS = 'default'
+
+# Ping persistent connections at the start of each request and drop dead
+# ones instead of failing the request.
+DB_CONN_HEALTH_CHECKS = bool(int(os.environ.get('DB_CONN_HEALTH_CHECKS', 1)))
+
+# PgBouncer in transaction pooling mode cannot hold server-side cursors
+# across statements, so queryset.iterator() must fetch client-side.
+if int(os.environ.get('DB_PGBOUNCER', 0)):
+    for database in DATABASES.values():
+        database['DISABLE_SERVER_SIDE_CURSORS'] = True
+
+
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django_redis.cache.RedisCache',
+            'LOCATION': os.environ.get('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+RECIPE_CACHE_ALIAS = 'default'
+RECIPE_CACHE_TIMEOUT = int(os.environ.get('RECIPE_CACHE_TIMEOUT', 300))
+
+TOKEN_AUTH_CACHE_ALIAS = 'default'
+TOKEN_AUTH_CACHE_TTL = int(os.environ.get('TOKEN_AUTH_CACHE_TTL', 300))
+TOKEN_AUTH_LOCAL_TTL = int(os.environ.get('TOKEN_AUTH_LOCAL_TTL', 10))
+TOKEN_AUTH_LOCAL_SIZE = int(os.environ.get('TOKEN_AUTH_LOCAL_SIZE', 1000))
+
+
+# Password hashing
+# https://docs.djangoproject.com/en/3.2/topics/auth/passwords/
+
+# Existing PBKDF2 hashes keep working and are upgraded to Argon2 on the
+# next successful login.
+PASSWORD_HASHERS = [
+    'core.hashers.TunableArgon2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+]
+
+ARGON2_TIME_COST = int(os.environ.get('ARGON2_TIME_COST', 2))
+ARGON2_MEMORY_COST = int(os.environ.get('ARGON2_MEMORY_COST', 19456))
+ARGON2_PARALLELISM = int(os.environ.get('ARGON2_PARALLELISM', 1))
+
+# Size of the per-process pool that runs login password checks; 0 runs
+# them on the request thread.
+LOGIN_HASH_WORKERS = int(os.environ.get('LOGIN_HASH_WORKERS', 0))
+LOGIN_HASH_QUEUE_SIZE = int(os.environ.get('LOGIN_HASH_QUEUE_SIZE', 8))
+LOGIN_HASH_TIMEOUT = float(os.environ.get('LOGIN_HASH_TIMEOUT', 2))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -133,6 +264,11 @@ MEDIA_URL = '/static/media/'
 STATIC_ROOT = '/vol/web/static/'
 MEDIA_ROOT = '/vol/web/media/'
 
+# Recipe image renditions are generated by a thread pool in each worker;
+# 0 workers processes them inline after the upload commits.
+IMAGE_PROCESSING_WORKERS = int(os.environ.get('IMAGE_PROCESSING_WORKERS', 2))
+IMAGE_MAX_PIXELS = int(os.environ.get('IMAGE_MAX_PIXELS', 40_000_000))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
 
@@ -141,9 +277,21 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 AUTH_USER_MODEL = 'core.User'
 
 REST_FRAMEWORK = {
-    'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema'
+    'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_THROTTLE_RATES': {
+        'token': os.environ.get('THROTTLE_TOKEN_RATE', '10/min'),
+        'signup': os.environ.get('THROTTLE_SIGNUP_RATE', '20/hour'),
+        'recipe_write': os.environ.get('THROTTLE_RECIPE_WRITE_RATE', '300/min'),
+    },
 }
 
+# Serve recipe, tag and ingredient lists from values() rows and orjson
+# instead of DRF serializers; the output is identical.
+FAST_LIST_SERIALIZERS = bool(int(os.environ.get('FAST_LIST_SERIALIZERS', 1)))
+
+API_PAGE_SIZE = int(os.environ.get('API_PAGE_SIZE', 50))
+API_MAX_PAGE_SIZE = int(os.environ.get('API_MAX_PAGE_SIZE', 500))
+
 SPECTACULAR_SETTINGS = {
     'COMPONENT_SPLIT_REQUEST': True,
 }
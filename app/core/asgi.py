@@ -0,0 +1,50 @@
+"""
+ asgi handler that produces streaming responses off the event loop
+"""
+from asgiref.sync import sync_to_async
+
+from django.core.handlers import asgi
+
+
+class ASGIHandler(asgi.ASGIHandler):
+    """Django's ASGI handler, with streaming bodies pulled from a thread.
+
+    Django 3.2 iterates streaming responses on the event loop, where the
+    ORM refuses to run and where a slow generator would stall every other
+    request. Each chunk is produced on the thread sensitive executor
+    instead, the thread the sync view itself ran on, so server side
+    cursors stay on the connection that opened them.
+    """
+
+    async def send_response(self, response, send):
+        if not response.streaming:
+            return await super().send_response(response, send)
+
+        headers = [
+            (header.encode('ascii'), value.encode('latin1'))
+            for header, value in response.items()
+        ]
+        for cookie in response.cookies.values():
+            headers.append(
+                (b'Set-Cookie', cookie.output(header='').encode().strip())
+            )
+        await send({
+            'type': 'http.response.start',
+            'status': response.status_code,
+            'headers': headers,
+        })
+
+        next_part = sync_to_async(next, thread_sensitive=True)
+        parts = iter(response)
+        while True:
+            part = await next_part(parts, None)
+            if part is None:
+                break
+            for chunk, _ in self.chunk_bytes(part):
+                await send({
+                    'type': 'http.response.body',
+                    'body': chunk,
+                    'more_body': True,
+                })
+        await send({'type': 'http.response.body'})
+        await sync_to_async(response.close, thread_sensitive=True)()
@@ -0,0 +1,87 @@
+"""
+ response compression helpers
+"""
+import gzip
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from django.conf import settings
+
+
+def available_encodings():
+    """Supported content codings, in order of preference."""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def parse_accept_encoding(header):
+    """Return {coding: q} for an Accept-Encoding header."""
+    qualities = {}
+    for part in header.split(','):
+        coding, *params = [p.strip() for p in part.split(';')]
+        if not coding:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        qualities[coding.lower()] = q
+
+    return qualities
+
+
+def negotiate_encoding(header):
+    """Pick the coding to use for a request, or None to send it as is.
+
+    The client's highest q-value wins, and ties go to the server's order
+    of preference. `*` stands for every coding the header does not list.
+    """
+    qualities = parse_accept_encoding(header)
+    wildcard = qualities.get('*', 0.0)
+    best, best_q = None, 0.0
+    for coding in available_encodings():
+        q = qualities.get(coding, wildcard)
+        if q > best_q:
+            best, best_q = coding, q
+
+    return best
+
+
+def compress(coding, data):
+    if coding == 'br':
+        return brotli.compress(
+            data, quality=settings.COMPRESSION_BROTLI_QUALITY,
+        )
+
+    return gzip.compress(
+        data, compresslevel=settings.COMPRESSION_GZIP_LEVEL, mtime=0,
+    )
+
+
+def compress_sequence(coding, sequence):
+    """Compress a streaming response body as it is produced."""
+    if coding == 'br':
+        compressor = brotli.Compressor(
+            quality=settings.COMPRESSION_BROTLI_QUALITY,
+        )
+        process, finish = compressor.process, compressor.finish
+    else:
+        compressor = zlib.compressobj(
+            settings.COMPRESSION_GZIP_LEVEL,
+            zlib.DEFLATED,
+            16 + zlib.MAX_WBITS,
+        )
+        process, finish = compressor.compress, compressor.flush
+
+    for item in sequence:
+        data = process(item)
+        if data:
+            yield data
+    yield finish()
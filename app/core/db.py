@@ -0,0 +1,115 @@
+"""
+ database connection helpers and read replica routing
+"""
+import contextvars
+import random
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from rest_framework.permissions import SAFE_METHODS
+
+PINNED_KEY = 'db:pinned:{user_id}'
+
+# The alias reads of the current request go to, None for the primary.
+_read_alias = contextvars.ContextVar('read_alias', default=None)
+
+
+def close_unhealthy_connections(**kwargs):
+    """Close persistent connections that no longer answer a ping.
+
+    Runs after Django's own `close_old_connections` on request_started, so
+    only connections kept open by CONN_MAX_AGE are checked.
+    """
+    if not settings.DB_CONN_HEALTH_CHECKS:
+        return
+
+    for conn in connections.all():
+        if conn.connection is not None and not conn.in_atomic_block:
+            if not conn.is_usable():
+                conn.close()
+
+
+def _get_cache():
+    return caches[settings.DB_ROUTING_CACHE_ALIAS]
+
+
+def pin_to_primary(user_id):
+    """Send the user's reads to the primary for DB_REPLICA_STICKY_SECONDS,
+    until the replicas have caught up with a write of theirs.
+    """
+    if settings.DB_READ_REPLICAS:
+        _get_cache().set(
+            PINNED_KEY.format(user_id=user_id), 1,
+            timeout=settings.DB_REPLICA_STICKY_SECONDS,
+        )
+
+
+def is_pinned(user_id):
+    return _get_cache().get(PINNED_KEY.format(user_id=user_id)) is not None
+
+
+def choose_read_alias(user_id):
+    """Return the replica to serve a user's reads from, or None when there
+    is none or the user wrote too recently.
+    """
+    replicas = settings.DB_READ_REPLICAS
+    if not replicas or is_pinned(user_id):
+        return None
+
+    return random.choice(replicas)
+
+
+class PrimaryReplicaRouter:
+    """Route reads to the replica chosen for the current request.
+
+    Reads go to the primary outside of `ReplicaReadMixin` views and inside
+    transactions on it, and writes always do, including saves of objects
+    that were loaded from a replica.
+    """
+
+    def db_for_read(self, model, **hints):
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the primary's data.
+        databases = {DEFAULT_DB_ALIAS, *settings.DB_READ_REPLICAS}
+        if {obj1._state.db, obj2._state.db} <= databases:
+            return True
+
+        return None
+
+
+class ReplicaReadMixin:
+    """Serve a view's safe requests from a read replica.
+
+    The replica is chosen once the request is authenticated, so the
+    token lookup and a user's reads after their own writes both stay on
+    the primary. Unsafe requests pin the user to the primary.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        token = _read_alias.set(None)
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            _read_alias.reset(token)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method in SAFE_METHODS and request.user.is_authenticated:
+            _read_alias.set(choose_read_alias(request.user.pk))
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        unsafe = request.method not in SAFE_METHODS
+        if unsafe and request.user.is_authenticated:
+            pin_to_primary(request.user.pk)
+
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -0,0 +1,26 @@
+"""
+ password hashers
+"""
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher
+
+
+class TunableArgon2PasswordHasher(Argon2PasswordHasher):
+    """Argon2 with cost parameters taken from settings.
+
+    The algorithm name is unchanged, so hashes stay interchangeable with
+    Django's hasher, and `must_update` rehashes on login whenever the
+    configured costs differ from those stored in the hash.
+    """
+
+    @property
+    def time_cost(self):
+        return settings.ARGON2_TIME_COST
+
+    @property
+    def memory_cost(self):
+        return settings.ARGON2_MEMORY_COST
+
+    @property
+    def parallelism(self):
+        return settings.ARGON2_PARALLELISM
@@ -0,0 +1,275 @@
+"""
+ per view request metrics with a prometheus text exporter
+"""
+import bisect
+import glob
+import json
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextvars import ContextVar
+
+from django.conf import settings
+
+DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+METRICS = {
+    'http_request_duration_seconds': (
+        'Wall time spent handling the request.', DURATION_BUCKETS,
+    ),
+    'http_request_db_queries': (
+        'Database queries executed while handling the request.',
+        QUERY_BUCKETS,
+    ),
+    'http_request_db_duration_seconds': (
+        'Time spent in database queries while handling the request.',
+        DURATION_BUCKETS,
+    ),
+    'http_response_size_bytes': (
+        'Size of the response body, excluding streamed responses.',
+        SIZE_BUCKETS,
+    ),
+}
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _empty_histograms():
+    return {
+        name: defaultdict(lambda buckets=buckets: Histogram(buckets))
+        for name, (_, buckets) in METRICS.items()
+    }
+
+
+class Registry:
+    """Thread safe store of labelled histograms.
+
+    Each process counts in memory. With METRICS_DIR set, it also writes a
+    snapshot there at most every METRICS_FLUSH_SECONDS, and `render()`
+    sums the snapshots of every worker, so any of them can answer a
+    scrape. Files of exited workers keep counting until the directory is
+    cleared, as `scripts/run.sh` does on start.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = None
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._start(os.getpid())
+
+    def _start(self, pid):
+        # A forked worker must not add its parent's counts, or write to
+        # the parent's file, so it starts over under a file of its own.
+        if self._pid == pid and self._path:
+            try:
+                os.remove(self._path)
+            except OSError:
+                pass
+        self._pid = pid
+        self._path = None
+        self._flushed_at = 0
+        self._histograms = _empty_histograms()
+
+    def _check_pid(self):
+        pid = os.getpid()
+        if pid != self._pid:
+            self._start(pid)
+
+    def observe(self, labels, **values):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._check_pid()
+            for name, value in values.items():
+                self._histograms[name][key].observe(value)
+
+            if time.monotonic() - self._flushed_at >= (
+                settings.METRICS_FLUSH_SECONDS
+            ):
+                self._flush()
+
+    def get(self, name, **labels):
+        """Return this process's histogram for `name` and `labels`."""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._check_pid()
+            return self._histograms[name].get(key)
+
+    def _snapshot(self):
+        return {
+            name: [
+                [list(map(list, key)), hist.counts, hist.sum, hist.count]
+                for key, hist in histograms.items()
+            ]
+            for name, histograms in self._histograms.items()
+        }
+
+    def _flush(self):
+        directory = settings.METRICS_DIR
+        if not directory:
+            return
+
+        if self._path is None:
+            self._path = os.path.join(
+                directory, f'{self._pid}-{uuid.uuid4().hex}.json',
+            )
+        tmp_path = self._path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self._snapshot(), f)
+        os.replace(tmp_path, self._path)
+        self._flushed_at = time.monotonic()
+
+    def _collect(self):
+        """Return every histogram summed over the processes sharing
+        METRICS_DIR, or this process's own without it.
+        """
+        directory = settings.METRICS_DIR
+        if not directory:
+            return self._histograms
+
+        self._flush()
+        merged = _empty_histograms()
+        for path in glob.glob(os.path.join(directory, '*.json')):
+            try:
+                with open(path) as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                # Removed since the listing; nothing else is partial,
+                # as snapshots are swapped in whole.
+                continue
+
+            for name, entries in snapshot.items():
+                if name not in merged:
+                    continue
+                for key, counts, total, count in entries:
+                    hist = merged[name][tuple(map(tuple, key))]
+                    hist.counts = [a + b for a, b in zip(hist.counts, counts)]
+                    hist.sum += total
+                    hist.count += count
+
+        return merged
+
+    def render(self):
+        """Render every histogram in the Prometheus text format."""
+        lines = []
+        with self._lock:
+            self._check_pid()
+            histograms = self._collect()
+            for name, (help_text, buckets) in METRICS.items():
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} histogram')
+                for key, hist in sorted(histograms[name].items()):
+                    labels = ','.join(
+                        f'{k}="{_escape(v)}"' for k, v in key
+                    )
+                    cumulative = 0
+                    bounds = [*buckets, '+Inf']
+                    for bound, count in zip(bounds, hist.counts):
+                        cumulative += count
+                        lines.append(
+                            f'{name}_bucket{{{labels},le="{bound}"}} '
+                            f'{cumulative}'
+                        )
+                    lines.append(f'{name}_sum{{{labels}}} {hist.sum}')
+                    lines.append(f'{name}_count{{{labels}}} {hist.count}')
+
+        return '\n'.join(lines) + '\n'
+
+
+def render_counter(name, help_text, value):
+    """Render a single unlabelled counter in the Prometheus text format."""
+    return (
+        f'# HELP {name} {help_text}\n'
+        f'# TYPE {name} counter\n'
+        f'{name} {value}\n'
+    )
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"')
+
+
+registry = Registry()
+
+
+class QueryCollector:
+    """Counts and times the database queries of one request."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = defaultdict(lambda: [0, 0.0])
+
+    def add(self, sql, elapsed):
+        self.count += 1
+        self.duration += elapsed
+        stats = self.statements[sql]
+        stats[0] += 1
+        stats[1] += elapsed
+
+    def top_repeated(self, limit):
+        return sorted(
+            self.statements.items(),
+            key=lambda item: (item[1][0], item[1][1]),
+            reverse=True,
+        )[:limit]
+
+
+# Context variables follow a request from the event loop into
+# sync_to_async and executor threads, wherever its queries end up running.
+current_collector = ContextVar('query_collector', default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    collector = current_collector.get()
+    if collector is None:
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        collector.add(sql, time.perf_counter() - start)
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    """`connection_created` receiver adding `record_query` to a connection.
+
+    It goes first so `execute_wrapper()` blocks pop their own wrapper.
+    """
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_query)
+
+
+def view_name(view_func, method):
+    """Name a resolved view, e.g. `RecipeViewSet.list` for DRF viewsets."""
+    cls = getattr(view_func, 'cls', None)
+    if cls is None:
+        view_class = getattr(view_func, 'view_class', None)
+        return getattr(view_class, '__name__', view_func.__name__)
+
+    actions = getattr(view_func, 'actions', None) or {}
+    action = actions.get(method.lower())
+    if action:
+        return f'{cls.__name__}.{action}'
+
+    return cls.__name__
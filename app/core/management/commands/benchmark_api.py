@@ -0,0 +1,280 @@
+"""
+ command to drive the api with concurrent clients and report latency
+ percentiles and throughput as json
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlencode
+from urllib.request import Request, urlopen
+
+import json
+import random
+import threading
+import time
+import uuid
+
+from PIL import Image
+
+ENDPOINTS = ('list', 'filter', 'detail', 'create', 'upload_image', 'token')
+DEFAULT_MIX = (
+    'list=40,filter=20,detail=20,create=10,upload_image=5,token=5'
+)
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    index = max(0, int(round(pct / 100 * len(sorted_values))) - 1)
+    return sorted_values[index]
+
+
+def parse_mix(value):
+    weights = {}
+    for item in value.split(','):
+        name, _, weight = item.partition('=')
+        if name not in ENDPOINTS or not weight.isdigit():
+            raise CommandError(
+                f'Invalid mix entry {item!r}, expected one of '
+                f'{", ".join(ENDPOINTS)} with an integer weight.'
+            )
+        weights[name] = int(weight)
+
+    return weights
+
+
+def jpeg_bytes():
+    out = BytesIO()
+    Image.new('RGB', (1200, 900), 'orange').save(out, format='JPEG')
+    return out.getvalue()
+
+
+def multipart(field, filename, content, content_type):
+    boundary = uuid.uuid4().hex
+    body = (
+        f'--{boundary}\r\n'
+        f'Content-Disposition: form-data; name="{field}"; '
+        f'filename="{filename}"\r\n'
+        f'Content-Type: {content_type}\r\n\r\n'
+    ).encode() + content + f'\r\n--{boundary}--\r\n'.encode()
+
+    return body, f'multipart/form-data; boundary={boundary}'
+
+
+class Recorder:
+    """Thread safe collection of per endpoint timings and status codes."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.timings = {}
+        self.errors = {}
+        self.statuses = {}
+
+    def add(self, endpoint, status, elapsed_ms):
+        with self._lock:
+            self.timings.setdefault(endpoint, []).append(elapsed_ms)
+            self.statuses[str(status)] = self.statuses.get(str(status), 0) + 1
+            if not 200 <= status < 300:
+                self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+    def summary(self, wall_seconds):
+        endpoints = {}
+        for endpoint, timings in sorted(self.timings.items()):
+            timings = sorted(timings)
+            endpoints[endpoint] = {
+                'requests': len(timings),
+                'errors': self.errors.get(endpoint, 0),
+                'mean_ms': round(sum(timings) / len(timings), 3),
+                'p50_ms': round(percentile(timings, 50), 3),
+                'p95_ms': round(percentile(timings, 95), 3),
+                'p99_ms': round(percentile(timings, 99), 3),
+                'throughput_rps': round(len(timings) / wall_seconds, 2),
+            }
+        total = sum(len(t) for t in self.timings.values())
+
+        return {
+            'requests': total,
+            'errors': sum(self.errors.values()),
+            'throughput_rps': round(total / wall_seconds, 2),
+            'status_codes': self.statuses,
+            'endpoints': endpoints,
+        }
+
+
+class Client:
+    """One simulated user issuing requests over its own token."""
+
+    def __init__(self, base_url, timeout, recorder):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.recorder = recorder
+        self.token = None
+        self.credentials = None
+
+    def request(self, endpoint, method, path, data=None, content_type=None,
+                query=None):
+        url = self.base_url + path
+        if query:
+            url += '?' + urlencode(query)
+        headers = {'Accept': 'application/json'}
+        if self.token:
+            headers['Authorization'] = f'Token {self.token}'
+        if content_type:
+            headers['Content-Type'] = content_type
+
+        start = time.perf_counter()
+        try:
+            with urlopen(
+                Request(url, data=data, headers=headers, method=method),
+                timeout=self.timeout,
+            ) as res:
+                status, body = res.status, res.read()
+        except HTTPError as exc:
+            status, body = exc.code, exc.read()
+        except (URLError, OSError):
+            status, body = 599, b''
+        elapsed = (time.perf_counter() - start) * 1000
+
+        if endpoint:
+            self.recorder.add(endpoint, status, elapsed)
+        if 200 <= status < 300 and body:
+            return json.loads(body)
+        return None
+
+    def login(self, email, password):
+        self.credentials = (email, password)
+        data = self.request(
+            'token', 'POST', '/api/user/token/',
+            data=urlencode({'email': email, 'password': password}).encode(),
+            content_type='application/x-www-form-urlencoded',
+        )
+        self.token = data and data['token']
+        return self.token is not None
+
+    def discover(self):
+        """Fetch ids to use for detail and filter requests, unmeasured."""
+        recipes = self.request(None, 'GET', '/api/recipe/recipes/') or {}
+        tags = self.request(None, 'GET', '/api/recipe/tags/') or {}
+        self.recipe_ids = [r['id'] for r in recipes.get('results', [])]
+        self.tag_ids = [t['id'] for t in tags.get('results', [])]
+
+    def run(self, endpoint, rng, image):
+        if endpoint == 'token':
+            self.login(*self.credentials)
+        elif endpoint == 'list':
+            self.request(endpoint, 'GET', '/api/recipe/recipes/')
+        elif endpoint == 'filter' and self.tag_ids:
+            ids = rng.sample(self.tag_ids, min(2, len(self.tag_ids)))
+            self.request(
+                endpoint, 'GET', '/api/recipe/recipes/',
+                query={'tags': ','.join(map(str, ids))},
+            )
+        elif endpoint == 'create':
+            payload = {
+                'title': f'Benchmark recipe {rng.randint(0, 10 ** 6)}',
+                'time_minutes': rng.randint(5, 120),
+                'price': '9.99',
+                'tags': [{'name': 'benchmark'}],
+                'ingredients': [{'name': 'salt'}],
+            }
+            created = self.request(
+                endpoint, 'POST', '/api/recipe/recipes/',
+                data=json.dumps(payload).encode(),
+                content_type='application/json',
+            )
+            if created:
+                self.recipe_ids.append(created['id'])
+        elif not self.recipe_ids:
+            return
+        elif endpoint == 'detail':
+            recipe_id = rng.choice(self.recipe_ids)
+            self.request(endpoint, 'GET', f'/api/recipe/recipes/{recipe_id}/')
+        elif endpoint == 'upload_image':
+            recipe_id = rng.choice(self.recipe_ids)
+            body, content_type = multipart(
+                'image', 'benchmark.jpg', image, 'image/jpeg',
+            )
+            self.request(
+                endpoint, 'POST',
+                f'/api/recipe/recipes/{recipe_id}/upload_image/',
+                data=body, content_type=content_type,
+            )
+
+
+class Command(BaseCommand):
+    help = (
+        'Run concurrent clients against a running server, logged in as the '
+        'users created by generate_load_data, and print latency '
+        'percentiles and throughput per endpoint as JSON. Raise '
+        'THROTTLE_TOKEN_RATE and THROTTLE_RECIPE_WRITE_RATE on the server '
+        'first or the results will mostly measure throttling.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://localhost:8000')
+        parser.add_argument('--clients', type=int, default=10)
+        parser.add_argument(
+            '--requests', type=int, default=200,
+            help='Requests per client after logging in.',
+        )
+        parser.add_argument('--mix', default=DEFAULT_MIX)
+        parser.add_argument('--users', type=int, default=10)
+        parser.add_argument('--prefix', default='loadtest')
+        parser.add_argument('--password', default='loadtest')
+        parser.add_argument('--timeout', type=float, default=30)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--label', default='',
+            help='Free form label, e.g. a commit hash, stored in the output.',
+        )
+        parser.add_argument('--output', help='Also write the JSON here.')
+
+    def _client(self, index, options, weights, recorder, image):
+        rng = random.Random(options['seed'] + index)
+        client = Client(options['base_url'], options['timeout'], recorder)
+        email = f'{options["prefix"]}{index % options["users"]}@example.com'
+        if not client.login(email, options['password']):
+            return
+        client.discover()
+
+        endpoints = rng.choices(
+            list(weights), weights=list(weights.values()),
+            k=options['requests'],
+        )
+        for endpoint in endpoints:
+            client.run(endpoint, rng, image)
+
+    def handle(self, *args, **options):
+        weights = parse_mix(options['mix'])
+        recorder = Recorder()
+        image = jpeg_bytes()
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['clients']) as pool:
+            futures = [
+                pool.submit(
+                    self._client, i, options, weights, recorder, image,
+                )
+                for i in range(options['clients'])
+            ]
+            for future in futures:
+                future.result()
+        wall_seconds = time.perf_counter() - start
+
+        report = {
+            'label': options['label'],
+            'base_url': options['base_url'],
+            'clients': options['clients'],
+            'requests_per_client': options['requests'],
+            'mix': weights,
+            'duration_s': round(wall_seconds, 3),
+            **recorder.summary(wall_seconds),
+        }
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+        self.stdout.write(output)
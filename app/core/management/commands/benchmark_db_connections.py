@@ -0,0 +1,71 @@
+"""
+ command to compare per request connection overhead with and without
+ persistent connections
+"""
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+
+import statistics
+import time
+
+
+class Command(BaseCommand):
+    help = (
+        'Simulate request cycles against a database alias with '
+        'CONN_MAX_AGE=0 and with persistent connections.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--queries', type=int, default=3)
+        parser.add_argument('--database', default='default')
+        parser.add_argument('--max-age', type=int, default=60)
+
+    def _run(self, conn, max_age, options):
+        conn.close()
+        conn.settings_dict['CONN_MAX_AGE'] = max_age
+        timings = []
+        opened = 0
+        for _ in range(options['requests']):
+            start = time.perf_counter()
+            close_old_connections()
+            if conn.connection is None:
+                opened += 1
+            with conn.cursor() as cursor:
+                for _ in range(options['queries']):
+                    cursor.execute('SELECT 1')
+                    cursor.fetchone()
+            close_old_connections()
+            timings.append((time.perf_counter() - start) * 1000)
+
+        timings.sort()
+        return {
+            'opened': opened,
+            'p50': statistics.median(timings),
+            'p95': timings[int(len(timings) * 0.95) - 1],
+            'total': sum(timings),
+        }
+
+    def handle(self, *args, **options):
+        conn = connections[options['database']]
+        original = conn.settings_dict['CONN_MAX_AGE']
+        try:
+            results = {
+                'CONN_MAX_AGE=0': self._run(conn, 0, options),
+                f'CONN_MAX_AGE={options["max_age"]}': self._run(
+                    conn, options['max_age'], options,
+                ),
+            }
+        finally:
+            conn.close()
+            conn.settings_dict['CONN_MAX_AGE'] = original
+
+        self.stdout.write(
+            f'{"mode":<18} {"opened":>8} {"p50 ms":>8} {"p95 ms":>8} '
+            f'{"total ms":>10}'
+        )
+        for mode, r in results.items():
+            self.stdout.write(
+                f'{mode:<18} {r["opened"]:>8} {r["p50"]:>8.3f} '
+                f'{r["p95"]:>8.3f} {r["total"]:>10.1f}'
+            )
@@ -0,0 +1,125 @@
+"""
+ command to compare DRF serializers with the fast list path on a page of
+ recipes
+"""
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Prefetch
+
+from decimal import Decimal
+
+import random
+import statistics
+import time
+
+from rest_framework.renderers import JSONRenderer
+
+from core.models import Recipe, Tag, Ingredient
+from recipe import fast_list
+from recipe.renderers import FastJSONRenderer
+from recipe.serializers import RecipeSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        'Serialize and render one page of recipes with RecipeSerializer '
+        'and with the fast list path, and print the median timings. All '
+        'seeded data is rolled back afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=1000)
+        parser.add_argument('--tags-per-recipe', type=int, default=3)
+        parser.add_argument('--ingredients-per-recipe', type=int, default=6)
+        parser.add_argument('--repeat', type=int, default=10)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def _seed(self, user, options, rng):
+        Recipe.objects.bulk_create([
+            Recipe(
+                user=user,
+                title=f'Recipe {i}',
+                time_minutes=rng.randint(5, 120),
+                price=Decimal(rng.randint(100, 9999)) / 100,
+            )
+            for i in range(options['items'])
+        ])
+        recipe_ids = list(
+            Recipe.objects.filter(user=user).values_list('id', flat=True)
+        )
+        for model, relation, per_recipe in (
+            (Tag, 'tags', options['tags_per_recipe']),
+            (Ingredient, 'ingredients', options['ingredients_per_recipe']),
+        ):
+            model.objects.bulk_create([
+                model(user=user, name=f'{relation} {i}')
+                for i in range(per_recipe * 5)
+            ])
+            pool = list(
+                model.objects.filter(user=user).values_list('id', flat=True)
+            )
+            field = Recipe._meta.get_field(relation)
+            through = field.remote_field.through
+            column = field.m2m_reverse_name()
+            through.objects.bulk_create([
+                through(recipe_id=recipe_id, **{column: obj_id})
+                for recipe_id in recipe_ids
+                for obj_id in rng.sample(pool, per_recipe)
+            ])
+
+    def _serializer(self, queryset):
+        recipes = queryset.prefetch_related(
+            Prefetch('tags', queryset=Tag.objects.order_by('id')),
+            Prefetch(
+                'ingredients', queryset=Ingredient.objects.order_by('id'),
+            ),
+        )
+        data = RecipeSerializer(recipes, many=True).data
+        return JSONRenderer().render(data)
+
+    def _fast(self, queryset):
+        plan = fast_list.build_plan(RecipeSerializer())
+        columns = [source for _, source, _, child in plan if child is None]
+        rows = list(queryset.values(*columns))
+        ids = [row['id'] for row in rows]
+        related = {
+            name: fast_list.related_items(Recipe, source, ids, child)
+            for name, source, _, child in plan if child is not None
+        }
+        data = [fast_list.represent(row, plan, related) for row in rows]
+        return FastJSONRenderer().render(data)
+
+    def _time(self, fn, queryset, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            body = fn(queryset)
+            timings.append((time.perf_counter() - start) * 1000)
+
+        return statistics.median(timings), body
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        with transaction.atomic():
+            user = get_user_model().objects.create_user(
+                email=f'benchmark-{time.time_ns()}@example.com',
+            )
+            self._seed(user, options, rng)
+            queryset = Recipe.objects.filter(user=user).order_by('-id')
+
+            slow_ms, slow_body = self._time(
+                self._serializer, queryset, options['repeat'],
+            )
+            fast_ms, fast_body = self._time(
+                self._fast, queryset, options['repeat'],
+            )
+            transaction.set_rollback(True)
+
+        self.stdout.write(f'{"path":<12} {"median ms":>10}')
+        self.stdout.write(f'{"serializer":<12} {slow_ms:>10.2f}')
+        self.stdout.write(f'{"fast":<12} {fast_ms:>10.2f}')
+        self.stdout.write(
+            f'{options["items"]} items, {slow_ms / fast_ms:.1f}x faster, '
+            f'identical output: {slow_body == fast_body}'
+        )
@@ -0,0 +1,58 @@
+"""
+ command to measure login throughput of a single worker per hasher
+"""
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import override_settings
+
+import time
+
+from user.serializers import AuthTokenSerializer
+
+HASHERS = {
+    'pbkdf2': 'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'argon2': 'core.hashers.TunableArgon2PasswordHasher',
+}
+PASSWORD = 'benchmark-pass-123'
+
+
+class Command(BaseCommand):
+    help = (
+        'Time sequential logins through AuthTokenSerializer for each '
+        'password hasher. All data is rolled back afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=20)
+        parser.add_argument(
+            '--hashers', default=','.join(HASHERS),
+            help='Comma separated subset of: ' + ', '.join(HASHERS),
+        )
+
+    def _bench(self, hasher, logins):
+        with override_settings(PASSWORD_HASHERS=[HASHERS[hasher]]):
+            with transaction.atomic():
+                email = f'benchmark-{time.time_ns()}@example.com'
+                get_user_model().objects.create_user(
+                    email=email, password=PASSWORD,
+                )
+                payload = {'email': email, 'password': PASSWORD}
+                start = time.perf_counter()
+                for _ in range(logins):
+                    serializer = AuthTokenSerializer(data=payload)
+                    serializer.is_valid(raise_exception=True)
+                elapsed = time.perf_counter() - start
+                transaction.set_rollback(True)
+
+        return elapsed
+
+    def handle(self, *args, **options):
+        logins = options['logins']
+        self.stdout.write(f'{"hasher":<8} {"ms/login":>10} {"logins/s":>10}')
+        for hasher in options['hashers'].split(','):
+            elapsed = self._bench(hasher, logins)
+            self.stdout.write(
+                f'{hasher:<8} {elapsed / logins * 1000:>10.1f} '
+                f'{logins / elapsed:>10.1f}'
+            )
@@ -0,0 +1,102 @@
+"""
+ command to measure recipe filter latency as recipe count grows
+"""
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from decimal import Decimal
+
+import random
+import statistics
+import time
+
+from core.models import Recipe, Tag
+from recipe import filters
+
+
+class Command(BaseCommand):
+    help = (
+        'Time tag filtering for one user at increasing recipe counts. '
+        'All seeded data is rolled back afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', default='100,1000,10000',
+            help='Comma separated recipe counts to measure.',
+        )
+        parser.add_argument('--tags', type=int, default=50)
+        parser.add_argument('--tags-per-recipe', type=int, default=3)
+        parser.add_argument('--filter-tags', type=int, default=3)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def _seed(self, user, tags, start, stop, options, rng):
+        recipes = Recipe.objects.bulk_create([
+            Recipe(
+                user=user,
+                title=f'Recipe {i}',
+                time_minutes=rng.randint(5, 120),
+                price=Decimal(rng.randint(100, 9999)) / 100,
+            )
+            for i in range(start, stop)
+        ])
+        if any(recipe.pk is None for recipe in recipes):
+            recipes = Recipe.objects.filter(user=user).order_by('id')[start:]
+
+        Recipe.tags.through.objects.bulk_create([
+            Recipe.tags.through(recipe_id=recipe.pk, tag_id=tag.pk)
+            for recipe in recipes
+            for tag in rng.sample(tags, options['tags_per_recipe'])
+        ])
+
+    def _time(self, queryset, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            list(queryset.values_list('id', flat=True)[:100])
+            timings.append((time.perf_counter() - start) * 1000)
+
+        return statistics.median(timings)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        sizes = sorted(int(size) for size in options['sizes'].split(','))
+
+        self.stdout.write(
+            f'{"recipes":>10} {"any (ms)":>10} {"all (ms)":>10}'
+        )
+        with transaction.atomic():
+            user = get_user_model().objects.create_user(
+                email=f'benchmark-{time.time_ns()}@example.com',
+            )
+            Tag.objects.bulk_create([
+                Tag(user=user, name=f'tag{i}') for i in range(options['tags'])
+            ])
+            tags = list(Tag.objects.filter(user=user))
+            tag_ids = [tag.pk for tag in tags[:options['filter_tags']]]
+            base = Recipe.objects.filter(user=user).order_by('-id')
+
+            seeded = 0
+            for size in sizes:
+                self._seed(user, tags, seeded, size, options, rng)
+                seeded = size
+
+                any_ms = self._time(
+                    filters.filter_by_relation(
+                        base, 'tags', tag_ids, filters.MATCH_ANY,
+                    ),
+                    options['repeat'],
+                )
+                all_ms = self._time(
+                    filters.filter_by_relation(
+                        base, 'tags', tag_ids, filters.MATCH_ALL,
+                    ),
+                    options['repeat'],
+                )
+                self.stdout.write(
+                    f'{size:>10} {any_ms:>10.2f} {all_ms:>10.2f}'
+                )
+
+            transaction.set_rollback(True)
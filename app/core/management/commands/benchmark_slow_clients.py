@@ -0,0 +1,135 @@
+"""
+ command to measure read throughput while slow clients upload images
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import json
+import random
+import socket
+import time
+
+from core.management.commands.benchmark_api import (
+    Client,
+    Recorder,
+    jpeg_bytes,
+    multipart,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Hold --slow-clients image uploads open by trickling their bodies, '
+        'while --clients fast clients read recipes for --duration seconds, '
+        'and print read latency percentiles and throughput as JSON. Point '
+        'it straight at the app server, not at a buffering proxy, to '
+        'compare SERVER_MODE=wsgi with SERVER_MODE=asgi.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://localhost:8000')
+        parser.add_argument('--clients', type=int, default=8)
+        parser.add_argument('--slow-clients', type=int, default=8)
+        parser.add_argument('--duration', type=float, default=10)
+        parser.add_argument(
+            '--slow-rate', type=int, default=512,
+            help='Bytes per second each slow client sends.',
+        )
+        parser.add_argument('--users', type=int, default=10)
+        parser.add_argument('--prefix', default='loadtest')
+        parser.add_argument('--password', default='loadtest')
+        parser.add_argument('--timeout', type=float, default=30)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--label', default='')
+        parser.add_argument('--output', help='Also write the JSON here.')
+
+    def _login(self, index, options, recorder):
+        client = Client(options['base_url'], options['timeout'], recorder)
+        email = f'{options["prefix"]}{index % options["users"]}@example.com'
+        if not client.login(email, options['password']):
+            raise CommandError(
+                f'Could not log in as {email}; run generate_load_data and '
+                f'raise THROTTLE_TOKEN_RATE on the server.'
+            )
+        client.discover()
+
+        return client
+
+    def _slow_upload(self, client, options, deadline, image):
+        """Send an upload request whose body arrives a few bytes at a time
+        and is abandoned at the deadline.
+        """
+        url = urlsplit(options['base_url'])
+        recipe_id = random.Random(options['seed']).choice(client.recipe_ids)
+        body, content_type = multipart(
+            'image', 'slow.jpg', image, 'image/jpeg',
+        )
+        head = (
+            f'POST /api/recipe/recipes/{recipe_id}/upload_image/ HTTP/1.1\r\n'
+            f'Host: {url.netloc}\r\n'
+            f'Authorization: Token {client.token}\r\n'
+            f'Content-Type: {content_type}\r\n'
+            f'Content-Length: {len(body)}\r\n\r\n'
+        ).encode()
+
+        step = max(1, options['slow_rate'] // 10)
+        with socket.create_connection((url.hostname, url.port or 80)) as sock:
+            sock.sendall(head)
+            sent = 0
+            while time.monotonic() < deadline and sent < len(body):
+                sock.sendall(body[sent:sent + step])
+                sent += step
+                time.sleep(0.1)
+
+    def _read(self, client, deadline):
+        while time.monotonic() < deadline:
+            client.run('list', None, None)
+
+    def handle(self, *args, **options):
+        login_recorder = Recorder()
+        recorder = Recorder()
+        total = options['clients'] + options['slow_clients']
+        with ThreadPoolExecutor(max_workers=total) as pool:
+            clients = list(pool.map(
+                lambda i: self._login(i, options, login_recorder),
+                range(total),
+            ))
+        fast, slow = clients[:options['clients']], clients[options['clients']:]
+        for client in fast:
+            client.recorder = recorder
+        image = jpeg_bytes()
+
+        start = time.perf_counter()
+        deadline = time.monotonic() + options['duration']
+        with ThreadPoolExecutor(max_workers=total) as pool:
+            uploads = [
+                pool.submit(
+                    self._slow_upload, client, options, deadline, image,
+                )
+                for client in slow
+            ]
+            # Give the uploads a head start so they occupy the server.
+            time.sleep(min(1, options['duration'] / 10))
+            reads = [
+                pool.submit(self._read, client, deadline) for client in fast
+            ]
+            for future in uploads + reads:
+                future.result()
+        wall_seconds = time.perf_counter() - start
+
+        report = {
+            'label': options['label'],
+            'base_url': options['base_url'],
+            'clients': options['clients'],
+            'slow_clients': options['slow_clients'],
+            'slow_rate': options['slow_rate'],
+            'duration_s': round(wall_seconds, 3),
+            **recorder.summary(wall_seconds),
+        }
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+        self.stdout.write(output)
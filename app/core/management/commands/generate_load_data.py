@@ -0,0 +1,176 @@
+"""
+ command to generate synthetic users, recipes, tags and ingredients for
+ load testing
+"""
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from decimal import Decimal
+
+import random
+import time
+
+from core.models import Recipe, Tag, Ingredient
+from recipe import search, stats
+
+ADJECTIVES = (
+    'smoky', 'spicy', 'creamy', 'crispy', 'roasted', 'grilled', 'quick',
+    'hearty', 'tangy', 'sweet', 'rustic', 'zesty', 'slow cooked', 'fresh',
+)
+DISHES = (
+    'soup', 'stew', 'curry', 'salad', 'pasta', 'risotto', 'tacos', 'pie',
+    'noodles', 'omelette', 'burger', 'casserole', 'chili', 'flatbread',
+)
+TAGS = (
+    'vegan', 'vegetarian', 'gluten free', 'dinner', 'lunch', 'breakfast',
+    'dessert', 'quick', 'budget', 'spicy', 'comfort food', 'healthy',
+    'italian', 'mexican', 'indian', 'thai', 'french', 'persian', 'bbq',
+)
+INGREDIENTS = (
+    'salt', 'pepper', 'olive oil', 'garlic', 'onion', 'tomato', 'rice',
+    'chicken', 'beef', 'lentils', 'chickpeas', 'butter', 'flour', 'eggs',
+    'milk', 'cheese', 'lemon', 'basil', 'cumin', 'paprika', 'potato',
+    'carrot', 'spinach', 'mushroom', 'ginger', 'coriander', 'yogurt',
+)
+
+
+def vocabulary(words, count):
+    """Return `count` distinct names drawn from `words`, numbering the
+    repeats once the word list runs out.
+    """
+    names = []
+    for i in range(count):
+        word = words[i % len(words)]
+        names.append(word if i < len(words) else f'{word} {i // len(words)}')
+
+    return names
+
+
+class Command(BaseCommand):
+    help = (
+        'Bulk insert synthetic users with recipes, tags and ingredients. '
+        'Users are named <prefix><n>@example.com and share one password, '
+        'so benchmark_api can log in as them.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10)
+        parser.add_argument('--recipes-per-user', type=int, default=1000)
+        parser.add_argument('--tags-per-user', type=int, default=30)
+        parser.add_argument('--ingredients-per-user', type=int, default=100)
+        parser.add_argument('--tags-per-recipe', type=int, default=3)
+        parser.add_argument('--ingredients-per-recipe', type=int, default=6)
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--prefix', default='loadtest')
+        parser.add_argument('--password', default='loadtest')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--clear', action='store_true',
+            help='Delete users created by an earlier run with this prefix.',
+        )
+
+    def _create_users(self, options):
+        User = get_user_model()
+        password = make_password(options['password'])
+        emails = [
+            f'{options["prefix"]}{i}@example.com'
+            for i in range(options['users'])
+        ]
+        User.objects.bulk_create(
+            [
+                User(email=email, name=f'Load test {i}', password=password)
+                for i, email in enumerate(emails)
+            ],
+            batch_size=options['batch_size'],
+        )
+
+        return list(User.objects.filter(email__in=emails).order_by('id'))
+
+    def _create_names(self, model, users, words, count, options):
+        names = vocabulary(words, count)
+        model.objects.bulk_create(
+            [model(user=user, name=name) for user in users for name in names],
+            batch_size=options['batch_size'],
+        )
+        by_user = {}
+        for obj in model.objects.filter(user__in=users).only('id', 'user'):
+            by_user.setdefault(obj.user_id, []).append(obj.pk)
+
+        return by_user
+
+    def _create_recipes(self, user, tags, ingredients, options, rng):
+        Recipe.objects.bulk_create(
+            [
+                Recipe(
+                    user=user,
+                    title=(
+                        f'{rng.choice(ADJECTIVES).capitalize()} '
+                        f'{rng.choice(DISHES)}'
+                    ),
+                    description=(
+                        f'A {rng.choice(ADJECTIVES)} {rng.choice(DISHES)} '
+                        f'with {rng.choice(INGREDIENTS)} and '
+                        f'{rng.choice(INGREDIENTS)}.'
+                    ),
+                    time_minutes=rng.randint(5, 180),
+                    price=Decimal(rng.randint(100, 9999)) / 100,
+                )
+                for _ in range(options['recipes_per_user'])
+            ],
+            batch_size=options['batch_size'],
+        )
+        recipe_ids = Recipe.objects.filter(user=user).values_list(
+            'id', flat=True,
+        )
+
+        for relation, pool, per_recipe in (
+            ('tags', tags, options['tags_per_recipe']),
+            ('ingredients', ingredients, options['ingredients_per_recipe']),
+        ):
+            through = getattr(Recipe, relation).through
+            column = getattr(Recipe, relation).field.m2m_reverse_name()
+            through.objects.bulk_create(
+                [
+                    through(recipe_id=recipe_id, **{column: obj_id})
+                    for recipe_id in recipe_ids
+                    for obj_id in rng.sample(pool, min(per_recipe, len(pool)))
+                ],
+                batch_size=options['batch_size'],
+            )
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        start = time.perf_counter()
+
+        with transaction.atomic():
+            if options['clear']:
+                deleted, _ = get_user_model().objects.filter(
+                    email__startswith=options['prefix'],
+                    email__endswith='@example.com',
+                ).delete()
+                self.stdout.write(f'Deleted {deleted} rows from earlier runs')
+
+            users = self._create_users(options)
+            tags = self._create_names(
+                Tag, users, TAGS, options['tags_per_user'], options,
+            )
+            ingredients = self._create_names(
+                Ingredient, users, INGREDIENTS,
+                options['ingredients_per_user'], options,
+            )
+            for user in users:
+                self._create_recipes(
+                    user, tags.get(user.pk, []),
+                    ingredients.get(user.pk, []), options, rng,
+                )
+
+            search.update_search_vectors(Recipe.objects.filter(user__in=users))
+            stats.rebuild([user.pk for user in users])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {len(users)} users with '
+            f'{options["recipes_per_user"]} recipes each in '
+            f'{time.perf_counter() - start:.1f}s'
+        ))
@@ -0,0 +1,36 @@
+"""
+ command to rebuild the recipe statistics counters from scratch
+"""
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+import time
+
+from recipe import stats
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute the counters behind /api/recipe/stats/ from the recipe '
+        'tables, for every user or for the given emails.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('emails', nargs='*')
+
+    def handle(self, *args, **options):
+        user_ids = None
+        if options['emails']:
+            user_ids = list(get_user_model().objects.filter(
+                email__in=options['emails'],
+            ).values_list('pk', flat=True))
+            if len(user_ids) != len(set(options['emails'])):
+                raise CommandError('Some of the given emails do not exist.')
+
+        start = time.perf_counter()
+        stats.rebuild(user_ids)
+        who = 'all users' if user_ids is None else f'{len(user_ids)} users'
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt recipe stats for {who} in '
+            f'{time.perf_counter() - start:.1f}s'
+        ))
@@ -0,0 +1,171 @@
+"""
+ request instrumentation and response compression middleware
+"""
+import asyncio
+import logging
+import time
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+from core import compression
+from core.instrumentation import (
+    QueryCollector,
+    current_collector,
+    registry,
+    view_name,
+)
+
+logger = logging.getLogger('core.instrumentation')
+
+
+class RequestMetricsMiddleware:
+    """Record wall time, query count, DB time and size per resolved view.
+
+    Adds a Server-Timing header to every response and feeds the histograms
+    exported by `core.views.metrics`. Requests slower than
+    REQUEST_SLOW_LOG_MS, or running more than REQUEST_SLOW_LOG_QUERIES
+    queries, are logged with their most repeated SQL.
+
+    Works under WSGI and ASGI; queries are attributed through
+    `current_collector` on whichever thread runs them.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # Mark the instance as a coroutine function, like
+            # MiddlewareMixin, so Django keeps the chain async.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._metrics_view = view_name(view_func, request.method)
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        collector = QueryCollector()
+        token = current_collector.set(collector)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_collector.reset(token)
+
+        return self._record(request, response, start, collector)
+
+    async def __acall__(self, request):
+        collector = QueryCollector()
+        token = current_collector.set(collector)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_collector.reset(token)
+
+        return self._record(request, response, start, collector)
+
+    def _record(self, request, response, start, collector):
+        elapsed = time.perf_counter() - start
+        view = getattr(request, '_metrics_view', 'unresolved')
+        size = 0 if response.streaming else len(response.content)
+        registry.observe(
+            {'view': view, 'method': request.method},
+            http_request_duration_seconds=elapsed,
+            http_request_db_queries=collector.count,
+            http_request_db_duration_seconds=collector.duration,
+            http_response_size_bytes=size,
+        )
+        response['Server-Timing'] = (
+            f'app;dur={elapsed * 1000:.1f}, '
+            f'db;dur={collector.duration * 1000:.1f};'
+            f'desc="{collector.count} queries"'
+        )
+        self._log_if_slow(request, view, elapsed, collector)
+
+        return response
+
+    def _log_if_slow(self, request, view, elapsed, collector):
+        slow_ms = settings.REQUEST_SLOW_LOG_MS
+        max_queries = settings.REQUEST_SLOW_LOG_QUERIES
+        too_slow = slow_ms is not None and elapsed * 1000 >= slow_ms
+        too_many = max_queries is not None and collector.count > max_queries
+        if not (too_slow or too_many):
+            return
+
+        lines = [
+            f'{count}x {total * 1000:.1f}ms {sql}'
+            for sql, (count, total) in collector.top_repeated(5)
+        ]
+        logger.warning(
+            'Slow request %s %s (%s): %.1fms, %d queries, %.1fms in db\n%s',
+            request.method, request.path, view, elapsed * 1000,
+            collector.count, collector.duration * 1000, '\n'.join(lines),
+        )
+
+
+class CompressionMiddleware:
+    """Compress responses with Brotli or gzip, as the client accepts.
+
+    Only COMPRESSION_CONTENT_TYPES are compressed, and only once their
+    body reaches COMPRESSION_MIN_SIZE bytes; streaming responses always
+    are. Brotli is used when the `brotli` package is installed.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        return self._compress(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+
+        return self._compress(request, response)
+
+    def _compress(self, request, response):
+        content_type = response.get('Content-Type', '').split(';')[0]
+        if (
+            response.has_header('Content-Encoding')
+            or content_type.strip() not in settings.COMPRESSION_CONTENT_TYPES
+            or not response.streaming
+            and len(response.content) < settings.COMPRESSION_MIN_SIZE
+        ):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        coding = compression.negotiate_encoding(
+            request.META.get('HTTP_ACCEPT_ENCODING', ''),
+        )
+        if coding is None:
+            return response
+
+        if response.streaming:
+            response.streaming_content = compression.compress_sequence(
+                coding, response.streaming_content,
+            )
+            del response['Content-Length']
+        else:
+            content = compression.compress(coding, response.content)
+            if len(content) >= len(response.content):
+                return response
+            response.content = content
+            response['Content-Length'] = str(len(content))
+
+        # The compressed body is a different byte sequence.
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = coding
+
+        return response
@@ -0,0 +1,47 @@
+# Generated by Django 3.2.25 on 2026-10-18 02:16
+
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def merge_duplicate_names(apps, schema_editor):
+    Recipe = apps.get_model('core', 'Recipe')
+
+    for model_name, relation in (('Tag', 'tags'), ('Ingredient', 'ingredients')):
+        model = apps.get_model('core', model_name)
+        through = getattr(Recipe, relation).through
+        fk = f'{model_name.lower()}_id'
+
+        duplicates = (
+            model.objects.values('user_id', 'name')
+            .annotate(keep_id=Min('id'), total=Count('id'))
+            .filter(total__gt=1)
+        )
+        for row in list(duplicates):
+            dupe_ids = list(
+                model.objects.filter(user_id=row['user_id'], name=row['name'])
+                .exclude(id=row['keep_id'])
+                .values_list('id', flat=True)
+            )
+            linked = through.objects.filter(**{fk: row['keep_id']})
+            dupes = through.objects.filter(**{f'{fk}__in': dupe_ids})
+            dupes.filter(recipe_id__in=linked.values('recipe_id')).delete()
+            # A recipe may also link to several of the duplicates.
+            dupes.exclude(
+                id__in=dupes.values('recipe_id').annotate(
+                    first=Min('id'),
+                ).values('first'),
+            ).delete()
+            dupes.update(**{fk: row['keep_id']})
+            model.objects.filter(id__in=dupe_ids).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_recipe_image'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_names, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,86 @@
+# Generated by Django 3.2.25 on 2026-10-18 02:25
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+GIN_INDEX = django.contrib.postgres.indexes.GinIndex(
+    fields=['search_vector'], name='recipe_search_vector_idx',
+)
+BATCH_SIZE = 1000
+
+
+def is_postgres(schema_editor):
+    return schema_editor.connection.vendor == 'postgresql'
+
+
+def add_gin_index(apps, schema_editor):
+    if is_postgres(schema_editor):
+        schema_editor.add_index(apps.get_model('core', 'Recipe'), GIN_INDEX)
+
+
+def remove_gin_index(apps, schema_editor):
+    if is_postgres(schema_editor):
+        schema_editor.remove_index(
+            apps.get_model('core', 'Recipe'), GIN_INDEX,
+        )
+
+
+def populate_search_vectors(apps, schema_editor):
+    if not is_postgres(schema_editor):
+        return
+
+    Recipe = apps.get_model('core', 'Recipe')
+
+    def names(model_name):
+        model = apps.get_model('core', model_name)
+        return Subquery(
+            model.objects.filter(recipe=OuterRef('pk'))
+            .values('recipe')
+            .annotate(names=StringAgg('name', delimiter=' '))
+            .values('names')
+        )
+
+    vector = (
+        SearchVector('title', weight='A')
+        + SearchVector('description', weight='B')
+        + SearchVector(names('Tag'), weight='C')
+        + SearchVector(names('Ingredient'), weight='C')
+    )
+    ids = Recipe.objects.order_by('id').values_list('id', flat=True)
+    last_id = 0
+    while True:
+        batch = list(ids.filter(id__gt=last_id)[:BATCH_SIZE])
+        if not batch:
+            break
+        Recipe.objects.filter(id__in=batch).update(search_vector=vector)
+        last_id = batch[-1]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_timestamps'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(model_name='recipe', index=GIN_INDEX),
+            ],
+            database_operations=[
+                migrations.RunPython(add_gin_index, remove_gin_index),
+            ],
+        ),
+        migrations.RunPython(
+            populate_search_vectors, migrations.RunPython.noop,
+        ),
+    ]
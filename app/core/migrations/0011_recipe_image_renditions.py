@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-18 02:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_recipe_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='image_renditions',
+            field=models.JSONField(default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,114 @@
+# Generated by Django 3.2.25 on 2026-10-18 03:05
+
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Case, Count, Sum, Value, When
+import django.db.models.deletion
+
+# The histogram buckets as they were when the counters were introduced;
+# later changes to recipe.stats.HISTOGRAMS rebuild the counters themselves.
+HISTOGRAMS = {
+    'time_minutes': (0, 15, 30, 60, 120),
+    'price': tuple(
+        Decimal(edge) for edge in ('0.00', '5.00', '10.00', '20.00', '50.00')
+    ),
+}
+
+
+def bucket_case(field):
+    return Case(
+        *(
+            When(**{f'{field}__gte': edge}, then=Value(i))
+            for i, edge in reversed(list(enumerate(HISTOGRAMS[field])))
+        ),
+        default=Value(0),
+    )
+
+
+def build_stats(apps, schema_editor):
+    """Fill the new counter tables from the existing recipes."""
+    Recipe = apps.get_model('core', 'Recipe')
+    Stats = apps.get_model('core', 'RecipeStats')
+    Bucket = apps.get_model('core', 'RecipeHistogramBucket')
+    recipes = Recipe.objects.order_by()
+
+    Stats.objects.bulk_create([
+        Stats(
+            user_id=row['user_id'],
+            count=row['count'],
+            time_minutes_total=row['time'],
+            price_total=row['price'],
+        )
+        for row in recipes.values('user_id').annotate(
+            count=Count('id'), time=Sum('time_minutes'), price=Sum('price'),
+        )
+    ])
+    for field in HISTOGRAMS:
+        Bucket.objects.bulk_create([
+            Bucket(field=field, **row)
+            for row in recipes.annotate(
+                bucket=bucket_case(field),
+            ).values('user_id', 'bucket').annotate(count=Count('id'))
+        ])
+
+    for relation, name, key in (
+        ('tags', 'Tag', 'tag_id'),
+        ('ingredients', 'Ingredient', 'ingredient_id'),
+    ):
+        counter = apps.get_model('core', f'{name}RecipeCount')
+        counter.objects.bulk_create([
+            counter(**row)
+            for row in getattr(Recipe, relation).through.objects.values(
+                key,
+            ).annotate(count=Count('id')).order_by()
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_recipe_image_renditions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IngredientRecipeCount',
+            fields=[
+                ('ingredient', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='recipe_counter', serialize=False, to='core.ingredient')),
+                ('count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RecipeStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='recipe_stats', serialize=False, to='core.user')),
+                ('count', models.IntegerField(default=0)),
+                ('time_minutes_total', models.BigIntegerField(default=0)),
+                ('price_total', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TagRecipeCount',
+            fields=[
+                ('tag', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='recipe_counter', serialize=False, to='core.tag')),
+                ('count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RecipeHistogramBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('field', models.CharField(max_length=32)),
+                ('bucket', models.SmallIntegerField()),
+                ('count', models.IntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='recipehistogrambucket',
+            constraint=models.UniqueConstraint(fields=('user', 'field', 'bucket'), name='unique_histogram_bucket'),
+        ),
+        migrations.RunPython(build_stats, migrations.RunPython.noop),
+    ]
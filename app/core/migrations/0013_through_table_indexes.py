@@ -0,0 +1,23 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_recipe_stats'),
+    ]
+
+    # Django only indexes (recipe_id, <related>_id) and each column alone;
+    # these serve lookups from the tag or ingredient side from the index.
+    operations = [
+        migrations.RunSQL(
+            'CREATE INDEX recipe_tags_tag_recipe_idx '
+            'ON core_recipe_tags (tag_id, recipe_id);',
+            'DROP INDEX recipe_tags_tag_recipe_idx;',
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX recipe_ingredients_ingredient_recipe_idx '
+            'ON core_recipe_ingredients (ingredient_id, recipe_id);',
+            'DROP INDEX recipe_ingredients_ingredient_recipe_idx;',
+        ),
+    ]
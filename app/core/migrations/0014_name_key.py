@@ -0,0 +1,25 @@
+# Generated by Django 3.2.25 on 2026-10-18 03:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_through_table_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ingredient',
+            name='name_key',
+            field=models.CharField(default='', editable=False, max_length=255),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='name_key',
+            field=models.CharField(default='', editable=False, max_length=255),
+            preserve_default=False,
+        ),
+    ]
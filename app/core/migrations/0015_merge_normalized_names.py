@@ -0,0 +1,96 @@
+from collections import defaultdict
+
+from django.db import migrations
+from django.db.models import Count, Min
+
+USER_BATCH_SIZE = 500
+
+
+def normalize_name(name):
+    return name.strip().lower()
+
+
+def merge_links(through, fk, keep_id, dupe_ids):
+    """Point the links of `dupe_ids` at `keep_id`, dropping the ones a
+    recipe would then have twice.
+    """
+    dupes = through.objects.filter(**{f'{fk}__in': dupe_ids})
+    dupes.filter(
+        recipe_id__in=through.objects.filter(**{fk: keep_id}).values(
+            'recipe_id',
+        ),
+    ).delete()
+    dupes.exclude(
+        id__in=dupes.values('recipe_id').annotate(first=Min('id')).values(
+            'first',
+        ),
+    ).delete()
+    dupes.update(**{fk: keep_id})
+
+
+def recount_links(apps, relation, model, fk, user_ids):
+    """Recompute the recipe counts of the users' tags or ingredients."""
+    Recipe = apps.get_model('core', 'Recipe')
+    counter = apps.get_model('core', f'{model.__name__}RecipeCount')
+    related = model.objects.filter(user_id__in=user_ids).values('id')
+
+    counter.objects.filter(**{f'{fk}__in': related}).delete()
+    counter.objects.bulk_create([
+        counter(**row)
+        for row in getattr(Recipe, relation).through.objects.filter(
+            **{f'{fk}__in': related},
+        ).values(fk).annotate(count=Count('id')).order_by()
+    ])
+
+
+def merge_normalized_names(apps, schema_editor):
+    """Fill name_key and fold rows sharing one into the oldest of them,
+    a batch of users at a time.
+    """
+    Recipe = apps.get_model('core', 'Recipe')
+    user_ids = list(
+        apps.get_model('core', 'User').objects.order_by('id').values_list(
+            'id', flat=True,
+        )
+    )
+
+    for model_name, relation in (
+        ('Tag', 'tags'),
+        ('Ingredient', 'ingredients'),
+    ):
+        model = apps.get_model('core', model_name)
+        through = getattr(Recipe, relation).through
+        fk = f'{model_name.lower()}_id'
+        merged_users = set()
+
+        for start in range(0, len(user_ids), USER_BATCH_SIZE):
+            batch = user_ids[start:start + USER_BATCH_SIZE]
+            objs = list(model.objects.filter(user_id__in=batch).order_by('id'))
+            groups = defaultdict(list)
+            for obj in objs:
+                obj.name_key = normalize_name(obj.name)
+                groups[obj.user_id, obj.name_key].append(obj.id)
+            model.objects.bulk_update(objs, ['name_key'], batch_size=1000)
+
+            for (user_id, _), ids in groups.items():
+                if len(ids) > 1:
+                    merge_links(through, fk, ids[0], ids[1:])
+                    model.objects.filter(id__in=ids[1:]).delete()
+                    merged_users.add(user_id)
+
+        # Merging moves links but leaves recipe totals alone.
+        if merged_users:
+            recount_links(apps, relation, model, fk, sorted(merged_users))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_name_key'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            merge_normalized_names, migrations.RunPython.noop,
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 3.2.25 on 2026-10-18 03:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_merge_normalized_names'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='ingredient',
+            name='unique_ingredient_user_name',
+        ),
+        migrations.RemoveConstraint(
+            model_name='tag',
+            name='unique_tag_user_name',
+        ),
+        migrations.AddConstraint(
+            model_name='ingredient',
+            constraint=models.UniqueConstraint(fields=('user', 'name_key'), name='unique_ingredient_user_name_key'),
+        ),
+        migrations.AddConstraint(
+            model_name='tag',
+            constraint=models.UniqueConstraint(fields=('user', 'name_key'), name='unique_tag_user_name_key'),
+        ),
+    ]
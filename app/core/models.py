@@ -1,5 +1,7 @@
 from django.db import models
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.contrib.auth.models import (
     AbstractBaseUser,
     BaseUserManager,
@@ -17,6 +19,31 @@ def recipe_image_file_path(instance, filename):
     return os.path.join('uploads', 'recipe', filename)
 
 
+def normalize_name(name):
+    """Key under which tag and ingredient names are unique per user."""
+    return name.strip().lower()
+
+
+class NamedQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for obj in objs:
+            obj.name_key = normalize_name(obj.name)
+
+        return super().bulk_create(objs, *args, **kwargs)
+
+
+class NormalizedNameMixin:
+    """Keep `name_key` in step with `name` on save and bulk_create."""
+
+    def save(self, *args, **kwargs):
+        self.name_key = normalize_name(self.name)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'name' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'name_key'}
+        super().save(*args, **kwargs)
+
+
 class UserManager(BaseUserManager):
     def create_user(self, email, password=None, **extra_fields):
         if not email:
@@ -60,28 +87,129 @@ class Recipe(models.Model):
     tags = models.ManyToManyField('Tag')
     ingredients = models.ManyToManyField('Ingredient')
     image = models.ImageField(null=True, upload_to=recipe_image_file_path)
+    image_renditions = models.JSONField(default=dict, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-id'], name='recipe_user_id_idx'),
+            GinIndex(
+                fields=['search_vector'],
+                name='recipe_search_vector_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.title
 
 
-class Tag(models.Model):
+class Tag(NormalizedNameMixin, models.Model):
     name = models.CharField(max_length=255)
+    name_key = models.CharField(max_length=255, editable=False)
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
     )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = NamedQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'name_key'],
+                name='unique_tag_user_name_key',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'name'], name='tag_user_name_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
 
-class Ingredient(models.Model):
+class Ingredient(NormalizedNameMixin, models.Model):
     name = models.CharField(max_length=255)
+    name_key = models.CharField(max_length=255, editable=False)
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
     )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = NamedQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'name_key'],
+                name='unique_ingredient_user_name_key',
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', 'name'], name='ingredient_user_name_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.name
+
+
+class RecipeStats(models.Model):
+    """Running recipe totals for a user, kept current by `recipe.stats`."""
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='recipe_stats',
+    )
+    count = models.IntegerField(default=0)
+    time_minutes_total = models.BigIntegerField(default=0)
+    price_total = models.DecimalField(
+        max_digits=15, decimal_places=2, default=0,
+    )
+
+
+class RecipeHistogramBucket(models.Model):
+    """Number of a user's recipes whose `field` falls in a bucket."""
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+    )
+    field = models.CharField(max_length=32)
+    bucket = models.SmallIntegerField()
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'field', 'bucket'],
+                name='unique_histogram_bucket',
+            ),
+        ]
+
+
+class TagRecipeCount(models.Model):
+    tag = models.OneToOneField(
+        Tag,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='recipe_counter',
+    )
+    count = models.IntegerField(default=0)
+
+
+class IngredientRecipeCount(models.Model):
+    ingredient = models.OneToOneField(
+        Ingredient,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='recipe_counter',
+    )
+    count = models.IntegerField(default=0)
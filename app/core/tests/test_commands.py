@@ -2,9 +2,31 @@ from unittest.mock import patch
 
 from psycopg2.errors import OperationalError as psycopg2OpError
 
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
 from django.db.utils import OperationalError
-from django.test import SimpleTestCase
+from django.test import (
+    LiveServerTestCase,
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+
+import json
+import shutil
+import tempfile
+
+from rest_framework.authtoken.models import Token
+
+from core.models import Recipe, Tag
+
+MEDIA_ROOT = tempfile.mkdtemp()
 
 
 @patch('core.management.commands.wait_for_db.Command.check')
@@ -21,3 +43,177 @@ class CommandTests(SimpleTestCase):
         call_command('wait_for_db')
         self.assertEqual(patched_check.call_count, 6)
         patched_check.assert_called_with(databases=['default'])
+
+
+class BenchmarkCommandTests(TestCase):
+
+    def test_benchmark_recipe_filters_rolls_back(self):
+        out = StringIO()
+        call_command(
+            'benchmark_recipe_filters',
+            sizes='5,10', tags=5, repeat=1, stdout=out,
+        )
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(lines[2].split()[0], '10')
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_benchmark_list_serialization(self):
+        out = StringIO()
+        call_command(
+            'benchmark_list_serialization', items=20, repeat=1, stdout=out,
+        )
+
+        self.assertIn('identical output: True', out.getvalue())
+        self.assertEqual(Recipe.objects.count(), 0)
+
+    def test_benchmark_login(self):
+        out = StringIO()
+        call_command('benchmark_login', logins=1, stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual([line.split()[0] for line in lines[1:]],
+                         ['pbkdf2', 'argon2'])
+
+
+class ConnectionBenchmarkCommandTests(TransactionTestCase):
+
+    def test_benchmark_db_connections(self):
+        out = StringIO()
+        call_command('benchmark_db_connections', requests=5, stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[1].startswith('CONN_MAX_AGE=0'))
+
+
+class LoadTestCommandTests(TestCase):
+
+    def test_generate_load_data(self):
+        call_command(
+            'generate_load_data', users=2, recipes_per_user=5,
+            tags_per_user=25, ingredients_per_user=4, tags_per_recipe=2,
+            ingredients_per_recipe=3, stdout=StringIO(),
+        )
+
+        user = get_user_model().objects.get(email='loadtest1@example.com')
+        self.assertTrue(user.check_password('loadtest'))
+        self.assertEqual(Recipe.objects.filter(user=user).count(), 5)
+        self.assertEqual(Tag.objects.filter(user=user).count(), 25)
+        self.assertEqual(
+            Recipe.tags.through.objects.filter(recipe__user=user).count(), 10,
+        )
+        self.assertEqual(
+            Recipe.ingredients.through.objects.filter(
+                recipe__user=user,
+            ).count(),
+            15,
+        )
+        self.assertEqual(user.recipe_stats.count, 5)
+
+    def test_generate_load_data_clear(self):
+        options = {'users': 1, 'recipes_per_user': 2, 'stdout': StringIO()}
+        call_command('generate_load_data', **options)
+        call_command('generate_load_data', clear=True, **options)
+
+        self.assertEqual(Recipe.objects.count(), 2)
+
+
+class RecipeStatsCommandTests(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='stats@example.com', password='test1234',
+        )
+        recipe = Recipe.objects.create(
+            user=self.user, title='Soup', time_minutes=20, price='4.00',
+        )
+        recipe.tags.add(Tag.objects.create(user=self.user, name='hot'))
+
+    def test_rebuild_recipe_stats(self):
+        self.user.recipe_stats.delete()
+        Tag.objects.get(name='hot').recipe_counter.delete()
+
+        call_command(
+            'rebuild_recipe_stats', 'stats@example.com', stdout=StringIO(),
+        )
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.recipe_stats.count, 1)
+        self.assertEqual(
+            Tag.objects.get(name='hot').recipe_counter.count, 1,
+        )
+
+    def test_rebuild_unknown_email(self):
+        with self.assertRaises(CommandError):
+            call_command('rebuild_recipe_stats', 'nobody@example.com')
+
+
+@override_settings(
+    MEDIA_ROOT=MEDIA_ROOT, IMAGE_PROCESSING_WORKERS=0, DB_READ_REPLICAS=[],
+)
+class ApiBenchmarkCommandTests(LiveServerTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # Server threads must not keep persistent connections open, or the
+        # test database cannot be dropped afterwards.
+        cls.db_settings = connection.settings_dict
+        cls.conn_max_age = cls.db_settings['CONN_MAX_AGE']
+        cls.db_settings['CONN_MAX_AGE'] = 0
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.db_settings['CONN_MAX_AGE'] = cls.conn_max_age
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        # Each benchmark logs in repeatedly; start under the token limit.
+        cache.clear()
+
+    def test_benchmark_api_reports_percentiles(self):
+        call_command(
+            'generate_load_data', users=2, recipes_per_user=3,
+            tags_per_user=3, ingredients_per_user=3, stdout=StringIO(),
+        )
+        out = StringIO()
+
+        call_command(
+            'benchmark_api', base_url=self.live_server_url, clients=1,
+            users=2, requests=10, stdout=out,
+            mix='list=1,filter=1,detail=1,create=1,upload_image=1,token=1',
+        )
+
+        report = json.loads(out.getvalue())
+        self.assertEqual(report['errors'], 0)
+        # One login up front, plus those drawn from the mix.
+        self.assertGreaterEqual(report['endpoints']['token']['requests'], 1)
+        self.assertEqual(report['requests'], 11)
+        for stats in report['endpoints'].values():
+            self.assertLessEqual(stats['p50_ms'], stats['p99_ms'])
+
+    def test_benchmark_slow_clients(self):
+        call_command(
+            'generate_load_data', users=2, recipes_per_user=2,
+            stdout=StringIO(),
+        )
+        # The clients log in concurrently. Have their tokens ready so the
+        # logins only read, as SQLite's in-memory test database fails
+        # with "table is locked" on writes racing other requests.
+        for user in get_user_model().objects.all():
+            Token.objects.get_or_create(user=user)
+        out = StringIO()
+
+        call_command(
+            'benchmark_slow_clients', base_url=self.live_server_url,
+            clients=1, slow_clients=1, users=2, duration=1, stdout=out,
+        )
+
+        report = json.loads(out.getvalue())
+        self.assertEqual(report['slow_clients'], 1)
+        self.assertGreater(report['endpoints']['list']['requests'], 0)
+        self.assertEqual(report['errors'], 0)
+
+    def test_invalid_mix(self):
+        with self.assertRaises(CommandError):
+            call_command('benchmark_api', mix='list=1,delete=2')
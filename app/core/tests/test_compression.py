@@ -0,0 +1,155 @@
+import gzip
+import json
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core import compression
+from core.middleware import CompressionMiddleware
+from core.models import Recipe
+
+RECIPES_URL = reverse('recipe:recipe-list')
+EXPORT_URL = reverse('recipe:recipe-export')
+
+BODY = json.dumps([{'id': i, 'title': 'Soup'} for i in range(200)]).encode()
+
+
+class NegotiateEncodingTests(SimpleTestCase):
+
+    def test_brotli_preferred_on_ties(self):
+        coding = compression.negotiate_encoding('gzip, deflate, br')
+
+        self.assertEqual(coding, 'br' if compression.brotli else 'gzip')
+
+    def test_client_quality_wins(self):
+        self.assertEqual(
+            compression.negotiate_encoding('br;q=0.5, gzip'), 'gzip',
+        )
+
+    def test_refused_and_unsupported_codings(self):
+        self.assertIsNone(compression.negotiate_encoding(''))
+        self.assertIsNone(compression.negotiate_encoding('deflate'))
+        self.assertIsNone(
+            compression.negotiate_encoding('gzip;q=0, br;q=0'),
+        )
+
+    def test_wildcard(self):
+        self.assertEqual(
+            compression.negotiate_encoding('*, br;q=0'), 'gzip',
+        )
+
+    @patch('core.compression.brotli', None)
+    def test_without_brotli(self):
+        self.assertEqual(compression.negotiate_encoding('br, gzip'), 'gzip')
+        self.assertIsNone(compression.negotiate_encoding('br'))
+
+
+class CompressionMiddlewareTests(SimpleTestCase):
+
+    def respond(self, response, accept_encoding='gzip'):
+        request = RequestFactory().get(
+            '/', HTTP_ACCEPT_ENCODING=accept_encoding,
+        )
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def test_gzip(self):
+        response = HttpResponse(BODY, content_type='application/json')
+        response['ETag'] = '"abc"'
+
+        res = self.respond(response)
+
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+        self.assertEqual(res['Vary'], 'Accept-Encoding')
+        self.assertEqual(res['ETag'], 'W/"abc"')
+        self.assertEqual(int(res['Content-Length']), len(res.content))
+        self.assertEqual(gzip.decompress(res.content), BODY)
+
+    @skipUnless(compression.brotli, 'brotli is not installed')
+    def test_brotli(self):
+        res = self.respond(
+            HttpResponse(BODY, content_type='application/json'), 'br',
+        )
+
+        self.assertEqual(res['Content-Encoding'], 'br')
+        self.assertEqual(compression.brotli.decompress(res.content), BODY)
+
+    def test_not_accepted(self):
+        res = self.respond(
+            HttpResponse(BODY, content_type='application/json'), '',
+        )
+
+        self.assertFalse(res.has_header('Content-Encoding'))
+        self.assertEqual(res['Vary'], 'Accept-Encoding')
+        self.assertEqual(res.content, BODY)
+
+    def test_below_threshold(self):
+        with self.settings(COMPRESSION_MIN_SIZE=len(BODY) + 1):
+            res = self.respond(
+                HttpResponse(BODY, content_type='application/json'),
+            )
+
+        self.assertFalse(res.has_header('Content-Encoding'))
+        self.assertFalse(res.has_header('Vary'))
+
+    def test_other_content_types_untouched(self):
+        for content_type in ('text/html; charset=utf-8', 'image/jpeg'):
+            res = self.respond(HttpResponse(BODY, content_type=content_type))
+
+            self.assertFalse(res.has_header('Content-Encoding'))
+
+    def test_already_encoded(self):
+        response = HttpResponse(BODY, content_type='application/json')
+        response['Content-Encoding'] = 'identity'
+
+        res = self.respond(response)
+
+        self.assertEqual(res['Content-Encoding'], 'identity')
+        self.assertEqual(res.content, BODY)
+
+    def test_streaming(self):
+        lines = [b'{"id": %d}\n' % i for i in range(3)]
+
+        res = self.respond(StreamingHttpResponse(
+            iter(lines), content_type='application/x-ndjson',
+        ))
+
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+        self.assertEqual(
+            gzip.decompress(b''.join(res.streaming_content)), b''.join(lines),
+        )
+
+
+class CompressedApiTests(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='compress@example.com', password='test1234',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        for i in range(30):
+            Recipe.objects.create(
+                user=self.user, title=f'Recipe {i}', time_minutes=5,
+                price='1.00', description='Simmer slowly. ' * 5,
+            )
+
+    def test_recipe_list_compressed(self):
+        plain = self.client.get(RECIPES_URL)
+        res = self.client.get(RECIPES_URL, HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+        self.assertLess(len(res.content), len(plain.content) / 4)
+        self.assertEqual(gzip.decompress(res.content), plain.content)
+
+    def test_export_compressed(self):
+        res = self.client.get(EXPORT_URL, HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+        lines = gzip.decompress(b''.join(res.streaming_content)).splitlines()
+        self.assertEqual(len(lines), 30)
@@ -0,0 +1,228 @@
+import json
+from unittest import skipUnless
+from unittest.mock import MagicMock, patch
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core import db
+from core.db import close_unhealthy_connections
+from core.models import Recipe
+
+RECIPES_URL = reverse('recipe:recipe-list')
+EXPORT_URL = reverse('recipe:recipe-export')
+ME_URL = reverse('user:me')
+
+
+def fake_connection(usable, connected=True):
+    conn = MagicMock(in_atomic_block=False)
+    conn.connection = object() if connected else None
+    conn.is_usable.return_value = usable
+    return conn
+
+
+@patch('core.db.connections')
+class ConnectionHealthTests(SimpleTestCase):
+
+    def test_dead_connection_closed(self, patched_connections):
+        conn = fake_connection(usable=False)
+        patched_connections.all.return_value = [conn]
+
+        close_unhealthy_connections()
+
+        conn.close.assert_called_once()
+
+    def test_healthy_connection_kept(self, patched_connections):
+        conn = fake_connection(usable=True)
+        patched_connections.all.return_value = [conn]
+
+        close_unhealthy_connections()
+
+        conn.close.assert_not_called()
+
+    def test_closed_connection_not_pinged(self, patched_connections):
+        conn = fake_connection(usable=False, connected=False)
+        patched_connections.all.return_value = [conn]
+
+        close_unhealthy_connections()
+
+        conn.is_usable.assert_not_called()
+
+    @override_settings(DB_CONN_HEALTH_CHECKS=False)
+    def test_disabled(self, patched_connections):
+        conn = fake_connection(usable=False)
+        patched_connections.all.return_value = [conn]
+
+        close_unhealthy_connections()
+
+        conn.close.assert_not_called()
+
+
+class PrimaryReplicaRouterTests(SimpleTestCase):
+
+    def setUp(self):
+        self.router = db.PrimaryReplicaRouter()
+
+    def read_alias(self, alias):
+        token = db._read_alias.set(alias)
+        self.addCleanup(db._read_alias.reset, token)
+
+    def test_reads_follow_request_alias(self):
+        self.assertIsNone(self.router.db_for_read(Recipe))
+
+        self.read_alias('replica')
+
+        self.assertEqual(self.router.db_for_read(Recipe), 'replica')
+
+    @patch('core.db.connections')
+    def test_reads_in_primary_transaction_stay_on_primary(
+        self, patched_connections,
+    ):
+        patched_connections.__getitem__.return_value = MagicMock(
+            in_atomic_block=True,
+        )
+        self.read_alias('replica')
+
+        self.assertIsNone(self.router.db_for_read(Recipe))
+
+    def test_writes_go_to_primary(self):
+        recipe = Recipe()
+        recipe._state.db = 'replica'
+        self.read_alias('replica')
+
+        self.assertEqual(
+            self.router.db_for_write(Recipe, instance=recipe), 'default',
+        )
+
+    @override_settings(DB_READ_REPLICAS=['replica'])
+    def test_relations_between_primary_and_replica(self):
+        primary, replica, other = Recipe(), Recipe(), Recipe()
+        primary._state.db = 'default'
+        replica._state.db = 'replica'
+        other._state.db = 'other'
+
+        self.assertTrue(self.router.allow_relation(primary, replica))
+        self.assertIsNone(self.router.allow_relation(primary, other))
+
+
+class ReadYourWritesTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    @override_settings(DB_READ_REPLICAS=['replica'])
+    def test_pinned_after_write(self):
+        self.assertEqual(db.choose_read_alias(1), 'replica')
+
+        db.pin_to_primary(1)
+
+        self.assertIsNone(db.choose_read_alias(1))
+        self.assertEqual(db.choose_read_alias(2), 'replica')
+
+    @override_settings(DB_READ_REPLICAS=['replica'])
+    def test_pin_expires(self):
+        with patch('core.db._get_cache') as get_cache:
+            db.pin_to_primary(1)
+
+        get_cache.return_value.set.assert_called_once_with(
+            'db:pinned:1', 1, timeout=settings.DB_REPLICA_STICKY_SECONDS,
+        )
+
+    @override_settings(DB_READ_REPLICAS=[])
+    def test_no_replicas(self):
+        db.pin_to_primary(1)
+
+        self.assertIsNone(db.choose_read_alias(1))
+        self.assertFalse(db.is_pinned(1))
+
+
+@skipUnless(
+    'replica' in settings.DATABASES,
+    'set DB_REPLICA_NAME or DB_REPLICA_HOST to test replica routing',
+)
+class ReplicaRoutingTests(TransactionTestCase):
+    """Run with two SQLite databases standing in for primary and replica:
+
+    DB_ENGINE=django.db.backends.sqlite3 DB_NAME=primary.sqlite3 \\
+    DB_REPLICA_NAME=replica.sqlite3 python manage.py test core.tests.test_db
+
+    Nothing replicates between them, so each test copies rows over by hand
+    and a lagging replica is one that is missing a change.
+    """
+    databases = {'default', *settings.DB_READ_REPLICAS}
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email='replica@example.com', password='test1234', name='Primary',
+        )
+        self.user.save(using='replica')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.recipe = Recipe.objects.create(
+            user=self.user, title='Soup', time_minutes=5, price='5.00',
+        )
+        self.recipe.save(using='replica')
+
+    def titles(self, url=RECIPES_URL):
+        res = self.client.get(url)
+        if res.streaming:
+            return [
+                json.loads(line)['title']
+                for line in b''.join(res.streaming_content).splitlines()
+            ]
+
+        return [recipe['title'] for recipe in res.json()['results']]
+
+    def test_safe_requests_read_from_replica(self):
+        Recipe.objects.using('replica').filter(pk=self.recipe.pk).update(
+            title='Replica soup',
+        )
+
+        self.assertEqual(self.titles(), ['Replica soup'])
+        self.assertEqual(self.titles(EXPORT_URL), ['Replica soup'])
+
+    def test_reads_stick_to_primary_after_write(self):
+        res = self.client.post(RECIPES_URL, {
+            'title': 'Stew', 'time_minutes': 60, 'price': '12.00',
+        })
+
+        self.assertEqual(res.status_code, 201)
+        self.assertFalse(
+            Recipe.objects.using('replica').filter(title='Stew').exists()
+        )
+        self.assertEqual(self.titles(), ['Stew', 'Soup'])
+
+        # Expire the pin, and the list cached while it was held.
+        cache.clear()
+
+        self.assertEqual(self.titles(), ['Soup'])
+
+    def test_other_users_writes_do_not_pin(self):
+        other = get_user_model().objects.create_user(
+            email='other@example.com', password='test1234',
+        )
+        client = APIClient()
+        client.force_authenticate(other)
+        client.post(RECIPES_URL, {
+            'title': 'Stew', 'time_minutes': 60, 'price': '12.00',
+        })
+        Recipe.objects.using('replica').filter(pk=self.recipe.pk).update(
+            title='Replica soup',
+        )
+
+        self.assertEqual(self.titles(), ['Replica soup'])
+
+    def test_profile_update_pins(self):
+        res = self.client.patch(ME_URL, {'name': 'Updated'})
+
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(db.is_pinned(self.user.pk))
+        self.assertEqual(
+            get_user_model().objects.using('replica').get().name, 'Primary',
+        )
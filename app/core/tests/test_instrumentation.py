@@ -0,0 +1,143 @@
+import glob
+import os
+import tempfile
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core.instrumentation import Registry, registry
+from core.models import Recipe
+from recipe.cache import get_cache
+
+RECIPES_URL = reverse('recipe:recipe-list')
+METRICS_URL = reverse('metrics')
+
+
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        registry.reset()
+        self.user = get_user_model().objects.create_user(
+            email='metrics@example.com', password='test1234',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_server_timing_header(self):
+        res = self.client.get(RECIPES_URL)
+
+        self.assertIn('app;dur=', res['Server-Timing'])
+        self.assertIn('queries"', res['Server-Timing'])
+
+    def test_metrics_recorded_per_view(self):
+        self.client.get(RECIPES_URL)
+
+        hist = registry.get(
+            'http_request_db_queries',
+            view='RecipeViewSet.list', method='GET',
+        )
+        self.assertEqual(hist.count, 1)
+        self.assertGreater(hist.sum, 0)
+
+    def test_metrics_endpoint(self):
+        self.client.get(RECIPES_URL)
+
+        res = self.client.get(METRICS_URL, REMOTE_ADDR='127.0.0.1')
+
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(res['Content-Type'].startswith('text/plain'))
+        body = res.content.decode()
+        self.assertIn('# TYPE http_request_duration_seconds histogram', body)
+        self.assertIn('view="RecipeViewSet.list"', body)
+
+    def test_metrics_endpoint_exports_cache_counters(self):
+        get_cache().clear()
+        self.client.get(RECIPES_URL)
+        self.client.get(RECIPES_URL)
+        self.client.get(RECIPES_URL)
+
+        res = self.client.get(METRICS_URL, REMOTE_ADDR='127.0.0.1')
+
+        body = res.content.decode()
+        self.assertIn('# TYPE recipe_list_cache_hits_total counter', body)
+        self.assertIn('\nrecipe_list_cache_hits_total 2\n', body)
+        self.assertIn('\nrecipe_list_cache_misses_total 1\n', body)
+
+    def test_metrics_endpoint_forbidden_for_other_ips(self):
+        res = self.client.get(METRICS_URL, REMOTE_ADDR='10.0.0.1')
+
+        self.assertEqual(res.status_code, 403)
+
+    @override_settings(REQUEST_SLOW_LOG_QUERIES=0)
+    def test_slow_request_logged_with_sql(self):
+        Recipe.objects.create(
+            user=self.user, title='Soup', time_minutes=5, price='1.00',
+        )
+
+        with self.assertLogs('core.instrumentation', 'WARNING') as logs:
+            self.client.get(RECIPES_URL)
+
+        self.assertIn('RecipeViewSet.list', logs.output[0])
+        self.assertIn('SELECT', logs.output[0])
+
+
+class SharedMetricsTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.directory = tmp.name
+        settings = override_settings(
+            METRICS_DIR=self.directory, METRICS_FLUSH_SECONDS=0,
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        registry.reset()
+        self.addCleanup(registry.reset)
+
+    def test_render_sums_other_workers(self):
+        """Whichever worker answers the scrape reports every worker."""
+        labels = {'view': 'RecipeViewSet.list', 'method': 'GET'}
+        registry.observe(labels, http_request_db_queries=2)
+        other = Registry()
+        other.observe(labels, http_request_db_queries=3)
+        other.observe(labels, http_request_db_queries=50)
+
+        body = registry.render()
+
+        self.assertIn(
+            'http_request_db_queries_count'
+            '{method="GET",view="RecipeViewSet.list"} 3',
+            body,
+        )
+        self.assertIn(
+            'http_request_db_queries_sum'
+            '{method="GET",view="RecipeViewSet.list"} 55',
+            body,
+        )
+        self.assertIn(
+            'http_request_db_queries_bucket'
+            '{method="GET",view="RecipeViewSet.list",le="3"} 2',
+            body,
+        )
+
+    def test_forked_worker_starts_empty(self):
+        labels = {'view': 'RecipeViewSet.list', 'method': 'GET'}
+        registry.observe(labels, http_request_db_queries=1)
+
+        with mock.patch('os.getpid', return_value=os.getpid() + 1):
+            self.assertIsNone(
+                registry.get('http_request_db_queries', **labels),
+            )
+            registry.observe(labels, http_request_db_queries=1)
+
+        self.assertEqual(
+            len(glob.glob(os.path.join(self.directory, '*.json'))), 2,
+        )
+        self.assertIn(
+            'http_request_db_queries_count'
+            '{method="GET",view="RecipeViewSet.list"} 2',
+            registry.render(),
+        )
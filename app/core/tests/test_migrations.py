@@ -0,0 +1,128 @@
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase
+
+
+class MigrationTestCase(TransactionTestCase):
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+
+class MergeDuplicateNamesMigrationTests(MigrationTestCase):
+
+    def test_recipe_linked_to_several_duplicates(self):
+        apps = self.migrate([('core', '0006_recipe_image')])
+        user = apps.get_model('core', 'User').objects.create(
+            email='dupes@example.com',
+        )
+        Tag = apps.get_model('core', 'Tag')
+        keep, first, second = [
+            Tag.objects.create(user=user, name='vegan') for _ in range(3)
+        ]
+        recipe = apps.get_model('core', 'Recipe').objects.create(
+            user=user, title='Soup', time_minutes=5, price='1.00',
+        )
+        recipe.tags.add(first, second)
+
+        apps = self.migrate([('core', '0007_merge_duplicate_names')])
+
+        Recipe = apps.get_model('core', 'Recipe')
+        self.assertEqual(
+            list(apps.get_model('core', 'Tag').objects.values_list(
+                'id', flat=True,
+            )),
+            [keep.id],
+        )
+        self.assertEqual(
+            list(Recipe.objects.get(pk=recipe.pk).tags.values_list(
+                'id', flat=True,
+            )),
+            [keep.id],
+        )
+
+
+class RecipeStatsMigrationTests(MigrationTestCase):
+
+    def test_counters_built_from_existing_recipes(self):
+        apps = self.migrate([('core', '0011_recipe_image_renditions')])
+        user = apps.get_model('core', 'User').objects.create(
+            email='stats@example.com',
+        )
+        Recipe = apps.get_model('core', 'Recipe')
+        tag = apps.get_model('core', 'Tag').objects.create(
+            user=user, name='vegan',
+        )
+        for minutes, price in ((10, '4.00'), (90, '25.00')):
+            Recipe.objects.create(
+                user=user, title='Soup', time_minutes=minutes, price=price,
+            ).tags.add(tag)
+
+        apps = self.migrate([('core', '0012_recipe_stats')])
+
+        totals = apps.get_model('core', 'RecipeStats').objects.get()
+        self.assertEqual(
+            (totals.count, totals.time_minutes_total, str(totals.price_total)),
+            (2, 100, '29.00'),
+        )
+        buckets = apps.get_model('core', 'RecipeHistogramBucket').objects
+        self.assertEqual(
+            sorted(buckets.filter(field='time_minutes').values_list(
+                'bucket', 'count',
+            )),
+            [(0, 1), (3, 1)],
+        )
+        self.assertEqual(
+            apps.get_model('core', 'TagRecipeCount').objects.get().count, 2,
+        )
+
+
+class MergeNormalizedNamesMigrationTests(MigrationTestCase):
+    migrate_from = [('core', '0014_name_key')]
+    migrate_to = [('core', '0016_unique_name_key')]
+
+    def test_duplicates_merged_into_oldest(self):
+        apps = self.migrate(self.migrate_from)
+        User = apps.get_model('core', 'User')
+        Recipe = apps.get_model('core', 'Recipe')
+        Tag = apps.get_model('core', 'Tag')
+        user = User.objects.create(email='merge@example.com')
+        other = User.objects.create(email='other@example.com')
+        keep = Tag.objects.create(user=user, name='Vegan')
+        upper = Tag.objects.create(user=user, name='VEGAN')
+        padded = Tag.objects.create(user=user, name=' vegan ')
+        foreign = Tag.objects.create(user=other, name='vegan')
+        recipes = [
+            Recipe.objects.create(
+                user=user, title=f'Recipe {i}', time_minutes=5, price='1.00',
+            )
+            for i in range(3)
+        ]
+        recipes[0].tags.add(keep, upper)
+        recipes[1].tags.add(upper, padded)
+        recipes[2].tags.add(padded)
+
+        apps = self.migrate(self.migrate_to)
+
+        Tag = apps.get_model('core', 'Tag')
+        Recipe = apps.get_model('core', 'Recipe')
+        self.assertEqual(
+            sorted(Tag.objects.values_list('id', 'name_key')),
+            [(keep.id, 'vegan'), (foreign.id, 'vegan')],
+        )
+        for recipe in recipes:
+            self.assertEqual(
+                list(Recipe.objects.get(pk=recipe.pk).tags.values_list(
+                    'id', flat=True,
+                )),
+                [keep.id],
+            )
+        counter = apps.get_model('core', 'TagRecipeCount')
+        self.assertEqual(counter.objects.get(tag_id=keep.id).count, 3)
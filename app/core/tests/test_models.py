@@ -1,3 +1,4 @@
+from django.db import IntegrityError
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 
@@ -89,6 +90,34 @@ class ModelTests(TestCase):
 
         self.assertEqual(str(ingredient), ingredient.name)
 
+    def test_tag_name_unique_per_user(self):
+        user = create_user()
+        models.Tag.objects.create(name='tag1', user=user)
+
+        with self.assertRaises(IntegrityError):
+            models.Tag.objects.create(name='tag1', user=user)
+
+    def test_tag_name_unique_ignoring_case_and_whitespace(self):
+        user = create_user()
+        tag = models.Tag.objects.create(name='Vegan', user=user)
+
+        self.assertEqual(tag.name_key, 'vegan')
+        with self.assertRaises(IntegrityError):
+            models.Ingredient.objects.bulk_create([
+                models.Ingredient(name='salt', user=user),
+                models.Ingredient(name=' SALT ', user=user),
+            ])
+
+    def test_name_key_saved_with_name(self):
+        user = create_user()
+        tag = models.Tag.objects.create(name='tag1', user=user)
+        tag.name = 'Tag Two'
+
+        tag.save(update_fields=['name'])
+
+        tag.refresh_from_db()
+        self.assertEqual(tag.name_key, 'tag two')
+
     @patch('core.models.uuid.uuid4')
     def test_recipe_file_name_uuid(self, mock_uuid):
         uuid = 'test-uuid'
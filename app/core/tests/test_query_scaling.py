@@ -0,0 +1,319 @@
+"""
+ Query count and latency regression tests for every API endpoint.
+
+ Each scenario runs against users seeded with a small and a large number
+ of recipes, tags and ingredients. The query count must not grow with the
+ data set and every request has to finish within LATENCY_BUDGET_MS.
+"""
+import json
+import re
+import shutil
+import tempfile
+import time
+from collections import Counter
+from decimal import Decimal
+from io import BytesIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from PIL import Image
+
+from core.models import Recipe, Tag, Ingredient
+
+from user import authentication
+
+SIZES = (2, 30)
+LATENCY_BUDGET_MS = 1000
+MEDIA_ROOT = tempfile.mkdtemp()
+
+PASSWORD = 'test1234'
+RECIPES_URL = reverse('recipe:recipe-list')
+BULK_URL = reverse('recipe:recipe-bulk')
+STATS_URL = reverse('recipe:stats')
+EXPORT_URL = reverse('recipe:recipe-export')
+TAGS_URL = reverse('recipe:tag-list')
+INGREDIENTS_URL = reverse('recipe:ingredient-list')
+CREATE_USER_URL = reverse('user:create')
+TOKEN_URL = reverse('user:token')
+ME_URL = reverse('user:me')
+
+LITERAL_RE = re.compile(r"'[^']*'|\b\d+\b")
+
+
+def seed(user, size):
+    """Give `user` `size` recipes, each linked to a shared tag and
+    ingredient plus up to two of their own.
+    """
+    shared_tag = Tag.objects.create(user=user, name='shared')
+    shared_ingredient = Ingredient.objects.create(user=user, name='shared')
+    tags = [
+        Tag.objects.create(user=user, name=f'tag {i}') for i in range(size)
+    ]
+    ingredients = [
+        Ingredient.objects.create(user=user, name=f'ingredient {i}')
+        for i in range(size)
+    ]
+    for i in range(size):
+        recipe = Recipe.objects.create(
+            user=user,
+            title=f'Soup {i}',
+            time_minutes=5,
+            price=Decimal('5.50'),
+            description='Tomato soup',
+        )
+        recipe.tags.set([shared_tag, *tags[i:i + 2]])
+        recipe.ingredients.set([shared_ingredient, *ingredients[i:i + 2]])
+
+    return {
+        'recipe': Recipe.objects.filter(user=user).order_by('id').first(),
+        'tag': shared_tag,
+        'ingredient': shared_ingredient,
+        'other_tag': tags[0],
+        'other_ingredient': ingredients[0],
+        'tags': [shared_tag, *tags],
+        'ingredients': [shared_ingredient, *ingredients],
+    }
+
+
+def make_jpeg():
+    out = BytesIO()
+    Image.new('RGB', (64, 64), 'red').save(out, format='JPEG')
+    return SimpleUploadedFile('photo.jpg', out.getvalue(), 'image/jpeg')
+
+
+def ids(objects, exclude=None):
+    return [obj.id for obj in objects if obj != exclude]
+
+
+def detail(name, obj):
+    return reverse(f'recipe:{name}-detail', args=[obj.id])
+
+
+def recipe_payload(title='Stew'):
+    return {
+        'title': title,
+        'time_minutes': 10,
+        'price': '2.50',
+        'tags': [{'name': 'shared'}, {'name': 'new'}],
+        'ingredients': [{'name': 'shared'}, {'name': 'salt'}],
+    }
+
+
+def bulk_body(count=3):
+    return '\n'.join(
+        json.dumps(recipe_payload(f'Bulk {i}')) for i in range(count)
+    )
+
+
+# Each scenario gets an authenticated client and the seeded objects and
+# returns the response. Status codes guard against a scenario silently
+# measuring an error path.
+SCENARIOS = {
+    'recipe list': (200, lambda c, o: c.get(RECIPES_URL)),
+    'recipe list by tag': (
+        200, lambda c, o: c.get(RECIPES_URL, {'tags': o['tag'].id}),
+    ),
+    'recipe list by all ingredients': (
+        200, lambda c, o: c.get(RECIPES_URL, {
+            'ingredients': o['ingredient'].id, 'match': 'all',
+        }),
+    ),
+    'recipe search': (
+        200, lambda c, o: c.get(RECIPES_URL, {'search': 'soup'}),
+    ),
+    'recipe retrieve': (
+        200, lambda c, o: c.get(detail('recipe', o['recipe'])),
+    ),
+    'recipe create': (
+        201, lambda c, o: c.post(RECIPES_URL, recipe_payload(), format='json'),
+    ),
+    'recipe update': (
+        200, lambda c, o: c.put(
+            detail('recipe', o['recipe']), recipe_payload(), format='json',
+        ),
+    ),
+    'recipe partial update': (
+        200, lambda c, o: c.patch(
+            detail('recipe', o['recipe']), {'title': 'Broth'}, format='json',
+        ),
+    ),
+    'recipe destroy': (
+        204, lambda c, o: c.delete(detail('recipe', o['recipe'])),
+    ),
+    'recipe upload image': (
+        200, lambda c, o: c.post(
+            reverse('recipe:recipe-upload-image', args=[o['recipe'].id]),
+            {'image': make_jpeg()}, format='multipart',
+        ),
+    ),
+    'recipe bulk create': (
+        201, lambda c, o: c.post(
+            BULK_URL, bulk_body(), content_type='application/x-ndjson',
+        ),
+    ),
+    'recipe export': (200, lambda c, o: c.get(EXPORT_URL)),
+    'recipe stats': (200, lambda c, o: c.get(STATS_URL)),
+    'tag list': (200, lambda c, o: c.get(TAGS_URL)),
+    'tag list assigned only': (
+        200, lambda c, o: c.get(TAGS_URL, {'assigned_only': 1}),
+    ),
+    'tag rename': (
+        200, lambda c, o: c.patch(
+            detail('tag', o['tag']), {'name': 'common'}, format='json',
+        ),
+    ),
+    'tag destroy': (204, lambda c, o: c.delete(detail('tag', o['tag']))),
+    'tag bulk delete': (
+        200, lambda c, o: c.post(
+            reverse('recipe:tag-bulk-delete'),
+            {'ids': ids(o['tags'])}, format='json',
+        ),
+    ),
+    'tag bulk rename': (
+        200, lambda c, o: c.post(reverse('recipe:tag-bulk-rename'), {
+            'items': [
+                {'id': tag.id, 'name': f'renamed {tag.id}'}
+                for tag in o['tags']
+            ],
+        }, format='json'),
+    ),
+    'tag merge': (
+        200, lambda c, o: c.post(reverse('recipe:tag-merge'), {
+            'source_ids': ids(o['tags'], exclude=o['other_tag']),
+            'target_id': o['other_tag'].id,
+        }, format='json'),
+    ),
+    'ingredient list': (200, lambda c, o: c.get(INGREDIENTS_URL)),
+    'ingredient rename': (
+        200, lambda c, o: c.patch(
+            detail('ingredient', o['ingredient']),
+            {'name': 'common'}, format='json',
+        ),
+    ),
+    'ingredient destroy': (
+        204, lambda c, o: c.delete(detail('ingredient', o['ingredient'])),
+    ),
+    'ingredient bulk delete': (
+        200, lambda c, o: c.post(
+            reverse('recipe:ingredient-bulk-delete'),
+            {'ids': ids(o['ingredients'])}, format='json',
+        ),
+    ),
+    'ingredient merge': (
+        200, lambda c, o: c.post(reverse('recipe:ingredient-merge'), {
+            'source_ids': ids(o['ingredients'], exclude=o['other_ingredient']),
+            'target_id': o['other_ingredient'].id,
+        }, format='json'),
+    ),
+    'user retrieve': (200, lambda c, o: c.get(ME_URL)),
+    'user update': (
+        200, lambda c, o: c.patch(ME_URL, {'name': 'Renamed'}, format='json'),
+    ),
+    'user create': (
+        201, lambda c, o: c.post(CREATE_USER_URL, {
+            'email': f'new-{o["recipe"].user_id}@example.com',
+            'password': PASSWORD,
+            'name': 'New',
+        }),
+    ),
+    'token create': (
+        200, lambda c, o: c.post(TOKEN_URL, {
+            'email': o['recipe'].user.email, 'password': PASSWORD,
+        }),
+    ),
+}
+
+
+def normalize(sql):
+    return LITERAL_RE.sub('?', sql)
+
+
+def format_queries(small, large):
+    """List the statements of the larger run, marking those that ran more
+    often than with the smaller data set.
+    """
+    small_counts = Counter(normalize(q['sql']) for q in small)
+    large_counts = Counter(normalize(q['sql']) for q in large)
+    lines = []
+    for sql, count in large_counts.items():
+        marker = '>>' if count > small_counts[sql] else '  '
+        lines.append(f'{marker} {small_counts[sql]} -> {count}x {sql}')
+
+    return '\n'.join(lines)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, IMAGE_PROCESSING_WORKERS=0)
+class QueryScalingTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.fixtures = []
+        for size in SIZES:
+            user = get_user_model().objects.create_user(
+                email=f'perf{size}@example.com', password=PASSWORD,
+            )
+            token = Token.objects.create(user=user)
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+            self.fixtures.append((size, client, seed(user, size)))
+
+    def measure(self, scenario, client, objects):
+        """Run a scenario with cold caches and return its response,
+        captured queries and wall time in milliseconds.
+
+        Writes are rolled back so every scenario sees the seeded data.
+        """
+        for cache in caches.all():
+            cache.clear()
+        authentication.local_tokens.clear()
+
+        _, call = SCENARIOS[scenario]
+        with transaction.atomic():
+            with CaptureQueriesContext(connection) as ctx:
+                start = time.perf_counter()
+                res = call(client, objects)
+                if res.streaming:
+                    b''.join(res.streaming_content)
+                elapsed = (time.perf_counter() - start) * 1000
+            transaction.set_rollback(True)
+
+        return res, ctx.captured_queries, elapsed
+
+    def test_query_count_independent_of_data_size(self):
+        for scenario, (status_code, _) in SCENARIOS.items():
+            with self.subTest(scenario):
+                runs = []
+                for size, client, objects in self.fixtures:
+                    res, queries, elapsed = self.measure(
+                        scenario, client, objects,
+                    )
+                    self.assertEqual(
+                        res.status_code, status_code,
+                        getattr(res, 'data', res),
+                    )
+                    self.assertLess(
+                        elapsed, LATENCY_BUDGET_MS,
+                        f'{scenario} took {elapsed:.0f}ms with {size} '
+                        f'recipes\n' + format_queries([], queries),
+                    )
+                    runs.append((size, queries))
+
+                (small_size, small), (large_size, large) = runs[0], runs[-1]
+                self.assertEqual(
+                    len(small), len(large),
+                    f'{scenario} ran {len(small)} queries with {small_size} '
+                    f'recipes and {len(large)} with {large_size}\n'
+                    + format_queries(small, large),
+                )
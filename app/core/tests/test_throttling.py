@@ -0,0 +1,140 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.throttling import SlidingWindowScopedThrottle
+
+TOKEN_URL = reverse('user:token')
+RECIPES_URL = reverse('recipe:recipe-list')
+
+RATES = {
+    'REST_FRAMEWORK': {
+        'DEFAULT_THROTTLE_RATES': {
+            'token': '3/min',
+            'signup': '3/min',
+            'recipe_write': '2/min',
+        },
+    },
+}
+
+
+class FakeView:
+    throttle_scope = 'token'
+
+
+class FakeRequest:
+    class user:
+        is_authenticated = True
+        pk = 1
+
+
+@override_settings(**RATES)
+class SlidingWindowThrottleTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def _allow(self, now):
+        throttle = SlidingWindowScopedThrottle()
+        with patch.object(throttle, 'timer', return_value=now):
+            return throttle.allow_request(FakeRequest, FakeView), throttle
+
+    def test_limit_within_window(self):
+        results = [self._allow(60 + i)[0] for i in range(4)]
+
+        self.assertEqual(results, [True, True, True, False])
+
+    def test_previous_window_is_weighted(self):
+        for i in range(3):
+            self._allow(100 + i)
+
+        # A quarter into the next window 75% of the 3 earlier requests
+        # still count, leaving room for one more.
+        self.assertTrue(self._allow(135)[0])
+        allowed, throttle = self._allow(136)
+        self.assertFalse(allowed)
+        self.assertGreater(throttle.wait(), 0)
+
+        # Later in the window the earlier requests have mostly decayed.
+        self.assertTrue(self._allow(170)[0])
+
+    def test_concurrent_request_counted_before_deciding(self):
+        for i in range(2):
+            self._allow(60 + i)
+        incr = cache.incr
+
+        def racing_incr(key, delta=1, version=None):
+            if delta > 0:
+                # Another worker's request lands at the same time.
+                incr(key)
+            return incr(key, delta, version)
+
+        with patch.object(cache, 'incr', side_effect=racing_incr):
+            allowed, _ = self._allow(62)
+
+        self.assertFalse(allowed)
+        self.assertEqual(cache.get('throttle_token_1:1'), 3)
+
+    def test_rejected_requests_not_counted(self):
+        for i in range(5):
+            self._allow(60 + i)
+
+        self.assertEqual(cache.get('throttle_token_1:1'), 3)
+
+
+@override_settings(**RATES)
+class ThrottledEndpointTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_token_endpoint_throttled_with_retry_after(self):
+        payload = {'email': 'test@example.com', 'password': 'wrong'}
+        for _ in range(3):
+            res = self.client.post(TOKEN_URL, payload)
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.post(TOKEN_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertGreater(int(res['Retry-After']), 0)
+
+    def test_forwarded_for_header_ignored(self):
+        payload = {'email': 'test@example.com', 'password': 'wrong'}
+        for i in range(3):
+            res = self.client.post(
+                TOKEN_URL, payload, HTTP_X_FORWARDED_FOR=f'10.0.0.{i}',
+            )
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.post(
+            TOKEN_URL, payload, HTTP_X_FORWARDED_FOR='10.0.0.3',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_recipe_reads_not_throttled(self):
+        user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='example123',
+        )
+        self.client.force_authenticate(user)
+        payload = {'title': 'Recipe', 'time_minutes': 5, 'price': '5.00'}
+
+        for _ in range(2):
+            res = self.client.post(RECIPES_URL, payload)
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        for _ in range(3):
+            res = self.client.get(RECIPES_URL)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        res = self.client.post(RECIPES_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
@@ -0,0 +1,93 @@
+"""
+ request throttles backed by the shared cache
+"""
+import math
+
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.settings import api_settings
+from rest_framework.throttling import ScopedRateThrottle, SimpleRateThrottle
+
+
+class SlidingWindowRateThrottle(SimpleRateThrottle):
+    """Sliding window counter throttle.
+
+    Keeps one counter per fixed window and estimates the rolling count as
+    the current window plus the previous one weighted by how much of it
+    still overlaps. Counters are bumped with atomic `incr` in the shared
+    cache before deciding, so the limit holds across every worker and
+    node.
+    """
+
+    def get_rate(self):
+        self.THROTTLE_RATES = api_settings.DEFAULT_THROTTLE_RATES
+        return super().get_rate()
+
+    def get_ident(self, request):
+        # nginx (uwsgi_params) and uvicorn (FORWARDED_ALLOW_IPS) already
+        # put the real client address in REMOTE_ADDR, while X-Forwarded-For
+        # may come straight from the client.
+        return request.META.get('REMOTE_ADDR')
+
+    def _window_key(self, window):
+        return f'{self.key}:{window}'
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.now = self.timer()
+        window, offset = divmod(self.now, self.duration)
+        current_key = self._window_key(int(window))
+        # Count the request first and decide on the value `incr` returns,
+        # so concurrent requests on other workers cannot all pass on the
+        # same stale count.
+        self.cache.add(current_key, 0, 2 * self.duration)
+        try:
+            counted = self.cache.incr(current_key)
+        except ValueError:
+            counted = 1
+            self.cache.set(current_key, counted, 2 * self.duration)
+        self.current = counted - 1
+        self.previous = self.cache.get(self._window_key(int(window) - 1), 0)
+        self.elapsed = offset / self.duration
+
+        estimate = self.previous * (1 - self.elapsed) + self.current
+        if estimate >= self.num_requests:
+            # Rejected requests do not count against the limit.
+            try:
+                self.cache.decr(current_key)
+            except ValueError:
+                pass
+            return self.throttle_failure()
+
+        return True
+
+    def wait(self):
+        """Seconds until the rolling estimate drops below the limit."""
+        remaining = (1 - self.elapsed) * self.duration
+        if self.current >= self.num_requests:
+            # Wait for the next window, then for the current count to decay.
+            fraction = 1 - (self.num_requests - 1) / self.current
+            return math.ceil(remaining + fraction * self.duration)
+
+        fraction = 1 - (self.num_requests - 1 - self.current) / self.previous
+        return max(1, math.ceil((fraction - self.elapsed) * self.duration))
+
+
+class SlidingWindowScopedThrottle(ScopedRateThrottle,
+                                  SlidingWindowRateThrottle):
+    """Per-view `throttle_scope` limits using the sliding window counter."""
+
+
+class WriteScopedThrottle(SlidingWindowScopedThrottle):
+    """Scoped throttle that only counts unsafe (write) requests."""
+
+    def allow_request(self, request, view):
+        if request.method in SAFE_METHODS:
+            return True
+
+        return super().allow_request(request, view)
@@ -1,3 +1,36 @@
-from django.shortcuts import render
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
 
-# Create your views here.
+from core.instrumentation import registry, render_counter
+from recipe import cache
+
+CACHE_COUNTERS = {
+    'hits': (
+        'recipe_list_cache_hits_total',
+        'List responses served from the response cache.',
+    ),
+    'misses': (
+        'recipe_list_cache_misses_total',
+        'List responses built because the response cache had none.',
+    ),
+}
+
+
+def metrics(request):
+    """Expose request histograms and response cache counters in the
+    Prometheus text format.
+    """
+    if request.META.get('REMOTE_ADDR') not in settings.METRICS_ALLOWED_IPS:
+        return HttpResponseForbidden()
+
+    # The counters live in the shared cache, so they already cover every
+    # worker.
+    stats = cache.get_stats()
+    body = registry.render() + ''.join(
+        render_counter(name, help_text, stats[stat])
+        for stat, (name, help_text) in CACHE_COUNTERS.items()
+    )
+
+    return HttpResponse(
+        body, content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
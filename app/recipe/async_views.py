@@ -0,0 +1,94 @@
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from core.db import close_unhealthy_connections
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.ASYNC_READ_THREADS,
+                thread_name_prefix='async-read',
+            )
+
+    return _executor
+
+
+def _call_read(view, request, args, kwargs):
+    # The request_started/finished connection housekeeping only runs on
+    # the handler's own thread, so repeat it for this one.
+    close_old_connections()
+    close_unhealthy_connections()
+    try:
+        response = view(request, *args, **kwargs)
+        if callable(getattr(response, 'render', None)):
+            response = response.render()
+        return response
+    finally:
+        close_old_connections()
+
+
+async def run_read(view, request, *args, **kwargs):
+    """Run a sync read view on the read pool and await its response."""
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+
+    return await loop.run_in_executor(
+        _get_executor(),
+        context.run, _call_read, view, request, args, kwargs,
+    )
+
+
+class AsyncReadMixin:
+    """Serve read actions from a coroutine view under ASGI.
+
+    Django 3.2 runs every sync view of an ASGI process on one shared
+    thread, so a single slow read holds up all others. With
+    ASYNC_READ_VIEWS on, `as_view` returns a coroutine that sends the
+    actions in `async_read_actions` to a pool of ASYNC_READ_THREADS and
+    leaves everything else on Django's thread sensitive path, as before.
+    """
+    async_read_actions = ('list', 'retrieve')
+    async_reads = None
+
+    @classmethod
+    def as_view(cls, actions=None, **initkwargs):
+        async_reads = initkwargs.pop('async_reads', cls.async_reads)
+        if async_reads is None:
+            async_reads = settings.ASYNC_READ_VIEWS
+
+        view = super().as_view(actions, **initkwargs)
+        read_methods = {
+            method.upper() for method, action in (actions or {}).items()
+            if action in cls.async_read_actions
+        }
+        if 'GET' in read_methods:
+            read_methods.add('HEAD')
+        if not (async_reads and read_methods):
+            return view
+
+        write_view = sync_to_async(view)
+
+        async def async_view(request, *args, **kwargs):
+            if request.method in read_methods:
+                return await run_read(view, request, *args, **kwargs)
+            return await write_view(request, *args, **kwargs)
+
+        # Keep cls, actions, initkwargs and csrf_exempt for the router,
+        # the schema generator and the metrics middleware.
+        async_view.__dict__.update(view.__dict__)
+        async_view.__name__ = view.__name__
+
+        return async_view
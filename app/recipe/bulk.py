@@ -0,0 +1,115 @@
+from django.db.models import Case, Min, Value, When
+from django.utils import timezone
+
+from core.models import Recipe, normalize_name
+from recipe import stats
+from recipe.cache import bump_user_version
+from recipe.conditional import touch_deleted_at
+from recipe.search import update_search_vectors
+
+
+def _objects(user, relation):
+    model = Recipe._meta.get_field(relation).related_model
+    return model.objects.filter(user=user)
+
+
+def _links(relation, ids):
+    """Through-table rows linking recipes to the objects in `ids`."""
+    field = Recipe._meta.get_field(relation)
+    column = field.m2m_reverse_name()
+
+    return field.remote_field.through.objects.filter(
+        **{f'{column}__in': ids}
+    ), column
+
+
+def _touch_recipes(recipe_ids):
+    recipes = Recipe.objects.filter(pk__in=recipe_ids)
+    recipes.update(updated_at=timezone.now())
+    update_search_vectors(recipes)
+
+
+def delete_objects(user, relation, ids):
+    """Unlink and delete a user's tags or ingredients.
+
+    The links, recipe counters and objects go in one DELETE each. That
+    skips the per-object delete signals, so the affected recipes and
+    cached lists are refreshed here, once. Returns the number of objects
+    deleted.
+    """
+    queryset = _objects(user, relation).filter(id__in=ids)
+    links, _ = _links(relation, queryset.values('id'))
+    recipe_ids = list(links.values_list('recipe_id', flat=True).distinct())
+    links.delete()
+    counter, key = stats.RELATION_COUNTERS[relation]
+    counter.objects.filter(**{f'{key}__in': queryset.values('id')}).delete()
+    # _raw_delete is private, but delete() would load every object to
+    # cascade and send signals. The links and counters deleted above are
+    # the only rows referencing tags and ingredients, and the signal
+    # handlers' work, touching linked recipes and caches, is done below.
+    # A new reference to these models must be deleted here as well, or
+    # the foreign key check fails.
+    deleted = queryset._raw_delete(queryset.db)
+    _touch_recipes(recipe_ids)
+    bump_user_version(user.pk)
+    touch_deleted_at(user.pk, timezone.now())
+
+    return deleted
+
+
+def rename_objects(user, relation, names):
+    """Apply {id: new name} to a user's objects in one UPDATE.
+
+    Raises IntegrityError when a new name is already taken.
+    """
+    def by_id(values):
+        return Case(*(
+            When(id=obj_id, then=Value(value))
+            for obj_id, value in values.items()
+        ))
+
+    renamed = _objects(user, relation).filter(id__in=names).update(
+        name=by_id(names),
+        name_key=by_id({
+            obj_id: normalize_name(name) for obj_id, name in names.items()
+        }),
+        updated_at=timezone.now(),
+    )
+    links, _ = _links(relation, list(names))
+    update_search_vectors(
+        Recipe.objects.filter(pk__in=links.values('recipe_id'))
+    )
+    bump_user_version(user.pk)
+
+    return renamed
+
+
+def merge_objects(user, relation, target_id, source_ids):
+    """Move every recipe link of `source_ids` to `target_id`, then delete
+    the sources.
+
+    Links that would duplicate one the recipe already has, with the
+    target or with another source, are dropped first, so the single
+    UPDATE that repoints the rest cannot hit the unique constraint.
+    """
+    sources, column = _links(relation, source_ids)
+    recipe_ids = list(sources.values_list('recipe_id', flat=True).distinct())
+
+    removed, _ = sources.filter(
+        recipe_id__in=_links(relation, [target_id])[0].values('recipe_id'),
+    ).delete()
+    first_per_recipe = sources.values('recipe_id').annotate(
+        first=Min('id'),
+    ).values('first')
+    extra, _ = sources.exclude(id__in=first_per_recipe).delete()
+    moved = sources.update(**{column: target_id})
+    stats.add_links(relation, {target_id: moved})
+
+    deleted = delete_objects(user, relation, source_ids)
+    _touch_recipes(recipe_ids)
+
+    return {
+        'moved': moved,
+        'duplicates_removed': removed + extra,
+        'deleted': deleted,
+    }
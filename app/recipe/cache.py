@@ -0,0 +1,105 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.utils.http import urlencode
+
+from rest_framework.response import Response
+
+VERSION_KEY = 'recipe:version:{user_id}'
+RESPONSE_KEY = 'recipe:response:{user_id}:{version}:{endpoint}:{params}'
+HITS_KEY = 'recipe:cache:hits'
+MISSES_KEY = 'recipe:cache:misses'
+
+
+def get_cache():
+    return caches[settings.RECIPE_CACHE_ALIAS]
+
+
+def _incr(key):
+    cache = get_cache()
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
+
+
+def get_user_version(user_id):
+    """Return the current cache version for a user's recipe data.
+
+    Missing versions start from the current time so that an evicted
+    counter can never line up with responses cached under an old one.
+    """
+    cache = get_cache()
+    key = VERSION_KEY.format(user_id=user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+
+    return version
+
+
+def _bump(user_id):
+    cache = get_cache()
+    key = VERSION_KEY.format(user_id=user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), timeout=None)
+
+
+def bump_user_version(user_id):
+    """Invalidate every cached response for a user.
+
+    Inside a transaction the version is bumped again on commit, so a
+    response cached from a concurrent read of uncommitted state is not
+    served afterwards.
+    """
+    _bump(user_id)
+    if connection.in_atomic_block:
+        transaction.on_commit(lambda: _bump(user_id))
+
+
+def get_stats():
+    cache = get_cache()
+    return {
+        'hits': cache.get(HITS_KEY, 0),
+        'misses': cache.get(MISSES_KEY, 0),
+    }
+
+
+def response_cache_key(request, endpoint):
+    params = urlencode(sorted(request.query_params.lists()), doseq=True)
+    return RESPONSE_KEY.format(
+        user_id=request.user.pk,
+        version=get_user_version(request.user.pk),
+        endpoint=f'{request.get_host()}:{endpoint}',
+        params=params,
+    )
+
+
+class CachedListMixin:
+    """Serve list responses from a per-user cache.
+
+    Entries are keyed on the user's data version, which is bumped by the
+    signals in `recipe.signals` on every write.
+    """
+
+    def list(self, request, *args, **kwargs):
+        key = response_cache_key(request, f'{self.basename}-list')
+        cache = get_cache()
+        data = cache.get(key)
+        if data is not None:
+            _incr(HITS_KEY)
+            return Response(data, headers={'X-Cache': 'HIT'})
+
+        _incr(MISSES_KEY)
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, settings.RECIPE_CACHE_TIMEOUT)
+        response['X-Cache'] = 'MISS'
+
+        return response
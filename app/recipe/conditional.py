@@ -0,0 +1,82 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from recipe.cache import get_cache, response_cache_key
+
+DELETED_AT_KEY = 'recipe:deleted_at:{user_id}'
+
+
+def touch_deleted_at(user_id, timestamp):
+    """Record a deletion, which no longer shows up in max(updated_at)."""
+    get_cache().set(
+        DELETED_AT_KEY.format(user_id=user_id), timestamp, timeout=None,
+    )
+
+
+class ConditionalListMixin:
+    """Answer list requests with 304 when the client's copy is current.
+
+    Validators come from one `max(updated_at)`/`count` aggregate per
+    source queryset, so nothing is serialized for unchanged data. They
+    are cached alongside the list responses and share their versioning.
+    """
+
+    def get_conditional_sources(self):
+        return [self.get_queryset()]
+
+    def get_list_validators(self, request):
+        key = response_cache_key(request, f'{self.basename}-validators')
+        validators = get_cache().get(key)
+        if validators is None:
+            validators = self._compute_list_validators(request)
+            get_cache().set(key, validators, settings.RECIPE_CACHE_TIMEOUT)
+
+        return validators
+
+    def _compute_list_validators(self, request):
+        state = [request.user.pk, sorted(request.query_params.lists())]
+        last_modified = get_cache().get(
+            DELETED_AT_KEY.format(user_id=request.user.pk)
+        )
+        for queryset in self.get_conditional_sources():
+            agg = queryset.order_by().aggregate(
+                last=Max('updated_at'),
+                total=Count('id'),
+            )
+            state.append((agg['last'], agg['total']))
+            if agg['last'] and (
+                last_modified is None or agg['last'] > last_modified
+            ):
+                last_modified = agg['last']
+
+        digest = hashlib.md5(repr(state).encode()).hexdigest()
+        timestamp = last_modified.timestamp() if last_modified else None
+
+        return f'W/"{digest}"', timestamp
+
+    def list(self, request, *args, **kwargs):
+        etag, last_modified = self.get_list_validators(request)
+        if last_modified is not None:
+            # HTTP dates have whole seconds, so until the newest write's
+            # second is over another write could share it. Rely on the
+            # ETag alone until then.
+            last_modified = int(last_modified)
+            if time.time() < last_modified + 1:
+                last_modified = None
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified,
+        )
+        if response is not None:
+            return response
+
+        response = super().list(request, *args, **kwargs)
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+
+        return response
@@ -0,0 +1,51 @@
+from django.db.models import Exists, OuterRef
+
+from core.models import Recipe
+
+MATCH_ANY = 'any'
+MATCH_ALL = 'all'
+MAX_FILTER_IDS = 100
+# Largest bigint; bigger ids match nothing, and overflow SQLite's driver.
+MAX_ID = 2 ** 63 - 1
+
+
+def parse_id_list(value):
+    """Parse a comma separated list of ids, or return None if invalid."""
+    try:
+        ids = [int(str_id) for str_id in value.split(',')]
+    except ValueError:
+        return None
+
+    if not ids or len(ids) > MAX_FILTER_IDS:
+        return None
+
+    if min(ids) < 1 or max(ids) > MAX_ID:
+        return None
+
+    return list(dict.fromkeys(ids))
+
+
+def _related_exists(relation, **lookup):
+    through = getattr(Recipe, relation).through
+    return Exists(
+        through.objects.filter(recipe_id=OuterRef('pk'), **lookup)
+    )
+
+
+def filter_by_relation(queryset, relation, ids, match=MATCH_ANY):
+    """Keep recipes linked to any (or all) of `ids` through `relation`.
+
+    Uses correlated EXISTS subqueries on the through table, so the result
+    needs no join and no DISTINCT.
+    """
+    column = Recipe._meta.get_field(relation).m2m_reverse_name()
+    if match == MATCH_ALL:
+        for pk in ids:
+            queryset = queryset.filter(
+                _related_exists(relation, **{column: pk})
+            )
+        return queryset
+
+    return queryset.filter(
+        _related_exists(relation, **{f'{column}__in': ids})
+    )
@@ -0,0 +1,164 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from django.utils import timezone
+
+from PIL import Image, ImageOps, features
+
+from core.models import Recipe
+from recipe.cache import bump_user_version
+
+logger = logging.getLogger(__name__)
+
+RENDITIONS = {
+    'thumb': (200, 200),
+    'medium': (800, 800),
+}
+FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 85, 'optimize': True, 'progressive': True}),
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.IMAGE_PROCESSING_WORKERS,
+                thread_name_prefix='recipe-image',
+            )
+
+    return _executor
+
+
+def _formats():
+    return {
+        ext: spec for ext, spec in FORMATS.items()
+        if ext != 'webp' or features.check('webp')
+    }
+
+
+def _open_capped(field):
+    """Open an image, refusing to decode more than IMAGE_MAX_PIXELS."""
+    field.open('rb')
+    img = Image.open(field)
+    width, height = img.size
+    if width * height > settings.IMAGE_MAX_PIXELS:
+        raise ValueError(f'Image is {width}x{height}, over the pixel cap.')
+
+    img.draft('RGB', max(RENDITIONS.values()))
+    img = ImageOps.exif_transpose(img)
+
+    return img.convert('RGB')
+
+
+def _render(img, size, fmt, options):
+    rendition = img.copy()
+    rendition.thumbnail(size, Image.LANCZOS)
+    out = BytesIO()
+    # Pixel data only: no EXIF, ICC or other metadata is written.
+    rendition.save(out, format=fmt, **options)
+
+    return ContentFile(out.getvalue())
+
+
+def strip_metadata(upload):
+    """Re-encode an uploaded image without EXIF or other metadata.
+
+    The original is served as uploaded, so GPS positions and camera
+    details must not reach storage. EXIF orientation is applied to the
+    pixels first; the ICC profile is kept so colours stay right.
+    """
+    upload.seek(0)
+    img = Image.open(upload)
+    fmt = img.format
+    icc_profile = img.info.get('icc_profile')
+    img = ImageOps.exif_transpose(img)
+    options = {'icc_profile': icc_profile} if icc_profile else {}
+    if fmt in ('JPEG', 'MPO'):
+        # Phones send MPO for JPEGs with extra frames; keep only the
+        # primary image, as a plain JPEG.
+        fmt = 'JPEG'
+        options['quality'] = 95
+    out = BytesIO()
+    img.save(out, format=fmt, **options)
+
+    return ContentFile(out.getvalue(), name=upload.name)
+
+
+def process_recipe_image(recipe_id):
+    """Generate resized, metadata free renditions of a recipe image."""
+    recipe = Recipe.objects.filter(pk=recipe_id).first()
+    if recipe is None or not recipe.image:
+        return None
+
+    name = recipe.image.name
+    storage = recipe.image.storage
+    base = os.path.splitext(name)[0]
+    try:
+        img = _open_capped(recipe.image)
+    finally:
+        recipe.image.close()
+
+    renditions = {}
+    for label, size in RENDITIONS.items():
+        renditions[label] = {}
+        for ext, (fmt, options) in _formats().items():
+            path = f'{base}_{label}.{ext}'
+            if storage.exists(path):
+                storage.delete(path)
+            renditions[label][ext] = storage.save(
+                path, _render(img, size, fmt, options),
+            )
+
+    updated = Recipe.objects.filter(pk=recipe_id, image=name).update(
+        image_renditions=renditions,
+        updated_at=timezone.now(),
+    )
+    if not updated:
+        return None
+
+    current = {
+        path for formats in renditions.values() for path in formats.values()
+    }
+    for formats in recipe.image_renditions.values():
+        for path in formats.values():
+            if path not in current:
+                storage.delete(path)
+    bump_user_version(recipe.user_id)
+
+    return renditions
+
+
+def _run(recipe_id):
+    try:
+        process_recipe_image(recipe_id)
+    except Exception:
+        logger.exception('Processing image of recipe %s failed', recipe_id)
+    finally:
+        connection.close()
+
+
+def enqueue_processing(recipe):
+    """Process a recipe's image off the request path once committed.
+
+    With IMAGE_PROCESSING_WORKERS set to 0 the work runs inline, which
+    keeps tests and management commands deterministic.
+    """
+    def submit():
+        if settings.IMAGE_PROCESSING_WORKERS:
+            _get_executor().submit(_run, recipe.pk)
+        else:
+            process_recipe_image(recipe.pk)
+
+    transaction.on_commit(submit)
@@ -0,0 +1,26 @@
+from django.conf import settings
+
+from rest_framework.pagination import CursorPagination
+
+
+class BaseCursorPagination(CursorPagination):
+    page_size = settings.API_PAGE_SIZE
+    page_size_query_param = 'page_size'
+
+    @property
+    def max_page_size(self):
+        return settings.API_MAX_PAGE_SIZE
+
+
+class RecipeCursorPagination(BaseCursorPagination):
+    ordering = '-id'
+
+    def get_ordering(self, request, queryset, view):
+        if 'rank' in queryset.query.annotations:
+            return ('-rank', '-id')
+
+        return super().get_ordering(request, queryset, view)
+
+
+class RecipeAttrCursorPagination(BaseCursorPagination):
+    ordering = ('-name', '-id')
@@ -0,0 +1,86 @@
+from django.utils.cache import patch_vary_headers
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """Render the same bytes as JSONRenderer, through orjson if installed.
+
+    Meant for data made of strings, ints, lists and dicts, as built by
+    `recipe.fast_list`; orjson formats floats differently, so anything it
+    cannot encode exactly like the stdlib goes to the stock renderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        renderer_context = renderer_context or {}
+        if (
+            orjson is None or data is None or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context)
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=_reject)
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Escaped by JSONRenderer for the benefit of JavaScript parsers.
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(
+            b'\xe2\x80\xa9', b'\\u2029',
+        )
+
+
+def _reject(obj):
+    raise TypeError
+
+
+class MessagePackRenderer(BaseRenderer):
+    """Render MessagePack for clients that send `Accept: application/msgpack`
+    or `?format=msgpack`. Values msgpack cannot pack natively, such as
+    decimals and dates, are converted the way JSONRenderer does.
+    """
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        return msgpack.packb(
+            data, default=encoders.JSONEncoder().default, use_bin_type=True,
+        )
+
+
+class MessagePackMixin:
+    """Offer MessagePackRenderer after the default renderers when the
+    `msgpack` package is installed, so JSON stays the default.
+    """
+
+    def get_renderers(self):
+        renderers = super().get_renderers()
+        if msgpack is not None:
+            renderers.append(MessagePackRenderer())
+
+        return renderers
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs
+        )
+        patch_vary_headers(response, ('Accept',))
+
+        return response
@@ -0,0 +1,65 @@
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+)
+from django.db import connection
+from django.db.models import Exists, F, FloatField, OuterRef, Q, Subquery
+from django.db.models.functions import Cast
+
+from core.models import Tag, Ingredient
+
+
+def is_supported():
+    return connection.vendor == 'postgresql'
+
+
+def _names(model):
+    return Subquery(
+        model.objects.filter(recipe=OuterRef('pk'))
+        .values('recipe')
+        .annotate(names=StringAgg('name', delimiter=' '))
+        .values('names')
+    )
+
+
+def search_vector():
+    return (
+        SearchVector('title', weight='A')
+        + SearchVector('description', weight='B')
+        + SearchVector(_names(Tag), weight='C')
+        + SearchVector(_names(Ingredient), weight='C')
+    )
+
+
+def update_search_vectors(recipes):
+    """Recompute the search vector for the given recipe queryset."""
+    if is_supported():
+        recipes.update(search_vector=search_vector())
+
+
+def search_recipes(queryset, term):
+    """Filter recipes by `term`, ranked where full-text search exists.
+
+    Under PostgreSQL this matches the GIN indexed search vector and
+    annotates `rank`; other backends fall back to `icontains`. The rank is
+    cast to double precision so cursor positions round-trip exactly.
+    """
+    if is_supported():
+        query = SearchQuery(term, search_type='websearch')
+        return queryset.filter(search_vector=query).annotate(
+            rank=Cast(SearchRank(F('search_vector'), query), FloatField()),
+        )
+
+    def name_match(model):
+        return Exists(model.objects.filter(
+            recipe=OuterRef('pk'), name__icontains=term,
+        ))
+
+    return queryset.filter(
+        Q(title__icontains=term)
+        | Q(description__icontains=term)
+        | name_match(Tag)
+        | name_match(Ingredient)
+    )
@@ -1,6 +1,49 @@
+from collections import Counter
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+
 from rest_framework import serializers
 
-from core.models import Recipe, Tag, Ingredient
+from core.models import Recipe, Tag, Ingredient, normalize_name
+from recipe import images, stats
+from recipe.cache import bump_user_version
+from recipe.search import update_search_vectors
+
+
+BULK_BATCH_SIZE = 500
+BULK_ACTION_MAX_IDS = 1000
+
+
+def get_or_create_by_name(model, user, names):
+    """Resolve names to user owned objects with set based queries.
+
+    Names match case-insensitively and ignoring surrounding whitespace;
+    an unknown name is created with the first spelling given.
+    """
+    keys = {name: normalize_name(name) for name in names}
+    objs = {
+        obj.name_key: obj
+        for obj in model.objects.filter(
+            user=user, name_key__in=set(keys.values()),
+        )
+    }
+
+    missing = {}
+    for name, key in keys.items():
+        if key not in objs:
+            missing.setdefault(key, name)
+    if missing:
+        model.objects.bulk_create(
+            [model(user=user, name=name) for name in missing.values()],
+            ignore_conflicts=True,
+        )
+        bump_user_version(user.pk)
+        created = model.objects.filter(user=user, name_key__in=missing)
+        objs.update((obj.name_key, obj) for obj in created)
+
+    return {name: objs[key] for name, key in keys.items()}
 
 
 class TagSerializer(serializers.ModelSerializer):
@@ -17,6 +60,67 @@ class IngredientSerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
 
 
+class TagDetailSerializer(TagSerializer):
+    recipe_count = serializers.IntegerField(read_only=True)
+
+    class Meta(TagSerializer.Meta):
+        fields = TagSerializer.Meta.fields + ['recipe_count']
+
+
+class IngredientDetailSerializer(IngredientSerializer):
+    recipe_count = serializers.IntegerField(read_only=True)
+
+    class Meta(IngredientSerializer.Meta):
+        fields = IngredientSerializer.Meta.fields + ['recipe_count']
+
+
+def _id_list():
+    return serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        min_length=1,
+        max_length=BULK_ACTION_MAX_IDS,
+    )
+
+
+class BulkDeleteSerializer(serializers.Serializer):
+    ids = _id_list()
+
+
+class BulkRenameItemSerializer(serializers.Serializer):
+    id = serializers.IntegerField(min_value=1)
+    name = serializers.CharField(max_length=255)
+
+
+class BulkRenameSerializer(serializers.Serializer):
+    items = serializers.ListField(
+        child=BulkRenameItemSerializer(),
+        min_length=1,
+        max_length=BULK_ACTION_MAX_IDS,
+    )
+
+    def validate_items(self, items):
+        if len({item['id'] for item in items}) != len(items):
+            raise serializers.ValidationError('Duplicate ids.')
+        keys = {normalize_name(item['name']) for item in items}
+        if len(keys) != len(items):
+            raise serializers.ValidationError('Duplicate names.')
+
+        return items
+
+
+class MergeSerializer(serializers.Serializer):
+    source_ids = _id_list()
+    target_id = serializers.IntegerField(min_value=1)
+
+    def validate(self, attrs):
+        if attrs['target_id'] in attrs['source_ids']:
+            raise serializers.ValidationError({
+                'source_ids': ['Must not include the target.'],
+            })
+
+        return attrs
+
+
 class RecipeSerializer(serializers.ModelSerializer):
     tags = TagSerializer(many=True, required=False)
     ingredients = IngredientSerializer(many=True, required=False)
@@ -26,24 +130,22 @@ class RecipeSerializer(serializers.ModelSerializer):
         fields = ['id', 'title', 'time_minutes', 'price', 'link', 'tags', 'ingredients']
         read_only_fields = ['id']
 
-    def _get_or_create_tags(self, tags, recipe):
+    def _get_or_create_attrs(self, model, items, recipe, relation):
         auth_user = self.context['request'].user
-        for tag in tags:
-            tag_obj, created = Tag.objects.get_or_create(
-                user=auth_user,
-                **tag,
-            )
-            recipe.tags.add(tag_obj)
+        names = list(dict.fromkeys(item['name'] for item in items))
+        objs = get_or_create_by_name(model, auth_user, names)
+
+        getattr(recipe, relation).set([objs[name] for name in names])
+
+    def _get_or_create_tags(self, tags, recipe):
+        self._get_or_create_attrs(Tag, tags, recipe, 'tags')
 
     def _get_or_create_ingredients(self, ingredients, recipe):
-        auth_user = self.context['request'].user
-        for ingredient in ingredients:
-            ingredient_obj, created = Ingredient.objects.get_or_create(
-                user=auth_user,
-                **ingredient,
-            )
-            recipe.tags.add(ingredient_obj)
+        self._get_or_create_attrs(
+            Ingredient, ingredients, recipe, 'ingredients',
+        )
 
+    @transaction.atomic
     def create(self, validated_data):
         tags = validated_data.pop('tags', [])
         ingredients = validated_data.pop('ingredients', [])
@@ -53,15 +155,14 @@ class RecipeSerializer(serializers.ModelSerializer):
 
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         tags = validated_data.pop('tags', None)
         ingredients = validated_data.pop('ingredients', None)
         if tags is not None:
-            instance.tags.clear()
             self._get_or_create_tags(tags, instance)
 
         if ingredients is not None:
-            instance.ingredients.clear()
             self._get_or_create_ingredients(ingredients, instance)
 
         for attr, value in validated_data.items():
@@ -72,9 +173,102 @@ class RecipeSerializer(serializers.ModelSerializer):
         return instance
 
 
+class RecipeBulkSerializer(serializers.ListSerializer):
+    """Create many recipes with batched inserts and shared name lookups."""
+
+    def _resolve(self, model, user, validated_data, key):
+        # In input order, so a name is created with its first spelling.
+        names = dict.fromkeys(
+            item['name']
+            for data in validated_data
+            for item in data.get(key, [])
+        )
+        return get_or_create_by_name(model, user, list(names))
+
+    @transaction.atomic
+    def create(self, validated_data):
+        user = self.context['request'].user
+        tags = self._resolve(Tag, user, validated_data, 'tags')
+        ingredients = self._resolve(
+            Ingredient, user, validated_data, 'ingredients',
+        )
+
+        recipes = []
+        for start in range(0, len(validated_data), BULK_BATCH_SIZE):
+            batch = validated_data[start:start + BULK_BATCH_SIZE]
+            objs = [
+                Recipe(**{
+                    k: v for k, v in data.items()
+                    if k not in ('tags', 'ingredients')
+                })
+                for data in batch
+            ]
+            if connection.features.can_return_rows_from_bulk_insert:
+                Recipe.objects.bulk_create(objs)
+                # bulk_create sends no post_save for the stats counters.
+                stats.add_recipes(
+                    user.pk, [(obj.time_minutes, obj.price) for obj in objs],
+                )
+            else:
+                for obj in objs:
+                    obj.save()
+
+            tag_links = Recipe.tags.through.objects.bulk_create([
+                Recipe.tags.through(recipe_id=obj.id, tag_id=tag_id)
+                for obj, data in zip(objs, batch)
+                for tag_id in {
+                    tags[t['name']].id for t in data.get('tags', [])
+                }
+            ])
+            ingredient_links = Recipe.ingredients.through.objects.bulk_create([
+                Recipe.ingredients.through(
+                    recipe_id=obj.id,
+                    ingredient_id=ingredient_id,
+                )
+                for obj, data in zip(objs, batch)
+                for ingredient_id in {
+                    ingredients[i['name']].id
+                    for i in data.get('ingredients', [])
+                }
+            ])
+            stats.add_links('tags', Counter(
+                link.tag_id for link in tag_links
+            ))
+            stats.add_links('ingredients', Counter(
+                link.ingredient_id for link in ingredient_links
+            ))
+            update_search_vectors(
+                Recipe.objects.filter(pk__in=[obj.pk for obj in objs])
+            )
+            recipes.extend(objs)
+
+        bump_user_version(user.pk)
+
+        return recipes
+
+
 class RecipeDetailSerializer(RecipeSerializer):
+    image_renditions = serializers.SerializerMethodField()
+
     class Meta(RecipeSerializer.Meta):
-        fields = RecipeSerializer.Meta.fields + ['description']
+        fields = RecipeSerializer.Meta.fields + [
+            'description',
+            'image_renditions',
+        ]
+        list_serializer_class = RecipeBulkSerializer
+
+    def get_image_renditions(self, obj):
+        request = self.context.get('request')
+        renditions = {}
+        for label, formats in obj.image_renditions.items():
+            renditions[label] = {}
+            for ext, path in formats.items():
+                url = default_storage.url(path)
+                if request is not None:
+                    url = request.build_absolute_uri(url)
+                renditions[label][ext] = url
+
+        return renditions
 
 
 class RecipeImageSerializer(serializers.ModelSerializer):
@@ -83,3 +277,12 @@ class RecipeImageSerializer(serializers.ModelSerializer):
         fields = ['id', 'image']
         read_only_fields = ['id']
         extra_kwargs = {'image': {'required': 'True'}}
+
+    def validate_image(self, value):
+        width, height = value.image.size
+        if width * height > settings.IMAGE_MAX_PIXELS:
+            raise serializers.ValidationError(
+                'Image dimensions are too large.'
+            )
+
+        return images.strip_metadata(value)
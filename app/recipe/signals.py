@@ -0,0 +1,170 @@
+from django.conf import settings
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from core.models import Recipe, Tag, Ingredient
+from recipe import stats
+from recipe.cache import bump_user_version
+from recipe.conditional import touch_deleted_at
+from recipe.search import update_search_vectors
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+def invalidate_on_write(sender, instance, **kwargs):
+    bump_user_version(instance.user_id)
+
+
+@receiver(post_save, sender=Recipe)
+def update_recipe_search_vector(sender, instance, **kwargs):
+    update_search_vectors(Recipe.objects.filter(pk=instance.pk))
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+def update_related_search_vectors(sender, instance, created, **kwargs):
+    if not created:
+        update_search_vectors(instance.recipe_set.all())
+
+
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Ingredient)
+def remember_linked_recipes(sender, instance, **kwargs):
+    instance._linked_recipe_ids = list(
+        instance.recipe_set.values_list('pk', flat=True)
+    )
+
+
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_on_delete(sender, instance, **kwargs):
+    linked = getattr(instance, '_linked_recipe_ids', None)
+    if linked:
+        recipes = Recipe.objects.filter(pk__in=linked)
+        recipes.update(updated_at=timezone.now())
+        update_search_vectors(recipes)
+    bump_user_version(instance.user_id)
+    touch_deleted_at(instance.user_id, timezone.now())
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def invalidate_on_m2m_change(sender, instance, action, reverse, pk_set,
+                             **kwargs):
+    if action == 'pre_clear' and reverse:
+        # The affected recipes are unknown once the rows are gone.
+        remember_linked_recipes(sender, instance)
+    elif action in ('post_add', 'post_remove', 'post_clear'):
+        if not reverse:
+            recipes = Recipe.objects.filter(pk=instance.pk)
+        elif action == 'post_clear':
+            recipes = Recipe.objects.filter(
+                pk__in=getattr(instance, '_linked_recipe_ids', []),
+            )
+        else:
+            recipes = Recipe.objects.filter(pk__in=pk_set)
+        now = timezone.now()
+        recipes.update(updated_at=now)
+        update_search_vectors(recipes)
+        if not reverse:
+            instance.updated_at = now
+        bump_user_version(instance.user_id)
+
+
+def _stats_values(recipe):
+    # Saved instances keep whatever type they were given, e.g. '5.00'.
+    return (
+        int(recipe.time_minutes),
+        Recipe._meta.get_field('price').to_python(recipe.price),
+    )
+
+
+@receiver(pre_save, sender=Recipe)
+def remember_stats_values(sender, instance, raw, update_fields, **kwargs):
+    if raw or instance._state.adding:
+        return
+    if update_fields is None or {'time_minutes', 'price'} & update_fields:
+        instance._stats_old = Recipe.objects.filter(
+            pk=instance.pk,
+        ).values_list('time_minutes', 'price').first()
+
+
+@receiver(post_save, sender=Recipe)
+def update_recipe_stats(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    if created:
+        stats.add_recipes(instance.user_id, [_stats_values(instance)])
+    elif getattr(instance, '_stats_old', None):
+        stats.change_recipe(
+            instance.user_id, instance._stats_old, _stats_values(instance),
+        )
+    instance._stats_old = None
+
+
+@receiver(pre_delete, sender=Recipe)
+def remember_recipe_links(sender, instance, **kwargs):
+    instance._stats_links = {
+        relation: list(
+            getattr(instance, relation).values_list('pk', flat=True)
+        )
+        for relation in stats.RELATION_COUNTERS
+    }
+
+
+@receiver(post_delete, sender=Recipe)
+def remove_recipe_stats(sender, instance, **kwargs):
+    stats.add_recipes(instance.user_id, [_stats_values(instance)], -1)
+    for relation, ids in getattr(instance, '_stats_links', {}).items():
+        stats.add_links(relation, dict.fromkeys(ids, -1))
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def update_link_stats(sender, instance, action, reverse, model, pk_set,
+                      **kwargs):
+    relation = 'tags' if sender is Recipe.tags.through else 'ingredients'
+    if action == 'pre_clear':
+        related = (
+            instance.recipe_set if reverse else getattr(instance, relation)
+        )
+        instance._stats_cleared = list(
+            related.values_list('pk', flat=True)
+        )
+        return
+    if action == 'pre_remove':
+        # remove() reports every pk it was given, linked or not.
+        related = (
+            instance.recipe_set if reverse else getattr(instance, relation)
+        )
+        instance._stats_removed = list(
+            related.filter(pk__in=pk_set).values_list('pk', flat=True)
+        )
+        return
+    if action == 'post_clear':
+        pk_set = instance._stats_cleared
+    elif action == 'post_remove':
+        pk_set = instance._stats_removed
+    elif action != 'post_add':
+        return
+
+    sign = -1 if action in ('post_remove', 'post_clear') else 1
+    if reverse:
+        stats.add_links(relation, {instance.pk: sign * len(pk_set)})
+    else:
+        stats.add_links(relation, dict.fromkeys(pk_set, sign))
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_new_user(sender, instance, created, **kwargs):
+    if created:
+        bump_user_version(instance.pk)
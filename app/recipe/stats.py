@@ -0,0 +1,218 @@
+from bisect import bisect_right
+from collections import Counter, defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, Count, F, Q, Sum, Value, When
+
+from core.models import (
+    Ingredient,
+    IngredientRecipeCount,
+    Recipe,
+    RecipeHistogramBucket,
+    RecipeStats,
+    Tag,
+    TagRecipeCount,
+)
+
+# Lower bounds of the histogram buckets; the last one is open ended.
+HISTOGRAMS = {
+    'time_minutes': (0, 15, 30, 60, 120),
+    'price': tuple(
+        Decimal(edge) for edge in ('0.00', '5.00', '10.00', '20.00', '50.00')
+    ),
+}
+RELATION_COUNTERS = {
+    'tags': (TagRecipeCount, 'tag_id'),
+    'ingredients': (IngredientRecipeCount, 'ingredient_id'),
+}
+CENTS = Decimal('0.01')
+
+
+def bucket_for(field, value):
+    return max(bisect_right(HISTOGRAMS[field], value) - 1, 0)
+
+
+def _add(model, lookups, deltas, create=True):
+    """Add `deltas` to the counter rows matching each of `lookups`.
+
+    Missing rows are created at zero first, so concurrent writers only
+    ever race on the UPDATE, which the database serializes per row.
+    Decrements skip that: their rows exist unless they are being deleted
+    along with their user, tag or ingredient.
+    """
+    if create:
+        model.objects.bulk_create(
+            [model(**lookup) for lookup in lookups], ignore_conflicts=True,
+        )
+    query = Q()
+    for lookup in lookups:
+        query |= Q(**lookup)
+    model.objects.filter(query).update(
+        **{name: F(name) + delta for name, delta in deltas.items()}
+    )
+
+
+def add_recipes(user_id, values, sign=1):
+    """Count recipes, given as (time_minutes, price) pairs, in or with a
+    negative `sign` out of a user's totals and histograms.
+    """
+    if not values:
+        return
+
+    _add(RecipeStats, [{'user_id': user_id}], {
+        'count': sign * len(values),
+        'time_minutes_total': sign * sum(t for t, _ in values),
+        'price_total': sign * sum(p for _, p in values),
+    }, create=sign > 0)
+    buckets = Counter(
+        (field, bucket_for(field, value))
+        for pair in values
+        for field, value in zip(('time_minutes', 'price'), pair)
+    )
+    for count in set(buckets.values()):
+        _add(
+            RecipeHistogramBucket,
+            [
+                {'user_id': user_id, 'field': field, 'bucket': bucket}
+                for (field, bucket), n in buckets.items() if n == count
+            ],
+            {'count': sign * count},
+            create=sign > 0,
+        )
+
+
+def change_recipe(user_id, old, new):
+    """Move a recipe from its old (time_minutes, price) to the new one."""
+    if old != new:
+        add_recipes(user_id, [old], -1)
+        add_recipes(user_id, [new])
+
+
+def add_links(relation, deltas):
+    """Add {related object id: delta} to the recipe counts of `relation`."""
+    model, key = RELATION_COUNTERS[relation]
+    by_delta = defaultdict(list)
+    for obj_id, delta in deltas.items():
+        if delta:
+            by_delta[delta].append(obj_id)
+    for delta, ids in by_delta.items():
+        _add(
+            model, [{key: obj_id} for obj_id in ids], {'count': delta},
+            create=delta > 0,
+        )
+
+
+def _bucket_case(field):
+    return Case(
+        *(
+            When(**{f'{field}__gte': edge}, then=Value(i))
+            for i, edge in reversed(list(enumerate(HISTOGRAMS[field])))
+        ),
+        default=Value(0),
+    )
+
+
+@transaction.atomic
+def rebuild(user_ids=None):
+    """Recompute the counters of `user_ids`, or of everyone, from scratch."""
+    scope = {} if user_ids is None else {'user_id__in': user_ids}
+    recipes = Recipe.objects.filter(**scope).order_by()
+
+    RecipeStats.objects.filter(**scope).delete()
+    RecipeStats.objects.bulk_create([
+        RecipeStats(
+            user_id=row['user_id'],
+            count=row['count'],
+            time_minutes_total=row['time'],
+            price_total=row['price'],
+        )
+        for row in recipes.values('user_id').annotate(
+            count=Count('id'), time=Sum('time_minutes'), price=Sum('price'),
+        )
+    ])
+
+    RecipeHistogramBucket.objects.filter(**scope).delete()
+    for field in HISTOGRAMS:
+        RecipeHistogramBucket.objects.bulk_create([
+            RecipeHistogramBucket(field=field, **row)
+            for row in recipes.annotate(
+                bucket=_bucket_case(field),
+            ).values('user_id', 'bucket').annotate(count=Count('id'))
+        ])
+
+    for relation, (counter, key) in RELATION_COUNTERS.items():
+        model = Recipe._meta.get_field(relation).related_model
+        related = model.objects.filter(**scope).values('id')
+        through = getattr(Recipe, relation).through
+
+        counter.objects.filter(**{f'{key}__in': related}).delete()
+        counter.objects.bulk_create([
+            counter(**row)
+            for row in through.objects.filter(
+                **{f'{key}__in': related},
+            ).values(key).annotate(count=Count('id')).order_by()
+        ])
+
+
+def _histogram(field, rows):
+    # Prices are strings, as DecimalField renders them.
+    show = str if field == 'price' else int
+    edges = HISTOGRAMS[field]
+    counts = {row['bucket']: row['count'] for row in rows}
+
+    return [
+        {
+            'min': show(lower),
+            'max': None if upper is None else show(upper),
+            'count': counts.get(i, 0),
+        }
+        for i, (lower, upper) in enumerate(zip(edges, edges[1:] + (None,)))
+    ]
+
+
+def _related_counts(model, user):
+    rows = model.objects.filter(
+        user=user, recipe_counter__count__gt=0,
+    ).order_by('-recipe_counter__count', 'id').values_list(
+        'id', 'name', 'recipe_counter__count',
+    )
+
+    return [
+        {'id': obj_id, 'name': name, 'recipe_count': count}
+        for obj_id, name, count in rows
+    ]
+
+
+def get_stats(user):
+    """Read a user's statistics from the counter tables, in a number of
+    queries that does not depend on how many recipes they have.
+    """
+    totals = RecipeStats.objects.filter(user=user).first() or RecipeStats()
+    buckets = defaultdict(list)
+    for row in RecipeHistogramBucket.objects.filter(user=user).values(
+        'field', 'bucket', 'count',
+    ):
+        buckets[row['field']].append(row)
+    count = totals.count
+
+    return {
+        'recipe_count': count,
+        'time_minutes': {
+            'total': totals.time_minutes_total,
+            'average': (
+                round(totals.time_minutes_total / count, 1) if count else None
+            ),
+            'histogram': _histogram('time_minutes', buckets['time_minutes']),
+        },
+        'price': {
+            'total': str(Decimal(totals.price_total).quantize(CENTS)),
+            'average': (
+                str((totals.price_total / count).quantize(CENTS))
+                if count else None
+            ),
+            'histogram': _histogram('price', buckets['price']),
+        },
+        'tags': _related_counts(Tag, user),
+        'ingredients': _related_counts(Ingredient, user),
+    }
@@ -0,0 +1,204 @@
+import asyncio
+import json
+
+from asgiref.sync import async_to_sync
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TransactionTestCase, override_settings
+from django.urls import path
+
+from rest_framework.authtoken.models import Token
+
+from decimal import Decimal
+
+from core.asgi import ASGIHandler
+from core.models import Recipe, Tag
+
+from recipe import views
+
+recipe_list = views.RecipeViewSet.as_view(
+    {'get': 'list', 'post': 'create'}, async_reads=True,
+)
+recipe_detail = views.RecipeViewSet.as_view(
+    {'get': 'retrieve', 'patch': 'partial_update'}, async_reads=True,
+)
+tag_list = views.TagViewSet.as_view({'get': 'list'}, async_reads=True)
+
+urlpatterns = [
+    path('recipes/', recipe_list),
+    path('recipes/<int:pk>/', recipe_detail),
+    path('tags/', tag_list),
+]
+
+
+class PersistentConnectionsOffMixin:
+    """Read pool threads hold their own connections, which must be closed
+    after each request or the test database cannot be flushed or dropped.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.db_settings = connection.settings_dict
+        cls.conn_max_age = cls.db_settings['CONN_MAX_AGE']
+        cls.db_settings['CONN_MAX_AGE'] = 0
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.db_settings['CONN_MAX_AGE'] = cls.conn_max_age
+
+
+def create_recipe(user, **params):
+    defaults = {
+        'title': 'Sample recipe',
+        'time_minutes': 5,
+        'price': Decimal('5.50'),
+    }
+    defaults.update(params)
+
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class AsViewTests(TransactionTestCase):
+
+    def test_read_actions_become_coroutines(self):
+        self.assertTrue(asyncio.iscoroutinefunction(recipe_list))
+        self.assertTrue(asyncio.iscoroutinefunction(tag_list))
+        self.assertEqual(recipe_list.actions['get'], 'list')
+        self.assertIs(recipe_list.cls, views.RecipeViewSet)
+
+    def test_write_only_routes_stay_sync(self):
+        view = views.TagViewSet.as_view(
+            {'patch': 'partial_update'}, async_reads=True,
+        )
+
+        self.assertFalse(asyncio.iscoroutinefunction(view))
+
+    @override_settings(ASYNC_READ_VIEWS=False)
+    def test_disabled_by_setting(self):
+        view = views.TagViewSet.as_view({'get': 'list'})
+
+        self.assertFalse(asyncio.iscoroutinefunction(view))
+
+
+# These tests only fill the primary, and their pool threads read outside
+# of the test's transaction, so keep any configured replica out of it.
+@override_settings(ROOT_URLCONF=__name__, DB_READ_REPLICAS=[])
+class AsyncReadViewTests(PersistentConnectionsOffMixin, TransactionTestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='async@example.com', password='test1234',
+        )
+        token = Token.objects.create(user=self.user)
+        # Django 3.2's AsyncClient sends extra kwargs as plain headers.
+        self.auth = {'authorization': f'Token {token.key}'}
+
+    def get(self, url):
+        return async_to_sync(self.async_client.get)(url, **self.auth)
+
+    def test_list_recipes(self):
+        recipe = create_recipe(self.user, title='Soup')
+        recipe.tags.add(Tag.objects.create(user=self.user, name='vegan'))
+
+        res = self.get('/recipes/')
+
+        self.assertEqual(res.status_code, 200)
+        results = res.json()['results']
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0]['title'], 'Soup')
+        self.assertEqual(results[0]['tags'][0]['name'], 'vegan')
+
+    def test_retrieve_recipe(self):
+        recipe = create_recipe(self.user, description='Hot')
+
+        res = self.get(f'/recipes/{recipe.id}/')
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json()['description'], 'Hot')
+
+    def test_list_tags(self):
+        Tag.objects.create(user=self.user, name='vegan')
+
+        res = self.get('/tags/')
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json()['results'][0]['name'], 'vegan')
+
+    def test_unauthenticated_read_rejected(self):
+        res = async_to_sync(self.async_client.get)('/tags/')
+
+        self.assertEqual(res.status_code, 401)
+
+    def test_writes_fall_back_to_sync_view(self):
+        recipe = create_recipe(self.user)
+
+        created = async_to_sync(self.async_client.post)(
+            '/recipes/',
+            {'title': 'Stew', 'time_minutes': 10, 'price': '2.00'},
+            content_type='application/json', **self.auth,
+        )
+        updated = async_to_sync(self.async_client.patch)(
+            f'/recipes/{recipe.id}/', {'title': 'Broth'},
+            content_type='application/json', **self.auth,
+        )
+
+        self.assertEqual(created.status_code, 201)
+        self.assertEqual(updated.status_code, 200)
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.title, 'Broth')
+
+    def test_queries_attributed_to_request(self):
+        create_recipe(self.user)
+
+        res = self.get('/recipes/')
+
+        self.assertNotIn('desc="0 queries"', res['Server-Timing'])
+
+
+@override_settings(DB_READ_REPLICAS=[])
+class StreamingASGIHandlerTests(PersistentConnectionsOffMixin,
+                                TransactionTestCase):
+
+    def request(self, path, headers):
+        scope = {
+            'type': 'http',
+            'method': 'GET',
+            'path': path,
+            'query_string': b'',
+            'headers': [(b'host', b'testserver'), *headers],
+        }
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            messages.append(message)
+
+        async_to_sync(ASGIHandler())(scope, receive, send)
+        return messages
+
+    def test_export_streams_from_orm(self):
+        user = get_user_model().objects.create_user(
+            email='stream@example.com', password='test1234',
+        )
+        token = Token.objects.create(user=user)
+        for i in range(3):
+            create_recipe(user, title=f'Recipe {i}')
+
+        messages = self.request(
+            '/api/recipe/recipes/export/',
+            [(b'authorization', f'Token {token.key}'.encode())],
+        )
+
+        self.assertEqual(messages[0]['status'], 200)
+        body = b''.join(m.get('body', b'') for m in messages[1:])
+        lines = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual(
+            [line['title'] for line in lines],
+            ['Recipe 0', 'Recipe 1', 'Recipe 2'],
+        )
+        self.assertFalse(messages[-1].get('more_body', False))
@@ -0,0 +1,184 @@
+from django.contrib.auth import get_user_model
+from django.db.models import Count
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from decimal import Decimal
+
+from core.models import Recipe, Tag, Ingredient
+
+from recipe import stats
+
+BULK_DELETE_URL = reverse('recipe:tag-bulk-delete')
+BULK_RENAME_URL = reverse('recipe:tag-bulk-rename')
+MERGE_URL = reverse('recipe:tag-merge')
+INGREDIENT_MERGE_URL = reverse('recipe:ingredient-merge')
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+def create_recipe(user, title='Sample recipe'):
+    return Recipe.objects.create(
+        user=user, title=title, time_minutes=5, price=Decimal('5.00'),
+    )
+
+
+class BulkActionTests(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='bulk@example.com', password='test1234',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.vegan = Tag.objects.create(user=self.user, name='vegan')
+        self.upper = Tag.objects.create(user=self.user, name='veggie')
+        self.plant = Tag.objects.create(user=self.user, name='plant based')
+
+    def assert_counts_consistent(self):
+        maintained = stats.get_stats(self.user)
+        stats.rebuild([self.user.pk])
+
+        self.assertEqual(maintained, stats.get_stats(self.user))
+
+    def test_merge(self):
+        both = create_recipe(self.user, 'Both')
+        both.tags.add(self.vegan, self.upper, self.plant)
+        only_upper = create_recipe(self.user, 'Upper')
+        only_upper.tags.add(self.upper)
+        two_sources = create_recipe(self.user, 'Sources')
+        two_sources.tags.add(self.upper, self.plant)
+
+        res = self.client.post(MERGE_URL, {
+            'source_ids': [self.upper.id, self.plant.id],
+            'target_id': self.vegan.id,
+        }, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {
+            'moved': 2, 'duplicates_removed': 3, 'deleted': 2,
+        })
+        self.assertEqual(list(Tag.objects.filter(user=self.user)), [
+            self.vegan,
+        ])
+        for recipe in (both, only_upper, two_sources):
+            self.assertEqual(list(recipe.tags.all()), [self.vegan])
+        self.assert_counts_consistent()
+
+    def test_merge_invalidates_cached_lists(self):
+        recipe = create_recipe(self.user)
+        recipe.tags.add(self.upper)
+        self.client.get(RECIPES_URL)
+
+        self.client.post(MERGE_URL, {
+            'source_ids': [self.upper.id], 'target_id': self.vegan.id,
+        }, format='json')
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res['X-Cache'], 'MISS')
+        self.assertEqual(res.data['results'][0]['tags'], [
+            {'id': self.vegan.id, 'name': 'vegan'},
+        ])
+
+    def test_merge_rejects_target_in_sources_and_foreign_ids(self):
+        other = get_user_model().objects.create_user(
+            email='other@example.com', password='test1234',
+        )
+        foreign = Tag.objects.create(user=other, name='vegan')
+
+        same = self.client.post(MERGE_URL, {
+            'source_ids': [self.vegan.id], 'target_id': self.vegan.id,
+        }, format='json')
+        stolen = self.client.post(MERGE_URL, {
+            'source_ids': [foreign.id], 'target_id': self.vegan.id,
+        }, format='json')
+
+        self.assertEqual(same.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(stolen.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertTrue(Tag.objects.filter(pk=foreign.pk).exists())
+
+    def test_bulk_delete(self):
+        recipe = create_recipe(self.user)
+        recipe.tags.add(self.vegan, self.upper)
+
+        res = self.client.post(BULK_DELETE_URL, {
+            'ids': [self.vegan.id, self.upper.id],
+        }, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {'deleted': 2})
+        self.assertEqual(list(recipe.tags.all()), [])
+        self.assertTrue(Tag.objects.filter(pk=self.plant.pk).exists())
+        self.assert_counts_consistent()
+
+    def test_bulk_delete_rejects_foreign_ids(self):
+        other = get_user_model().objects.create_user(
+            email='other@example.com', password='test1234',
+        )
+        foreign = Tag.objects.create(user=other, name='vegan')
+
+        for ids in ([self.vegan.id, foreign.id], [self.vegan.id, 999999]):
+            res = self.client.post(
+                BULK_DELETE_URL, {'ids': ids}, format='json',
+            )
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn('ids', res.data)
+        self.assertEqual(Tag.objects.filter(
+            pk__in=[self.vegan.pk, foreign.pk],
+        ).count(), 2)
+
+    def test_bulk_delete_validation(self):
+        for payload in ({}, {'ids': []}, {'ids': [0]}, {'ids': 'x'}):
+            res = self.client.post(BULK_DELETE_URL, payload, format='json')
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_rename(self):
+        recipe = create_recipe(self.user)
+        recipe.tags.add(self.upper)
+
+        res = self.client.post(BULK_RENAME_URL, {'items': [
+            {'id': self.upper.id, 'name': 'Vegan food'},
+            {'id': self.plant.id, 'name': 'plants'},
+        ]}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {'renamed': 2})
+        self.assertEqual(
+            sorted(Tag.objects.values_list('name', flat=True)),
+            ['Vegan food', 'plants', 'vegan'],
+        )
+
+    def test_bulk_rename_conflicts(self):
+        taken = self.client.post(BULK_RENAME_URL, {'items': [
+            {'id': self.upper.id, 'name': ' VEGAN'},
+        ]}, format='json')
+        duplicate = self.client.post(BULK_RENAME_URL, {'items': [
+            {'id': self.upper.id, 'name': 'x'},
+            {'id': self.plant.id, 'name': 'X'},
+        ]}, format='json')
+
+        self.assertEqual(taken.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(duplicate.status_code, status.HTTP_400_BAD_REQUEST)
+        self.upper.refresh_from_db()
+        self.assertEqual(self.upper.name, 'veggie')
+
+    def test_ingredient_merge(self):
+        salt = Ingredient.objects.create(user=self.user, name='salt')
+        sea_salt = Ingredient.objects.create(user=self.user, name='sea salt')
+        recipe = create_recipe(self.user)
+        recipe.ingredients.add(sea_salt)
+
+        res = self.client.post(INGREDIENT_MERGE_URL, {
+            'source_ids': [sea_salt.id], 'target_id': salt.id,
+        }, format='json')
+
+        self.assertEqual(res.data['moved'], 1)
+        self.assertEqual(list(recipe.ingredients.all()), [salt])
+        self.assertEqual(
+            Ingredient.objects.annotate(n=Count('recipe')).get().n, 1,
+        )
+        self.assert_counts_consistent()
@@ -0,0 +1,91 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from decimal import Decimal
+
+from core.models import Recipe, Tag
+
+from recipe import cache
+
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+
+
+def create_user(email='example@123.com', password='test1234'):
+    return get_user_model().objects.create_user(email=email, password=password)
+
+
+def create_recipe(user, **params):
+    defaults = {
+        'title': 'Sample recipe',
+        'time_minutes': 5,
+        'price': Decimal('5.50'),
+    }
+    defaults.update(params)
+
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_second_request_is_served_from_cache(self):
+        Tag.objects.create(user=self.user, name='foo')
+        stats = cache.get_stats()
+
+        res1 = self.client.get(TAGS_URL)
+        with self.assertNumQueries(0):
+            res2 = self.client.get(TAGS_URL)
+
+        self.assertEqual(res1['X-Cache'], 'MISS')
+        self.assertEqual(res2['X-Cache'], 'HIT')
+        self.assertEqual(res1.data, res2.data)
+        self.assertEqual(cache.get_stats()['hits'], stats['hits'] + 1)
+        self.assertEqual(cache.get_stats()['misses'], stats['misses'] + 1)
+
+    def test_write_invalidates_cache(self):
+        self.client.get(TAGS_URL)
+        Tag.objects.create(user=self.user, name='foo')
+
+        res = self.client.get(TAGS_URL)
+
+        self.assertEqual(res['X-Cache'], 'MISS')
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_m2m_change_invalidates_cache(self):
+        recipe = create_recipe(user=self.user)
+        tag = Tag.objects.create(user=self.user, name='foo')
+        self.client.get(RECIPES_URL)
+
+        recipe.tags.add(tag)
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res['X-Cache'], 'MISS')
+        self.assertEqual(res.data['results'][0]['tags'][0]['name'], 'foo')
+
+    def test_query_params_are_cached_separately(self):
+        Tag.objects.create(user=self.user, name='foo')
+        Tag.objects.create(user=self.user, name='bar')
+        self.client.get(TAGS_URL)
+
+        res = self.client.get(TAGS_URL, {'page_size': 1})
+
+        self.assertEqual(res['X-Cache'], 'MISS')
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_cache_is_per_user(self):
+        Tag.objects.create(user=self.user, name='foo')
+        self.client.get(TAGS_URL)
+        other_client = APIClient()
+        other_client.force_authenticate(create_user(email='other@123.com'))
+
+        res = other_client.get(TAGS_URL)
+
+        self.assertEqual(res['X-Cache'], 'MISS')
+        self.assertEqual(res.data['results'], [])
@@ -0,0 +1,140 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import http_date
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from datetime import datetime, timedelta
+from decimal import Decimal
+from unittest import mock
+
+import time
+
+from core.models import Recipe, Tag
+from recipe.cache import get_cache
+
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+
+
+def create_user(email='example@123.com', password='test1234'):
+    return get_user_model().objects.create_user(email=email, password=password)
+
+
+def create_recipe(user, **params):
+    defaults = {
+        'title': 'Sample recipe',
+        'time_minutes': 5,
+        'price': Decimal('5.50'),
+    }
+    defaults.update(params)
+
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        # User ids can repeat between tests, and so could cache keys.
+        get_cache().clear()
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def backdate(self):
+        Recipe.objects.update(updated_at=timezone.now() - timedelta(minutes=1))
+        Tag.objects.update(updated_at=timezone.now() - timedelta(minutes=1))
+
+    def test_list_includes_validators(self):
+        create_recipe(user=self.user)
+        self.backdate()
+
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('ETag', res)
+        self.assertIn('Last-Modified', res)
+
+    def test_if_none_match_returns_not_modified(self):
+        Tag.objects.create(user=self.user, name='foo')
+        etag = self.client.get(TAGS_URL)['ETag']
+
+        res = self.client.get(TAGS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res.content, b'')
+
+    def test_if_modified_since_returns_not_modified(self):
+        create_recipe(user=self.user)
+        self.backdate()
+
+        res = self.client.get(
+            RECIPES_URL,
+            HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 60),
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_write_in_same_second_not_hidden(self):
+        second = int(time.time()) - 60
+
+        def write_at(recipe, offset):
+            recipe.save()
+            Recipe.objects.filter(pk=recipe.pk).update(
+                updated_at=datetime.fromtimestamp(
+                    second + offset, timezone.utc,
+                ),
+            )
+
+        recipe = create_recipe(user=self.user)
+        write_at(recipe, 0.2)
+        with mock.patch('recipe.conditional.time.time') as now:
+            now.return_value = second + 0.5
+            first = self.client.get(RECIPES_URL)
+            since = http_date(now.return_value)
+
+            recipe.title = 'Changed'
+            write_at(recipe, 0.7)
+            now.return_value = second + 0.8
+            res = self.client.get(RECIPES_URL, HTTP_IF_MODIFIED_SINCE=since)
+
+        self.assertNotIn('Last-Modified', first)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['results'][0]['title'], 'Changed')
+
+    def test_etag_changes_on_delete(self):
+        recipe = create_recipe(user=self.user)
+        create_recipe(user=self.user)
+        etag = self.client.get(RECIPES_URL)['ETag']
+
+        recipe.delete()
+        res = self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_recipe_etag_changes_on_tag_assignment(self):
+        recipe = create_recipe(user=self.user)
+        tag = Tag.objects.create(user=self.user, name='foo')
+        etag = self.client.get(RECIPES_URL)['ETag']
+
+        recipe.tags.add(tag)
+        res = self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+
+    def test_recipe_etag_changes_on_tag_rename(self):
+        recipe = create_recipe(user=self.user)
+        tag = Tag.objects.create(user=self.user, name='foo')
+        recipe.tags.add(tag)
+        etag = self.client.get(RECIPES_URL)['ETag']
+
+        tag.name = 'bar'
+        tag.save()
+        res = self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['results'][0]['tags'][0]['name'], 'bar')
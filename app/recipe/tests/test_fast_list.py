@@ -0,0 +1,144 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from collections import OrderedDict
+from decimal import Decimal
+
+from core.models import Recipe, Tag, Ingredient
+
+from recipe import cache
+from recipe.renderers import FastJSONRenderer
+
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+INGREDIENTS_URL = reverse('recipe:ingredient-list')
+
+
+class FastListOutputTests(TestCase):
+    """The fast list path must render exactly what the serializers do."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='fast@example.com', password='test1234',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        tags = [
+            Tag.objects.create(user=self.user, name=name)
+            for name in ('vegan', 'قیمه', 'line\u2028break', 'quote "x"')
+        ]
+        ingredients = [
+            Ingredient.objects.create(user=self.user, name=name)
+            for name in ('salt', 'crème fraîche', 'emoji 🍅')
+        ]
+        for i, price in enumerate(['5', '0.50', '999.99', '12.3', '7']):
+            recipe = Recipe.objects.create(
+                user=self.user,
+                title=f'Recipe {i} \\ ünïcode',
+                time_minutes=i,
+                price=Decimal(price),
+                link='' if i % 2 else f'https://example.com/{i}',
+            )
+            # Added out of id order; both paths list them by id.
+            recipe.tags.add(*reversed(tags[:i]))
+            recipe.ingredients.add(*reversed(ingredients[i % 3:]))
+
+    def fetch_pages(self, url, params):
+        pages = []
+        while url:
+            cache.get_cache().clear()
+            res = self.client.get(url, params)
+            self.assertEqual(res.status_code, 200)
+            pages.append(res.content)
+            url, params = res.data['next'], None
+
+        return pages
+
+    def assert_identical(self, url, params=None):
+        with override_settings(FAST_LIST_SERIALIZERS=False):
+            expected = self.fetch_pages(url, params)
+        actual = self.fetch_pages(url, params)
+
+        self.assertEqual(actual, expected)
+        return actual
+
+    def test_recipe_list(self):
+        pages = self.assert_identical(RECIPES_URL)
+
+        self.assertIn(b'\\u2028', pages[0])
+        self.assertIn('crème'.encode(), pages[0])
+
+    def test_recipe_list_paged(self):
+        pages = self.assert_identical(RECIPES_URL, {'page_size': 2})
+
+        self.assertEqual(len(pages), 3)
+
+    def test_recipe_list_filtered(self):
+        tag = Tag.objects.get(name='vegan')
+        self.assert_identical(RECIPES_URL, {'tags': tag.id, 'match': 'all'})
+
+    def test_recipe_search(self):
+        self.assert_identical(RECIPES_URL, {'search': 'recipe'})
+
+    def test_tag_and_ingredient_lists(self):
+        self.assert_identical(TAGS_URL, {'page_size': 3})
+        self.assert_identical(INGREDIENTS_URL)
+
+    def test_cached_response_identical(self):
+        first = self.client.get(RECIPES_URL)
+        second = self.client.get(RECIPES_URL)
+
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(first.content, second.content)
+
+    def test_list_query_count(self):
+        cache.get_cache().clear()
+        # Validators, the page, and one through-table query per relation.
+        with self.assertNumQueries(6):
+            self.client.get(RECIPES_URL)
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    data = OrderedDict([
+        ('results', [
+            {'id': 1, 'name': 'a\u2028b\u2029c', 'emoji': '🍅'},
+            {'id': 2, 'nested': {'empty': [], 'none': None, 'flag': True}},
+        ]),
+        ('next', 'http://testserver/?cursor=abc%3D'),
+        ('quote', '"\\/\n\t'),
+    ])
+
+    def test_matches_json_renderer(self):
+        self.assertEqual(
+            FastJSONRenderer().render(self.data),
+            JSONRenderer().render(self.data),
+        )
+
+    def test_unsupported_types_use_json_renderer(self):
+        data = {'price': Decimal('5.50')}
+
+        self.assertEqual(
+            FastJSONRenderer().render(data), JSONRenderer().render(data),
+        )
+
+    def test_indent_uses_json_renderer(self):
+        context = {'indent': 2}
+
+        self.assertEqual(
+            FastJSONRenderer().render(self.data, renderer_context=context),
+            JSONRenderer().render(self.data, renderer_context=context),
+        )
+
+    @patch('recipe.renderers.orjson', None)
+    def test_without_orjson(self):
+        self.assertEqual(
+            FastJSONRenderer().render(self.data),
+            JSONRenderer().render(self.data),
+        )
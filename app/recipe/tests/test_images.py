@@ -0,0 +1,154 @@
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from decimal import Decimal
+from io import BytesIO
+
+import shutil
+import tempfile
+
+from PIL import Image
+
+from core.models import Recipe
+
+from recipe import images
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def image_upload_url(recipe_id):
+    return reverse('recipe:recipe-upload-image', args=[recipe_id])
+
+
+def detail_url(recipe_id):
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+def create_recipe(user, **params):
+    defaults = {
+        'title': 'Sample recipe',
+        'time_minutes': 5,
+        'price': Decimal('5.50'),
+    }
+    defaults.update(params)
+
+    return Recipe.objects.create(user=user, **defaults)
+
+
+def make_jpeg(size=(1600, 1200), exif=True, orientation=None):
+    img = Image.new('RGB', size, 'red')
+    out = BytesIO()
+    if exif:
+        metadata = Image.Exif()
+        metadata[0x010F] = 'Camera maker'
+        metadata[0x8825] = {2: (51.0, 30.0, 0.0), 4: (0.0, 7.0, 0.0)}
+        if orientation:
+            metadata[0x0112] = orientation
+        img.save(out, format='JPEG', exif=metadata.tobytes())
+    else:
+        img.save(out, format='JPEG')
+
+    return SimpleUploadedFile('photo.jpg', out.getvalue(), 'image/jpeg')
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, IMAGE_PROCESSING_WORKERS=0)
+class ImageProcessingTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='example123'
+        )
+        self.client.force_authenticate(self.user)
+        self.recipe = create_recipe(user=self.user)
+
+    def test_renditions_are_resized_and_stripped(self):
+        self.recipe.image = make_jpeg()
+        self.recipe.save()
+
+        renditions = images.process_recipe_image(self.recipe.id)
+
+        self.assertEqual(set(renditions), set(images.RENDITIONS))
+        storage = self.recipe.image.storage
+        for label, size in images.RENDITIONS.items():
+            for ext, path in renditions[label].items():
+                with storage.open(path) as f:
+                    img = Image.open(f)
+                    self.assertLessEqual(img.size[0], size[0])
+                    self.assertLessEqual(img.size[1], size[1])
+                    self.assertEqual(len(img.getexif()), 0)
+                    self.assertNotIn('exif', img.info)
+
+    def test_image_over_pixel_cap_rejected(self):
+        self.recipe.image = make_jpeg(size=(200, 200), exif=False)
+        self.recipe.save()
+
+        with self.settings(IMAGE_MAX_PIXELS=100):
+            with self.assertRaises(ValueError):
+                images.process_recipe_image(self.recipe.id)
+
+            res = self.client.post(
+                image_upload_url(self.recipe.id),
+                {'image': make_jpeg(size=(200, 200))},
+                format='multipart',
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_upload_processes_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.post(
+                image_upload_url(self.recipe.id),
+                {'image': make_jpeg()},
+                format='multipart',
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.recipe.refresh_from_db()
+        self.assertIn('thumb', self.recipe.image_renditions)
+
+        res = self.client.get(detail_url(self.recipe.id))
+
+        thumb = res.data['image_renditions']['thumb']['jpeg']
+        self.assertTrue(thumb.startswith('http://testserver/'))
+        self.assertTrue(thumb.endswith('_thumb.jpeg'))
+
+    def test_reprocessing_removes_old_renditions(self):
+        self.recipe.image = make_jpeg()
+        self.recipe.save()
+        old = images.process_recipe_image(self.recipe.id)
+
+        self.recipe.refresh_from_db()
+        self.recipe.image = make_jpeg()
+        self.recipe.save()
+        images.process_recipe_image(self.recipe.id)
+
+        storage = self.recipe.image.storage
+        self.assertFalse(storage.exists(old['thumb']['jpeg']))
+
+    def test_uploaded_original_is_stripped(self):
+        res = self.client.post(
+            image_upload_url(self.recipe.id),
+            {'image': make_jpeg(size=(300, 200), orientation=6)},
+            format='multipart',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.recipe.refresh_from_db()
+        with self.recipe.image.open('rb') as f:
+            img = Image.open(f)
+            self.assertEqual(img.format, 'JPEG')
+            self.assertEqual(len(img.getexif()), 0)
+            self.assertNotIn('exif', img.info)
+            # Rotated as the camera asked, since the tag is gone.
+            self.assertEqual(img.size, (200, 300))
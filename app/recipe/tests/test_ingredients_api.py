@@ -1,13 +1,14 @@
 from django.contrib.auth import get_user_model
+from django.db.models import Count
 from django.test import TestCase
 from django.urls import reverse
 
 from rest_framework.test import APIClient
 from rest_framework import status
 
-from core.models import Ingredient
+from core.models import Ingredient, Recipe
 
-from recipe.serializers import IngredientSerializer
+from recipe.serializers import IngredientDetailSerializer
 
 INGREDIENT_URL = reverse('recipe:ingredient-list')
 
@@ -41,11 +42,13 @@ class PrivateIngredientsApiTest(TestCase):
         Ingredient.objects.create(user=self.user, name='secondIngredient')
 
         res = self.client.get(INGREDIENT_URL)
-        ingredients = Ingredient.objects.all().order_by('-name')
-        serializer = IngredientSerializer(ingredients, many=True)
+        ingredients = Ingredient.objects.annotate(
+            recipe_count=Count('recipe'),
+        ).order_by('-name')
+        serializer = IngredientDetailSerializer(ingredients, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_ingredients_limited_to_user(self):
         user2 = create_user(email='example3@123.com')
@@ -55,9 +58,9 @@ class PrivateIngredientsApiTest(TestCase):
         res = self.client.get(INGREDIENT_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0]['name'], ingredient.name)
-        self.assertEqual(res.data[0]['id'], ingredient.id)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'][0]['name'], ingredient.name)
+        self.assertEqual(res.data['results'][0]['id'], ingredient.id)
 
     def test_update_ingredient(self):
         ingredient = Ingredient.objects.create(user=self.user, name='test1')
@@ -70,3 +73,16 @@ class PrivateIngredientsApiTest(TestCase):
         ingredient.refresh_from_db()
         self.assertEqual(ingredient.name, payload['name'])
 
+    def test_recipe_count_and_assigned_only(self):
+        used = Ingredient.objects.create(user=self.user, name='salt')
+        Ingredient.objects.create(user=self.user, name='saffron')
+        recipe = Recipe.objects.create(
+            user=self.user, title='Soup', time_minutes=5, price='1.00',
+        )
+        recipe.ingredients.add(used)
+
+        res = self.client.get(INGREDIENT_URL, {'assigned_only': 1})
+
+        self.assertEqual(res.data['results'], [
+            {'id': used.id, 'name': 'salt', 'recipe_count': 1},
+        ])
@@ -1,5 +1,7 @@
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from rest_framework import status
@@ -7,17 +9,23 @@ from rest_framework.test import APIClient
 
 from decimal import Decimal
 
-from core.models import Recipe, Tag
+from core.models import Recipe, Tag, Ingredient
 
 from recipe.serializers import RecipeSerializer, RecipeDetailSerializer
 
+import json
+
 import tempfile
 
+import unittest
+
 import os
 
 from PIL import Image
 
 RECIPES_URL = reverse('recipe:recipe-list')
+BULK_URL = reverse('recipe:recipe-bulk')
+EXPORT_URL = reverse('recipe:recipe-export')
 
 
 def image_upload_url(recipe_id):
@@ -80,7 +88,7 @@ class PrivateRecipeApiTests(TestCase):
         serializer = RecipeSerializer(recipes, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_recipe_list_limited_to_user(self):
         other_user = get_user_model().objects.create_user(
@@ -96,7 +104,30 @@ class PrivateRecipeApiTests(TestCase):
         serializer = RecipeSerializer(recipes, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
+
+    def test_recipe_list_cursor_pagination(self):
+        recipes = [
+            create_recipe(user=self.user, title=f'Recipe {i}')
+            for i in range(3)
+        ]
+
+        res = self.client.get(RECIPES_URL, {'page_size': 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [r['id'] for r in res.data['results']],
+            [recipes[2].id, recipes[1].id],
+        )
+        self.assertIsNotNone(res.data['next'])
+
+        res = self.client.get(res.data['next'])
+
+        self.assertEqual(
+            [r['id'] for r in res.data['results']],
+            [recipes[0].id],
+        )
+        self.assertIsNone(res.data['next'])
 
     def test_get_recipe_detail(self):
         recipe = create_recipe(user=self.user)
@@ -108,6 +139,34 @@ class PrivateRecipeApiTests(TestCase):
 
         self.assertEqual(res.data, serializer.data)
 
+    def test_recipe_list_query_count_is_constant(self):
+        for i in range(5):
+            recipe = create_recipe(user=self.user, title=f'Recipe {i}')
+            recipe.tags.add(Tag.objects.create(user=self.user, name=f'tag{i}'))
+            recipe.ingredients.add(
+                Ingredient.objects.create(user=self.user, name=f'ing{i}')
+            )
+
+        # Three validator aggregates, the page and two prefetches.
+        with self.assertNumQueries(6):
+            res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 5)
+        self.assertEqual(len(res.data['results'][0]['tags']), 1)
+        self.assertEqual(len(res.data['results'][0]['ingredients']), 1)
+
+    def test_recipe_detail_query_count_is_constant(self):
+        recipe = create_recipe(user=self.user)
+        for i in range(5):
+            recipe.tags.add(Tag.objects.create(user=self.user, name=f'tag{i}'))
+
+        with self.assertNumQueries(3):
+            res = self.client.get(detail_url(recipe.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['tags']), 5)
+
     def test_create_recipe(self):
         payload = {
             'title': 'Sample recipe',
@@ -154,6 +213,59 @@ class PrivateRecipeApiTests(TestCase):
             ).exists()
             self.assertTrue(exists)
 
+    def test_create_recipe_with_ingredients(self):
+        Ingredient.objects.create(user=self.user, name='salt')
+        payload = payload_sample()
+        payload['ingredients'] = [{'name': 'salt'}, {'name': 'pepper'}]
+
+        res = self.client.post(RECIPES_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        recipe = Recipe.objects.get(id=res.data['id'])
+        self.assertEqual(
+            sorted(recipe.ingredients.values_list('name', flat=True)),
+            ['pepper', 'salt'],
+        )
+        self.assertEqual(
+            Ingredient.objects.filter(user=self.user).count(), 2
+        )
+        self.assertEqual(recipe.tags.count(), 2)
+
+    def test_create_recipe_reuses_names_ignoring_case(self):
+        salt = Ingredient.objects.create(user=self.user, name='Salt')
+        payload = payload_sample()
+        payload['ingredients'] = [
+            {'name': 'salt'}, {'name': 'SALT'}, {'name': 'Pepper'},
+        ]
+        payload['tags'] = [{'name': 'Vegan'}, {'name': 'vegan'}]
+
+        res = self.client.post(RECIPES_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        recipe = Recipe.objects.get(id=res.data['id'])
+        self.assertIn(salt, recipe.ingredients.all())
+        self.assertEqual(recipe.ingredients.count(), 2)
+        self.assertEqual(
+            list(Tag.objects.filter(user=self.user).values_list(
+                'name', flat=True,
+            )),
+            ['Vegan'],
+        )
+
+    def test_create_recipe_query_count_independent_of_tags(self):
+        def post_with(count):
+            payload = payload_sample()
+            payload['tags'] = [{'name': f'tag{i}'} for i in range(count)]
+            payload['ingredients'] = [
+                {'name': f'ing{i}'} for i in range(count)
+            ]
+            with CaptureQueriesContext(connection) as ctx:
+                res = self.client.post(RECIPES_URL, payload, format='json')
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+            return len(ctx.captured_queries)
+
+        self.assertEqual(post_with(2), post_with(20))
+
     def test_create_tag_on_update_recipe(self):
         recipe = create_recipe(user=self.user)
         payload = {'tags': [{'name': 'foo'}]}
@@ -190,6 +302,261 @@ class PrivateRecipeApiTests(TestCase):
         self.assertEqual(recipe.tags.count(), 0)
 
 
+class RecipeFilterTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='example123'
+        )
+        self.client.force_authenticate(self.user)
+        self.vegan = Tag.objects.create(user=self.user, name='vegan')
+        self.quick = Tag.objects.create(user=self.user, name='quick')
+        self.salt = Ingredient.objects.create(user=self.user, name='salt')
+
+        self.r1 = create_recipe(user=self.user, title='Vegan curry')
+        self.r1.tags.add(self.vegan, self.quick)
+        self.r1.ingredients.add(self.salt)
+        self.r2 = create_recipe(user=self.user, title='Quick toast')
+        self.r2.tags.add(self.quick)
+        self.r3 = create_recipe(user=self.user, title='Plain rice')
+
+    def _ids(self, params):
+        res = self.client.get(RECIPES_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return {r['id'] for r in res.data['results']}
+
+    def test_filter_by_tags_any(self):
+        ids = self._ids({'tags': f'{self.vegan.id},{self.quick.id}'})
+
+        self.assertEqual(ids, {self.r1.id, self.r2.id})
+
+    def test_filter_by_tags_all(self):
+        ids = self._ids({
+            'tags': f'{self.vegan.id},{self.quick.id}',
+            'match': 'all',
+        })
+
+        self.assertEqual(ids, {self.r1.id})
+
+    def test_filter_by_ingredients(self):
+        ids = self._ids({'ingredients': f'{self.salt.id}'})
+
+        self.assertEqual(ids, {self.r1.id})
+
+    def test_filter_by_tags_and_ingredients(self):
+        ids = self._ids({
+            'tags': f'{self.quick.id}',
+            'ingredients': f'{self.salt.id}',
+        })
+
+        self.assertEqual(ids, {self.r1.id})
+
+    def test_filter_returns_each_recipe_once(self):
+        res = self.client.get(
+            RECIPES_URL, {'tags': f'{self.vegan.id},{self.quick.id}'},
+        )
+
+        ids = [r['id'] for r in res.data['results']]
+        self.assertEqual(len(ids), len(set(ids)))
+
+    def test_invalid_filter_ids(self):
+        too_big = str(2 ** 63)
+        for value in ['abc', '1,,2', '-1', ',', too_big, f'1,{too_big}']:
+            res = self.client.get(RECIPES_URL, {'tags': value})
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_invalid_match(self):
+        res = self.client.get(
+            RECIPES_URL, {'tags': f'{self.vegan.id}', 'match': 'some'},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class RecipeSearchTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='example123'
+        )
+        self.client.force_authenticate(self.user)
+
+    def _search(self, term):
+        res = self.client.get(RECIPES_URL, {'search': term})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [r['id'] for r in res.data['results']]
+
+    def test_search_title_and_description(self):
+        r1 = create_recipe(user=self.user, title='Mushroom risotto')
+        r2 = create_recipe(
+            user=self.user,
+            title='Stew',
+            description='Slow cooked with mushrooms',
+        )
+        create_recipe(user=self.user, title='Pancakes')
+
+        self.assertEqual(set(self._search('mushroom')), {r1.id, r2.id})
+
+    def test_search_tag_and_ingredient_names(self):
+        r1 = create_recipe(user=self.user, title='Curry')
+        r1.tags.add(Tag.objects.create(user=self.user, name='spicy'))
+        r2 = create_recipe(user=self.user, title='Salad')
+        r2.ingredients.add(
+            Ingredient.objects.create(user=self.user, name='chili')
+        )
+
+        self.assertEqual(self._search('spicy'), [r1.id])
+        self.assertEqual(self._search('chili'), [r2.id])
+
+    def test_search_follows_tag_rename(self):
+        recipe = create_recipe(user=self.user, title='Curry')
+        tag = Tag.objects.create(user=self.user, name='spicy')
+        recipe.tags.add(tag)
+
+        tag.name = 'fiery'
+        tag.save()
+
+        self.assertEqual(self._search('fiery'), [recipe.id])
+        self.assertEqual(self._search('spicy'), [])
+
+    def test_search_limited_to_user(self):
+        other_user = get_user_model().objects.create_user(
+            email='test2@example.com',
+            password='example123'
+        )
+        create_recipe(user=other_user, title='Mushroom soup')
+
+        self.assertEqual(self._search('mushroom'), [])
+
+    @unittest.skipUnless(
+        connection.vendor == 'postgresql', 'Ranking requires PostgreSQL',
+    )
+    def test_search_ranks_title_matches_first(self):
+        by_title = create_recipe(user=self.user, title='Mushroom pie')
+        by_description = create_recipe(
+            user=self.user,
+            title='Stew',
+            description='Goes well with mushroom',
+        )
+
+        self.assertEqual(
+            self._search('mushroom'), [by_title.id, by_description.id],
+        )
+
+        res = self.client.get(
+            RECIPES_URL, {'search': 'mushroom', 'page_size': 1},
+        )
+        res = self.client.get(res.data['next'])
+
+        self.assertEqual(
+            [r['id'] for r in res.data['results']], [by_description.id],
+        )
+
+
+class BulkRecipeApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='example123'
+        )
+        self.client.force_authenticate(self.user)
+
+    def _post_ndjson(self, rows):
+        body = '\n'.join(json.dumps(row) for row in rows)
+        return self.client.post(
+            BULK_URL, body, content_type='application/x-ndjson',
+        )
+
+    def test_bulk_create_recipes(self):
+        Tag.objects.create(user=self.user, name='vegan')
+        rows = [
+            {
+                'title': f'Recipe {i}',
+                'time_minutes': 5,
+                'price': '5.50',
+                'tags': [{'name': 'vegan'}, {'name': f'tag{i}'}],
+                'ingredients': [{'name': 'salt'}],
+            }
+            for i in range(3)
+        ]
+
+        res = self._post_ndjson(rows)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['created'], 3)
+        recipes = Recipe.objects.filter(user=self.user)
+        self.assertEqual(recipes.count(), 3)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 4)
+        self.assertEqual(Ingredient.objects.filter(user=self.user).count(), 1)
+        for recipe in recipes:
+            self.assertEqual(recipe.tags.count(), 2)
+            self.assertEqual(recipe.ingredients.count(), 1)
+
+    def test_bulk_create_uses_first_spelling(self):
+        rows = [
+            {
+                'title': f'Recipe {i}',
+                'time_minutes': 5,
+                'price': '5.50',
+                'tags': [{'name': name}],
+            }
+            for i, name in enumerate(['Vegan', 'vegan', 'VEGAN', 'vEgan'])
+        ]
+
+        res = self._post_ndjson(rows)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            list(Tag.objects.filter(user=self.user).values_list(
+                'name', flat=True,
+            )),
+            ['Vegan'],
+        )
+
+    def test_bulk_create_invalid_row_creates_nothing(self):
+        rows = [
+            {'title': 'Good', 'time_minutes': 5, 'price': '5.50'},
+            {'title': 'Bad', 'price': '5.50'},
+        ]
+
+        res = self._post_ndjson(rows)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Recipe.objects.count(), 0)
+
+    def test_bulk_create_malformed_ndjson(self):
+        res = self.client.post(
+            BULK_URL, '{"title": "a"}\nnot json',
+            content_type='application/x-ndjson',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_recipes(self):
+        other_user = get_user_model().objects.create_user(
+            email='test2@example.com',
+            password='example123'
+        )
+        create_recipe(user=other_user)
+        recipe = create_recipe(user=self.user)
+        recipe.tags.add(Tag.objects.create(user=self.user, name='vegan'))
+
+        res = self.client.get(EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(res.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(
+            json.loads(lines[0]),
+            json.loads(json.dumps(RecipeDetailSerializer(recipe).data)),
+        )
+
+
 class ImageUploadTests(TestCase):
     def setUp(self):
         self.client = APIClient()
@@ -0,0 +1,85 @@
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from datetime import date
+from decimal import Decimal
+
+from core.models import Recipe, Tag
+
+from recipe.renderers import MessagePackRenderer, msgpack
+
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+MSGPACK = 'application/msgpack'
+
+
+def detail_url(recipe_id):
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+@skipUnless(msgpack, 'msgpack is not installed')
+class MessagePackRendererTests(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='msgpack@example.com', password='test1234',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.recipe = Recipe.objects.create(
+            user=self.user, title='Soup', time_minutes=5,
+            price=Decimal('5.50'),
+        )
+        self.recipe.tags.add(Tag.objects.create(user=self.user, name='hot'))
+
+    def test_list_negotiated_by_accept_header(self):
+        expected = self.client.get(RECIPES_URL).json()
+
+        res = self.client.get(RECIPES_URL, HTTP_ACCEPT=MSGPACK)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res['Content-Type'], MSGPACK)
+        self.assertIn('Accept', res['Vary'])
+        self.assertEqual(msgpack.unpackb(res.content), expected)
+
+    def test_format_query_parameter(self):
+        res = self.client.get(
+            detail_url(self.recipe.id), {'format': 'msgpack'},
+        )
+
+        self.assertEqual(res['Content-Type'], MSGPACK)
+        data = msgpack.unpackb(res.content)
+        self.assertEqual(data['price'], '5.50')
+        self.assertEqual(data['tags'][0]['name'], 'hot')
+
+    def test_tags_and_errors(self):
+        tags = self.client.get(TAGS_URL, HTTP_ACCEPT=MSGPACK)
+        missing = self.client.get(detail_url(0), HTTP_ACCEPT=MSGPACK)
+
+        self.assertEqual(
+            msgpack.unpackb(tags.content)['results'][0]['name'], 'hot',
+        )
+        self.assertEqual(missing.status_code, 404)
+        self.assertIn('detail', msgpack.unpackb(missing.content))
+
+    def test_json_stays_default(self):
+        res = self.client.get(RECIPES_URL, HTTP_ACCEPT='*/*')
+
+        self.assertEqual(res['Content-Type'], 'application/json')
+
+    def test_native_types_converted(self):
+        content = MessagePackRenderer().render({'day': date(2021, 6, 1)})
+
+        self.assertEqual(msgpack.unpackb(content), {'day': '2021-06-01'})
+
+    @patch('recipe.renderers.msgpack', None)
+    def test_not_offered_without_msgpack(self):
+        res = self.client.get(RECIPES_URL, HTTP_ACCEPT=MSGPACK)
+
+        self.assertEqual(res.status_code, 406)
@@ -0,0 +1,193 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from decimal import Decimal
+
+from core.models import Recipe, Tag, Ingredient
+
+from recipe import stats
+
+STATS_URL = reverse('recipe:stats')
+RECIPES_URL = reverse('recipe:recipe-list')
+BULK_URL = reverse('recipe:recipe-bulk')
+
+
+def detail_url(recipe_id):
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+def create_recipe(user, **params):
+    defaults = {
+        'title': 'Sample recipe',
+        'time_minutes': 10,
+        'price': Decimal('5.00'),
+    }
+    defaults.update(params)
+
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class PublicStatsApiTests(TestCase):
+
+    def test_auth_required(self):
+        res = APIClient().get(STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class RecipeStatsTests(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='stats@example.com', password='test1234',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.vegan = Tag.objects.create(user=self.user, name='vegan')
+        self.quick = Tag.objects.create(user=self.user, name='quick')
+        self.salt = Ingredient.objects.create(user=self.user, name='salt')
+
+    def assert_consistent(self):
+        """The counters must match what a rebuild computes from scratch."""
+        maintained = stats.get_stats(self.user)
+        stats.rebuild()
+
+        self.assertEqual(maintained, stats.get_stats(self.user))
+        return maintained
+
+    def test_stats_endpoint(self):
+        soup = create_recipe(self.user, time_minutes=10, price='4.50')
+        stew = create_recipe(self.user, time_minutes=90, price='20.00')
+        create_recipe(self.user, time_minutes=200, price='99.99')
+        soup.tags.add(self.vegan, self.quick)
+        stew.tags.add(self.vegan)
+        stew.ingredients.add(self.salt)
+        other = get_user_model().objects.create_user(
+            email='other@example.com', password='test1234',
+        )
+        create_recipe(other)
+
+        res = self.client.get(STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['recipe_count'], 3)
+        self.assertEqual(res.data['time_minutes']['total'], 300)
+        self.assertEqual(res.data['time_minutes']['average'], 100.0)
+        self.assertEqual(res.data['price']['total'], '124.49')
+        self.assertEqual(res.data['price']['average'], '41.50')
+        self.assertEqual(
+            [b['count'] for b in res.data['time_minutes']['histogram']],
+            [1, 0, 0, 1, 1],
+        )
+        self.assertEqual(res.data['price']['histogram'][3], {
+            'min': '20.00', 'max': '50.00', 'count': 1,
+        })
+        self.assertEqual(res.data['tags'], [
+            {'id': self.vegan.id, 'name': 'vegan', 'recipe_count': 2},
+            {'id': self.quick.id, 'name': 'quick', 'recipe_count': 1},
+        ])
+        self.assertEqual(res.data['ingredients'][0]['recipe_count'], 1)
+        self.assert_consistent()
+
+    def test_empty_stats(self):
+        res = self.client.get(STATS_URL)
+
+        self.assertEqual(res.data['recipe_count'], 0)
+        self.assertIsNone(res.data['price']['average'])
+        self.assertEqual(res.data['price']['total'], '0.00')
+        self.assertEqual(res.data['tags'], [])
+
+    def test_query_count_independent_of_recipes(self):
+        create_recipe(self.user).tags.add(self.vegan)
+        with self.assertNumQueries(4):
+            self.client.get(STATS_URL)
+
+        for _ in range(20):
+            create_recipe(self.user).tags.add(self.vegan, self.quick)
+        with self.assertNumQueries(4):
+            self.client.get(STATS_URL)
+
+    def test_updates_through_api(self):
+        res = self.client.post(RECIPES_URL, {
+            'title': 'Soup', 'time_minutes': 10, 'price': '5.00',
+            'tags': [{'name': 'vegan'}, {'name': 'new'}],
+        }, format='json')
+        recipe_id = res.data['id']
+        self.client.patch(detail_url(recipe_id), {
+            'time_minutes': 45, 'price': '12.00', 'tags': [{'name': 'quick'}],
+        }, format='json')
+
+        data = self.assert_consistent()
+        self.assertEqual(data['time_minutes']['total'], 45)
+        self.assertEqual(data['tags'], [
+            {'id': self.quick.id, 'name': 'quick', 'recipe_count': 1},
+        ])
+
+        self.client.delete(detail_url(recipe_id))
+
+        data = self.assert_consistent()
+        self.assertEqual(data['recipe_count'], 0)
+        self.assertEqual(data['tags'], [])
+
+    def test_bulk_create(self):
+        lines = [
+            {'title': f'Recipe {i}', 'time_minutes': i, 'price': '1.00',
+             'tags': [{'name': 'vegan'}], 'ingredients': [{'name': 'salt'}]}
+            for i in range(3)
+        ]
+
+        self.client.post(
+            BULK_URL, '\n'.join(json.dumps(line) for line in lines),
+            content_type='application/x-ndjson',
+        )
+
+        data = self.assert_consistent()
+        self.assertEqual(data['recipe_count'], 3)
+        self.assertEqual(data['tags'][0]['recipe_count'], 3)
+        self.assertEqual(data['ingredients'][0]['recipe_count'], 3)
+
+    def test_relation_changes_from_both_sides(self):
+        recipes = [create_recipe(self.user) for _ in range(3)]
+        self.vegan.recipe_set.add(*recipes)
+        self.vegan.recipe_set.remove(recipes[0])
+        recipes[1].tags.add(self.quick)
+        recipes[1].tags.clear()
+        self.assert_consistent()
+
+        self.vegan.recipe_set.clear()
+        recipes[2].ingredients.set([self.salt])
+        data = self.assert_consistent()
+
+        self.assertEqual(data['tags'], [])
+        self.assertEqual(data['ingredients'][0]['recipe_count'], 1)
+
+    def test_removing_unlinked_objects(self):
+        recipe, other = create_recipe(self.user), create_recipe(self.user)
+        recipe.tags.add(self.vegan)
+
+        other.tags.remove(self.vegan)
+        self.quick.recipe_set.remove(recipe, other)
+        self.vegan.recipe_set.remove(other)
+
+        data = self.assert_consistent()
+        self.assertEqual(data['tags'], [
+            {'id': self.vegan.id, 'name': 'vegan', 'recipe_count': 1},
+        ])
+
+    def test_tag_and_recipe_deletes(self):
+        recipes = [create_recipe(self.user) for _ in range(2)]
+        recipes[0].tags.add(self.vegan, self.quick)
+        recipes[1].tags.add(self.quick)
+
+        self.vegan.delete()
+        Recipe.objects.filter(pk=recipes[0].pk).delete()
+
+        data = self.assert_consistent()
+        self.assertEqual(data['recipe_count'], 1)
+        self.assertEqual(data['tags'][0]['recipe_count'], 1)
@@ -1,13 +1,14 @@
 from django.contrib.auth import get_user_model
+from django.db.models import Count
 from django.urls import reverse
 from django.test import TestCase
 
 from rest_framework import status
 from rest_framework.test import APIClient
 
-from core.models import Tag
+from core.models import Recipe, Tag
 
-from recipe.serializers import TagSerializer
+from recipe.serializers import TagDetailSerializer
 
 TAGS_URL = reverse('recipe:tag-list')
 
@@ -42,11 +43,13 @@ class PrivateTagApis(TestCase):
 
         res = self.client.get(TAGS_URL)
 
-        tags = Tag.objects.all().order_by('-name')
-        serializer = TagSerializer(tags, many=True)
+        tags = Tag.objects.annotate(
+            recipe_count=Count('recipe'),
+        ).order_by('-name')
+        serializer = TagDetailSerializer(tags, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_tags_limited_to_user(self):
         user2 = create_user(email='example2@123.com')
@@ -56,9 +59,22 @@ class PrivateTagApis(TestCase):
 
         res = self.client.get(TAGS_URL)
 
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0]['name'], tag.name)
-        self.assertEqual(res.data[0]['id'], tag.id)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'][0]['name'], tag.name)
+        self.assertEqual(res.data['results'][0]['id'], tag.id)
+
+    def test_tags_page_size_capped(self):
+        for name in ['a', 'b', 'c']:
+            Tag.objects.create(user=self.user, name=name)
+
+        with self.settings(API_MAX_PAGE_SIZE=2):
+            res = self.client.get(TAGS_URL, {'page_size': 1000})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [t['name'] for t in res.data['results']],
+            ['c', 'b'],
+        )
 
     def test_update_tags(self):
         tag = Tag.objects.create(user=self.user, name='bar')
@@ -72,6 +88,16 @@ class PrivateTagApis(TestCase):
         tag.refresh_from_db()
         self.assertEqual(tag.name, payload['name'])
 
+    def test_update_tag_to_existing_name(self):
+        Tag.objects.create(user=self.user, name='foo')
+        tag = Tag.objects.create(user=self.user, name='bar')
+
+        res = self.client.patch(detail_url(tag.id), {'name': 'foo'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        tag.refresh_from_db()
+        self.assertEqual(tag.name, 'bar')
+
     def test_delete_tag(self):
         tag = Tag.objects.create(user=self.user, name='bar')
         url = detail_url(tag.id)
@@ -80,3 +106,37 @@ class PrivateTagApis(TestCase):
 
         self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
         self.assertFalse(tags.exists())
+
+    def test_recipe_count_and_assigned_only(self):
+        used = Tag.objects.create(user=self.user, name='used')
+        Tag.objects.create(user=self.user, name='unused')
+        for title in ('Soup', 'Stew'):
+            recipe = Recipe.objects.create(
+                user=self.user, title=title, time_minutes=5, price='1.00',
+            )
+            recipe.tags.add(used)
+
+        res = self.client.get(TAGS_URL, {'assigned_only': 1})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['results'], [
+            {'id': used.id, 'name': 'used', 'recipe_count': 2},
+        ])
+
+    def test_assigned_only_invalid(self):
+        res = self.client.get(TAGS_URL, {'assigned_only': 'yes'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_etag_changes_with_recipe_count(self):
+        tag = Tag.objects.create(user=self.user, name='vegan')
+        etag = self.client.get(TAGS_URL)['ETag']
+        recipe = Recipe.objects.create(
+            user=self.user, title='Soup', time_minutes=5, price='1.00',
+        )
+        recipe.tags.add(tag)
+
+        res = self.client.get(TAGS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['results'][0]['recipe_count'], 1)
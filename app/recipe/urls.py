@@ -12,5 +12,6 @@ router.register('ingredients', views.IngredientViewSets)
 app_name = 'recipe'
 
 urlpatterns = [
-    path('', include(router.urls))
+    path('stats/', views.StatsView.as_view(), name='stats'),
+    path('', include(router.urls)),
 ]
@@ -1,37 +1,141 @@
+import json
+
+from django.db import IntegrityError, transaction
+from django.db.models import Prefetch, prefetch_related_objects
+from django.db.models.functions import Coalesce
+from django.http import StreamingHttpResponse
+
 from rest_framework import viewsets, mixins, status
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.utils.encoders import JSONEncoder
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
+from core.db import ReplicaReadMixin
 from core.models import Recipe, Tag, Ingredient
-from recipe import serializers
+from core.throttling import WriteScopedThrottle
+from recipe import bulk, filters, images, search, serializers, stats
+from recipe.async_views import AsyncReadMixin
+from recipe.cache import CachedListMixin
+from recipe.conditional import ConditionalListMixin
+from recipe.fast_list import FastListMixin
+from recipe.pagination import (
+    RecipeCursorPagination,
+    RecipeAttrCursorPagination,
+)
+from recipe.parsers import NDJSONParser
+from recipe.renderers import MessagePackMixin
+from user.authentication import CachedTokenAuthentication
+
+EXPORT_CHUNK_SIZE = 500
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(AsyncReadMixin,
+                    ReplicaReadMixin,
+                    ConditionalListMixin,
+                    CachedListMixin,
+                    FastListMixin,
+                    MessagePackMixin,
+                    viewsets.ModelViewSet):
     serializer_class = serializers.RecipeDetailSerializer
     queryset = Recipe.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    pagination_class = RecipeCursorPagination
+    throttle_classes = [WriteScopedThrottle]
+    throttle_scope = 'recipe_write'
+
+    def _params_to_ints(self, name):
+        value = self.request.query_params.get(name)
+        if not value:
+            return None
+
+        ids = filters.parse_id_list(value)
+        if ids is None:
+            raise ValidationError({
+                name: [
+                    'Must be a comma separated list of at most '
+                    f'{filters.MAX_FILTER_IDS} positive integers.'
+                ],
+            })
 
-    @staticmethod
-    def _params_to_ints(qs):
-        return [int(str_id) for str_id in qs.split(',')]
+        return ids
+
+    def _build_queryset(self, queryset):
+        """Load nested tags/ingredients up front for read actions."""
+        if self.action not in ('list', 'retrieve'):
+            return queryset
+
+        fields = self.get_serializer_class().Meta.fields
+        columns = [f for f in fields if f not in ('tags', 'ingredients')]
+
+        # Nested items are ordered by id, as the fast list path does.
+        return queryset.only(*columns).prefetch_related(
+            Prefetch(
+                'tags',
+                queryset=Tag.objects.only('id', 'name').order_by('id'),
+            ),
+            Prefetch(
+                'ingredients',
+                queryset=Ingredient.objects.only('id', 'name').order_by('id'),
+            ),
+        )
 
     def get_queryset(self):
-        tags = self.request.query_params.get('tags')
-        ingredients = self.request.query_params.get('ingredients')
-        queryset = self.queryset
+        tag_ids = self._params_to_ints('tags')
+        ingredient_ids = self._params_to_ints('ingredients')
+        match = self.request.query_params.get('match', filters.MATCH_ANY)
+        if match not in (filters.MATCH_ANY, filters.MATCH_ALL):
+            raise ValidationError({'match': ['Must be "any" or "all".']})
+
+        queryset = self.queryset.filter(user=self.request.user)
+        if tag_ids:
+            queryset = filters.filter_by_relation(
+                queryset, 'tags', tag_ids, match,
+            )
 
-        if tags:
-            tag_ids = self._params_to_ints(tags)
-            queryset = queryset.filter(tags__id__in=tag_ids)
+        if ingredient_ids:
+            queryset = filters.filter_by_relation(
+                queryset, 'ingredients', ingredient_ids, match,
+            )
 
-        if tags:
-            ingredient_ids = self._params_to_ints(ingredients)
-            queryset = queryset.filter(ingredients__id__in=ingredient_ids)
+        term = self.request.query_params.get('search', '').strip()
+        if term:
+            queryset = search.search_recipes(queryset, term)
 
-        return self.queryset.filter(user=self.request.user).order_by('-id').distinct()
+        return self._build_queryset(queryset).order_by('-id')
+
+    def _export_lines(self, queryset):
+        chunk = []
+        for recipe in queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+            chunk.append(recipe)
+            if len(chunk) == EXPORT_CHUNK_SIZE:
+                yield from self._serialize_chunk(chunk)
+                chunk = []
+
+        yield from self._serialize_chunk(chunk)
+
+    def _serialize_chunk(self, chunk):
+        prefetch_related_objects(
+            chunk,
+            Prefetch('tags', queryset=Tag.objects.only('id', 'name')),
+            Prefetch(
+                'ingredients',
+                queryset=Ingredient.objects.only('id', 'name'),
+            ),
+        )
+        for data in serializers.RecipeDetailSerializer(chunk, many=True).data:
+            yield json.dumps(data, cls=JSONEncoder) + '\n'
+
+    def get_conditional_sources(self):
+        user = self.request.user
+        return [
+            self.get_queryset(),
+            Tag.objects.filter(user=user),
+            Ingredient.objects.filter(user=user),
+        ]
 
     def get_serializer_class(self):
         if self.action == 'list':
@@ -51,28 +155,167 @@ class RecipeViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(recipe, data=request.data)
 
         if serializer.is_valid():
-            serializer.save()
+            recipe = serializer.save()
+            images.enqueue_processing(recipe)
             return Response(serializer.data, status.HTTP_200_OK)
 
         return Response(serializer.errors, status.HTTP_400_BAD_REQUEST)
 
+    @action(
+        methods=['POST'],
+        detail=False,
+        url_path='bulk',
+        parser_classes=[NDJSONParser],
+    )
+    def bulk(self, request):
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        recipes = serializer.save(user=self.request.user)
+
+        return Response({'created': len(recipes)}, status.HTTP_201_CREATED)
 
-class BaseRecipeAttrViewSet(mixins.UpdateModelMixin,
+    @action(methods=['GET'], detail=False, url_path='export')
+    def export(self, request):
+        queryset = self.queryset.filter(user=self.request.user).order_by('id')
+        # The body is produced after the view returns, so keep the
+        # database that was routed to for this request.
+        queryset = queryset.using(queryset.db)
+
+        return StreamingHttpResponse(
+            self._export_lines(queryset),
+            content_type='application/x-ndjson',
+        )
+
+
+class BaseRecipeAttrViewSet(AsyncReadMixin,
+                            ReplicaReadMixin,
+                            ConditionalListMixin,
+                            CachedListMixin,
+                            FastListMixin,
+                            MessagePackMixin,
+                            mixins.UpdateModelMixin,
                             mixins.DestroyModelMixin,
                             mixins.ListModelMixin,
                             viewsets.GenericViewSet):
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    pagination_class = RecipeAttrCursorPagination
+    throttle_classes = [WriteScopedThrottle]
+    throttle_scope = 'recipe_write'
 
     def get_queryset(self):
-        return self.queryset.filter(user=self.request.user).order_by('-name')
+        """Annotate how many recipes use each object, from the counters
+        kept by `recipe.stats`.
+        """
+        assigned_only = self.request.query_params.get('assigned_only', '0')
+        if assigned_only not in ('0', '1'):
+            raise ValidationError({'assigned_only': ['Must be 0 or 1.']})
+
+        queryset = self.queryset.filter(user=self.request.user).annotate(
+            recipe_count=Coalesce('recipe_counter__count', 0),
+        )
+        if assigned_only == '1':
+            queryset = queryset.filter(recipe_counter__count__gt=0)
+
+        return queryset.order_by('-name')
+
+    def get_conditional_sources(self):
+        # Recipes are touched whenever their tags or ingredients change,
+        # which is what moves the counts.
+        return [
+            self.get_queryset(),
+            Recipe.objects.filter(user=self.request.user),
+        ]
+
+    def perform_update(self, serializer):
+        try:
+            with transaction.atomic():
+                serializer.save()
+        except IntegrityError:
+            raise ValidationError({'name': ['This name is already in use.']})
+
+    def get_serializer_class(self):
+        return {
+            'bulk_delete': serializers.BulkDeleteSerializer,
+            'bulk_rename': serializers.BulkRenameSerializer,
+            'merge': serializers.MergeSerializer,
+        }.get(self.action, self.serializer_class)
+
+    def _validated(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        return serializer.validated_data
+
+    def _check_owned(self, field, ids):
+        owned = self.queryset.filter(user=self.request.user, id__in=ids)
+        if owned.count() != len(set(ids)):
+            raise ValidationError({field: ['Unknown or foreign ids.']})
+
+    @action(methods=['POST'], detail=False, url_path='bulk_delete')
+    def bulk_delete(self, request):
+        ids = self._validated(request)['ids']
+        self._check_owned('ids', ids)
+        with transaction.atomic():
+            deleted = bulk.delete_objects(request.user, self.relation, ids)
+
+        return Response({'deleted': deleted})
+
+    @action(methods=['POST'], detail=False, url_path='bulk_rename')
+    def bulk_rename(self, request):
+        names = {
+            item['id']: item['name']
+            for item in self._validated(request)['items']
+        }
+        self._check_owned('items', list(names))
+        try:
+            with transaction.atomic():
+                renamed = bulk.rename_objects(
+                    request.user, self.relation, names,
+                )
+        except IntegrityError:
+            raise ValidationError({'items': ['A name is already in use.']})
+
+        return Response({'renamed': renamed})
+
+    @action(methods=['POST'], detail=False, url_path='merge')
+    def merge(self, request):
+        data = self._validated(request)
+        self._check_owned('target_id', [data['target_id']])
+        self._check_owned('source_ids', data['source_ids'])
+        try:
+            with transaction.atomic():
+                result = bulk.merge_objects(
+                    request.user, self.relation,
+                    data['target_id'], data['source_ids'],
+                )
+        except IntegrityError:
+            # A link to the target was added concurrently; nothing moved.
+            raise ValidationError({
+                'source_ids': ['Changed during the merge, please retry.'],
+            })
+
+        return Response(result)
 
 
 class TagViewSet(BaseRecipeAttrViewSet):
-    serializer_class = serializers.TagSerializer
+    serializer_class = serializers.TagDetailSerializer
     queryset = Tag.objects.all()
+    relation = 'tags'
 
 
 class IngredientViewSets(BaseRecipeAttrViewSet):
-    serializer_class = serializers.IngredientSerializer
+    serializer_class = serializers.IngredientDetailSerializer
     queryset = Ingredient.objects.all()
+    relation = 'ingredients'
+
+
+class StatsView(ReplicaReadMixin, MessagePackMixin, APIView):
+    """Recipe totals, histograms and per tag/ingredient counts for the
+    user, read from the counters maintained by `recipe.stats`.
+    """
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return Response(stats.get_stats(request.user))
@@ -0,0 +1,116 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+TOKEN_KEY = 'auth:token:{digest}'
+
+
+def _digest(key):
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+class LocalTokenCache:
+    """Bounded, thread safe LRU of resolved tokens with a per-entry TTL."""
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, digest):
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                return None
+            data, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[digest]
+                return None
+            self._entries.move_to_end(digest)
+
+        return data
+
+    def set(self, digest, data):
+        with self._lock:
+            self._entries[digest] = (data, time.monotonic() + self.ttl)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, digest):
+        with self._lock:
+            self._entries.pop(digest, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+local_tokens = LocalTokenCache(
+    settings.TOKEN_AUTH_LOCAL_SIZE,
+    settings.TOKEN_AUTH_LOCAL_TTL,
+)
+
+
+def get_shared_cache():
+    return caches[settings.TOKEN_AUTH_CACHE_ALIAS]
+
+
+def revoke_token(key):
+    """Forget a cached token in this process and in the shared cache.
+
+    Other processes drop their copy within TOKEN_AUTH_LOCAL_TTL seconds.
+    """
+    digest = _digest(key)
+    local_tokens.delete(digest)
+    get_shared_cache().delete(TOKEN_KEY.format(digest=digest))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Token authentication that skips the token/user query when cached.
+
+    Lookups go through an in-process LRU first, then the shared cache,
+    and only then the database. Only the user's id and active flag are
+    cached; `request.user` defers every other field, so anything that
+    reads or saves the profile gets it from the database.
+    """
+
+    def authenticate_credentials(self, key):
+        digest = _digest(key)
+        cached = local_tokens.get(digest)
+        if cached is None:
+            shared_key = TOKEN_KEY.format(digest=digest)
+            cached = get_shared_cache().get(shared_key)
+            if cached is None:
+                user, _token = super().authenticate_credentials(key)
+                cached = (user.pk, user.is_active)
+                get_shared_cache().set(
+                    shared_key, cached, settings.TOKEN_AUTH_CACHE_TTL,
+                )
+            local_tokens.set(digest, cached)
+
+        user_id, is_active = cached
+        if not is_active:
+            raise exceptions.AuthenticationFailed(
+                _('User inactive or deleted.'),
+            )
+        user = get_user_model().from_db(
+            DEFAULT_DB_ALIAS, ['id', 'is_active'], [user_id, is_active],
+        )
+        token = self.get_model().from_db(
+            DEFAULT_DB_ALIAS, ['key', 'user_id'], [key, user_id],
+        )
+        token.user = user
+
+        return (user, token)
@@ -0,0 +1,68 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from core.db import close_unhealthy_connections
+
+_executor = None
+_slots = None
+_lock = threading.Lock()
+
+
+class LoginBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = _('Too many logins in progress, try again shortly.')
+    default_code = 'login_busy'
+
+
+def _get_pool():
+    global _executor, _slots
+    with _lock:
+        if _executor is None:
+            workers = settings.LOGIN_HASH_WORKERS
+            _executor = ThreadPoolExecutor(
+                max_workers=workers,
+                thread_name_prefix='login-hash',
+            )
+            _slots = threading.BoundedSemaphore(
+                workers + settings.LOGIN_HASH_QUEUE_SIZE
+            )
+
+    return _executor, _slots
+
+
+def _call(fn, args, kwargs):
+    # Keep the pool thread's connection for CONN_MAX_AGE, like the
+    # request handler does for its own.
+    close_old_connections()
+    close_unhealthy_connections()
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+def run_in_hash_pool(fn, *args, **kwargs):
+    """Run a password hashing call on the bounded login pool.
+
+    At most LOGIN_HASH_WORKERS hashes run at once per process, with up to
+    LOGIN_HASH_QUEUE_SIZE callers waiting; anyone beyond that gets a 503
+    after LOGIN_HASH_TIMEOUT seconds instead of tying up the worker. With
+    no workers configured the call runs inline.
+    """
+    if not settings.LOGIN_HASH_WORKERS:
+        return fn(*args, **kwargs)
+
+    executor, slots = _get_pool()
+    if not slots.acquire(timeout=settings.LOGIN_HASH_TIMEOUT):
+        raise LoginBusy()
+    try:
+        return executor.submit(_call, fn, args, kwargs).result()
+    finally:
+        slots.release()
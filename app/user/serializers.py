@@ -7,6 +7,8 @@ from django.utils.translation import gettext as _
 
 from rest_framework import serializers
 
+from user.hash_pool import run_in_hash_pool
+
 
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
@@ -36,7 +38,8 @@ class AuthTokenSerializer(serializers.Serializer):
     def validate(self, attrs):
         email = attrs.get('email')
         password = attrs.get('password')
-        user = authenticate(
+        user = run_in_hash_pool(
+            authenticate,
             request=self.context.get('request'),
             username=email,
             password=password,
@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from rest_framework.authtoken.models import Token
+
+from user.authentication import revoke_token
+
+
+@receiver(post_delete, sender=Token)
+def revoke_deleted_token(sender, instance, **kwargs):
+    revoke_token(instance.key)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def revoke_user_tokens(sender, instance, created, **kwargs):
+    """Drop cached tokens whenever the user changes.
+
+    This covers deactivation, which the cached entries record.
+    """
+    if created:
+        return
+
+    for key in Token.objects.filter(user=instance).values_list(
+        'key', flat=True,
+    ):
+        revoke_token(key)
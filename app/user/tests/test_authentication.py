@@ -0,0 +1,137 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from unittest.mock import patch
+
+from user import authentication
+
+ME_URL = reverse('user:me')
+
+
+def create_user(**params):
+    return get_user_model().objects.create_user(**params)
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    def setUp(self):
+        authentication.local_tokens.clear()
+        authentication.get_shared_cache().clear()
+        self.user = create_user(
+            email='test@example.com',
+            password='testpass123',
+            name='Test Name',
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_cached_token_skips_database(self):
+        self.client.get(ME_URL)
+
+        # Only the profile itself is read.
+        with self.assertNumQueries(1):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['email'], self.user.email)
+
+    def test_shared_cache_used_when_local_misses(self):
+        self.client.get(ME_URL)
+        authentication.local_tokens.clear()
+
+        with self.assertNumQueries(1):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_invalid_token_rejected(self):
+        self.client.credentials(HTTP_AUTHORIZATION='Token invalid')
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deleted_token_revoked(self):
+        self.client.get(ME_URL)
+
+        self.token.delete()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_revoked(self):
+        self.client.get(ME_URL)
+
+        self.user.is_active = False
+        self.user.save()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_password_change_revokes_cached_user(self):
+        self.client.get(ME_URL)
+
+        self.user.set_password('newpass123')
+        self.user.save()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.wsgi_request.user.check_password('newpass123'))
+
+    def test_cache_holds_no_user_data(self):
+        self.client.get(ME_URL)
+
+        cached = authentication.get_shared_cache().get(
+            authentication.TOKEN_KEY.format(
+                digest=authentication._digest(self.token.key),
+            ),
+        )
+
+        self.assertEqual(cached, (self.user.pk, True))
+
+    def test_update_does_not_write_back_cached_user(self):
+        self.client.get(ME_URL)
+        cached = authentication.local_tokens.get(
+            authentication._digest(self.token.key),
+        )
+        self.user.set_password('newpass123')
+        self.user.save()
+        # Another worker still holds its local entry.
+        authentication.local_tokens.set(
+            authentication._digest(self.token.key), cached,
+        )
+
+        res = self.client.patch(ME_URL, {'name': 'New Name'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.name, 'New Name')
+        self.assertTrue(self.user.check_password('newpass123'))
+
+
+class LocalTokenCacheTests(TestCase):
+    def test_evicts_least_recently_used(self):
+        cache = authentication.LocalTokenCache(max_size=2, ttl=60)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), 3)
+
+    @patch('user.authentication.time.monotonic')
+    def test_entries_expire(self, patched_monotonic):
+        cache = authentication.LocalTokenCache(max_size=2, ttl=10)
+        patched_monotonic.return_value = 100
+        cache.set('a', 1)
+
+        patched_monotonic.return_value = 111
+
+        self.assertIsNone(cache.get('a'))
@@ -0,0 +1,87 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connections
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from unittest.mock import patch
+
+import threading
+
+from user import hash_pool
+
+TOKEN_URL = reverse('user:token')
+
+
+def create_user(**params):
+    return get_user_model().objects.create_user(**params)
+
+
+class PasswordHashingTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.payload = {'email': 'test@example.com', 'password': 'pass12345'}
+
+    def test_new_passwords_use_argon2(self):
+        user = create_user(**self.payload)
+
+        self.assertTrue(user.password.startswith('argon2$'))
+
+    def test_pbkdf2_hash_upgraded_on_login(self):
+        user = create_user(email=self.payload['email'])
+        user.password = make_password(
+            self.payload['password'],
+            hasher='pbkdf2_sha256',
+        )
+        user.save()
+
+        res = self.client.post(TOKEN_URL, self.payload)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('argon2$'))
+
+    def test_changed_cost_rehashes_on_login(self):
+        user = create_user(**self.payload)
+
+        with self.settings(ARGON2_TIME_COST=3):
+            self.client.post(TOKEN_URL, self.payload)
+
+        user.refresh_from_db()
+        self.assertIn('t=3', user.password)
+
+
+class HashPoolTests(TestCase):
+    @override_settings(LOGIN_HASH_WORKERS=1)
+    def test_runs_on_pool_thread(self):
+        name = hash_pool.run_in_hash_pool(
+            lambda: threading.current_thread().name
+        )
+
+        self.assertTrue(name.startswith('login-hash'))
+
+    @override_settings(LOGIN_HASH_WORKERS=1)
+    def test_keeps_persistent_connections(self):
+        with patch('user.hash_pool.close_old_connections') as close_old:
+            with patch.object(connections, 'close_all') as close_all:
+                hash_pool.run_in_hash_pool(lambda: None)
+
+        close_all.assert_not_called()
+        self.assertEqual(close_old.call_count, 2)
+
+    @override_settings(LOGIN_HASH_WORKERS=1)
+    def test_full_pool_raises_busy(self):
+        hash_pool._get_pool()
+        with patch.object(hash_pool._slots, 'acquire', return_value=False):
+            with self.assertRaises(hash_pool.LoginBusy):
+                hash_pool.run_in_hash_pool(lambda: None)
+
+    def test_runs_inline_without_workers(self):
+        name = hash_pool.run_in_hash_pool(
+            lambda: threading.current_thread().name
+        )
+
+        self.assertEqual(name, threading.current_thread().name)
@@ -1,7 +1,12 @@
-from rest_framework import generics, authentication, permissions
+from django.contrib.auth import get_user_model
+
+from rest_framework import generics, permissions
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.settings import api_settings
 
+from core.db import ReplicaReadMixin
+from core.throttling import SlidingWindowScopedThrottle
+from user.authentication import CachedTokenAuthentication
 from user.serializers import (
     UserSerializer,
     AuthTokenSerializer
@@ -10,17 +15,22 @@ from user.serializers import (
 
 class CreateUserView(generics.CreateAPIView):
     serializer_class = UserSerializer
+    throttle_classes = [SlidingWindowScopedThrottle]
+    throttle_scope = 'signup'
 
 
 class CreateTokenView(ObtainAuthToken):
     serializer_class = AuthTokenSerializer
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
+    throttle_classes = [SlidingWindowScopedThrottle]
+    throttle_scope = 'token'
 
 
-class ManageUserView(generics.RetrieveUpdateAPIView):
+class ManageUserView(ReplicaReadMixin, generics.RetrieveUpdateAPIView):
     serializer_class = UserSerializer
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):
-        return self.request.user
+        # request.user only carries what token authentication cached.
+        return get_user_model().objects.get(pk=self.request.user.pk)
@@ -0,0 +1,20 @@
+server {
+    listen ${LISTEN_PORT}
+
+    location /static {
+        alias           /vol/static;
+        gzip            on;
+        gzip_types      text/css application/javascript image/svg+xml;
+        gzip_min_length 1024;
+        gzip_vary       on;
+    }
+
+    location / {
+        proxy_pass           http://${APP_HOST}:${APP_PORT};
+        proxy_http_version   1.1;
+        proxy_set_header     Host $host;
+        proxy_set_header     X-Forwarded-For $remote_addr;
+        proxy_set_header     X-Forwarded-Proto $scheme;
+        client_max_body_size 10M;
+    }
+}
\ No newline at end of file
@@ -2,7 +2,11 @@ server {
     listen ${LISTEN_PORT}
 
     location /static {
-        alias /vol/static;
+        alias           /vol/static;
+        gzip            on;
+        gzip_types      text/css application/javascript image/svg+xml;
+        gzip_min_length 1024;
+        gzip_vary       on;
     }
 
     location / {
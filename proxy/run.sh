@@ -2,6 +2,10 @@
 
 set -e
 
-envsubst < /etc/nginx/default.conf.tpl > etc/nginx/conf.d/default.conf
-nginx -g 'daemon off;'
+TEMPLATE=/etc/nginx/default.conf.tpl
+if [ "${SERVER_MODE:-wsgi}" = "asgi" ]; then
+    TEMPLATE=/etc/nginx/default-asgi.conf.tpl
+fi
 
+envsubst '${LISTEN_PORT} ${APP_HOST} ${APP_PORT}' < $TEMPLATE > etc/nginx/conf.d/default.conf
+nginx -g 'daemon off;'
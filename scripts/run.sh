@@ -6,4 +6,17 @@ python manage.py wait_for_db
 python manage.py collectstatic --noinput
 python manage.py migrate
 
-uwsgi --socket :9000 --workers 4 --master --enable-threads --model app.wsgi
\ No newline at end of file
+# Workers share request metrics through this directory; start from zero.
+export METRICS_DIR="${METRICS_DIR:-/tmp/metrics}"
+mkdir -p "$METRICS_DIR"
+find "$METRICS_DIR" -name '*.json' -delete
+
+if [ "${SERVER_MODE:-wsgi}" = "asgi" ]; then
+    gunicorn app.asgi:application \
+        --bind :9000 \
+        --workers "${APP_WORKERS:-4}" \
+        --worker-class uvicorn.workers.UvicornWorker \
+        --forwarded-allow-ips "${FORWARDED_ALLOW_IPS:-127.0.0.1}"
+else
+    uwsgi --socket :9000 --workers "${APP_WORKERS:-4}" --master --enable-threads --module app.wsgi
+fi